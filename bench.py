@@ -0,0 +1,186 @@
+###########################################################################
+# This object runs the fixed workloads for peuchre-bench: a set number of
+# games between a team1 and team2 player module, at a given number of
+# concurrent game threads, optionally split across several worker
+# processes.  For each point it measures:
+#  - games/s and hands/s, over the wall clock time of the whole point
+#  - the CPU time spent per hand in the peuchre process (with euchred this
+#    is client time only; with the python stand-in it includes the server)
+#  - the p50 and p99 game duration
+#
+# The per-point results are plain dicts, so the peuchre-bench script can
+# write them out as CSV or JSON.
+
+import time
+import threading
+import multiprocessing
+
+from logging import warning as warn, log, debug, info, error, critical
+
+from game import Game
+from record import Record
+from pool import Pool
+
+
+###########################################################################
+# This is the entry point for a worker process: it needs to be a module
+# level function so multiprocessing can pickle it
+#
+def runWorker(kwargs):
+    return Bench(**kwargs).runGames()
+
+
+class Bench:
+
+    # these are the columns of a result row, in output order
+    columns = [ 'server', 'workers', 'threads', 'games', 'hands', 'seconds',
+        'games_s', 'hands_s', 'cpu_ms_hand', 'p50_s', 'p99_s' ]
+
+
+    ###########################################################################
+    # This initializes the object
+    #
+    def __init__(self,**kwargs):
+        # the team modules to load, by name, as per peuchre --team1/--team2
+        self.team1 = 'random0'
+        if 'team1' in kwargs:
+            self.team1 = kwargs['team1']
+        self.team2 = 'random0'
+        if 'team2' in kwargs:
+            self.team2 = kwargs['team2']
+
+        # the workload: the number of games and the number of threads
+        self.numgames = 100
+        if 'numgames' in kwargs:
+            self.numgames = kwargs['numgames']
+        self.numthreads = 25
+        if 'numthreads' in kwargs:
+            self.numthreads = kwargs['numthreads']
+
+        # the server inactivity timeout passed to each game
+        self.timeout = 30
+        if 'timeout' in kwargs:
+            self.timeout = kwargs['timeout']
+
+        # the server implementation passed to each game
+        self.serverimpl = "euchred"
+        if 'serverimpl' in kwargs:
+            self.serverimpl = kwargs['serverimpl']
+
+
+    ###########################################################################
+    # This returns the p'th percentile of a list of values, using the
+    # nearest rank method; it returns 0 for an empty list
+    #
+    @staticmethod
+    def percentile(values, p):
+        if len(values) == 0:
+            return 0
+        values = sorted(values)
+        rank = int(round(p/100 * (len(values)-1)))
+        return values[rank]
+
+
+    ###########################################################################
+    # This runs self.numgames games, at most self.numthreads at a time, in
+    # this process, and returns the raw measurements: the game and hand
+    # counts, the wall and CPU time, and the list of game durations
+    #
+    def runGames(self):
+        Team1 = __import__(self.team1, globals(), locals(), ['Player'], 0) \
+            .Player
+        Team2 = __import__(self.team2, globals(), locals(), ['Player'], 0) \
+            .Player
+
+        # a record object that never writes its csv files, and a lock for it
+        record = Record(team1=self.team1, team2=self.team2, files=False)
+        lock = threading.Lock()
+
+        numthreads = min(self.numgames, self.numthreads)
+        threads = [None]*numthreads
+        pools = [ Pool() for i in range(numthreads) ]
+        durations = []
+        gcount = 0
+
+        wall = time.time()
+        cpu = time.process_time()
+
+        # this is the same slot loop as the peuchre mainline, but it polls
+        # much more often, so that refilling a slot doesn't dominate the
+        # measurement
+        while gcount < self.numgames or any(threads):
+            for i in range(0,numthreads):
+                if threads[i] is not None and not threads[i].is_alive():
+                    durations.append(threads[i].end - threads[i].begin)
+                    threads[i] = None
+                if threads[i] is None and gcount < self.numgames:
+                    threads[i] = Game(
+                        id=i, gcount=gcount, lock=lock,
+                        stats=False, record=record,
+                        team1=Team1, team2=Team2,
+                        timeout=self.timeout,
+                        serverimpl=self.serverimpl,
+                        pool=pools[i] )
+                    threads[i].start()
+                    gcount += 1
+            time.sleep(0.005)
+
+        return {
+            'games'     : record.counts.games,
+            'hands'     : record.counts.hands,
+            'seconds'   : time.time() - wall,
+            'cpu'       : time.process_time() - cpu,
+            'durations' : durations,
+        }
+
+
+    ###########################################################################
+    # This runs one point of the scaling curve: numgames games at numthreads
+    # threads per worker, across the given number of worker processes, and
+    # returns a result row
+    #
+    def runPoint(self, workers):
+        if workers <= 1:
+            workers = 1
+            wall = time.time()
+            results = [ self.runGames() ]
+            wall = time.time() - wall
+        else:
+            # split the games as evenly as we can across the workers
+            jobs = []
+            for w in range(workers):
+                jobs.append({
+                    'team1'      : self.team1,
+                    'team2'      : self.team2,
+                    'numgames'   : self.numgames // workers
+                                   + (1 if w < self.numgames % workers else 0),
+                    'numthreads' : self.numthreads,
+                    'timeout'    : self.timeout,
+                    'serverimpl' : self.serverimpl,
+                })
+            wall = time.time()
+            with multiprocessing.Pool(workers) as pool:
+                results = pool.map(runWorker, jobs)
+            wall = time.time() - wall
+
+        # aggregate the worker results
+        games = sum(r['games'] for r in results)
+        hands = sum(r['hands'] for r in results)
+        cpu = sum(r['cpu'] for r in results)
+        durations = []
+        for r in results:
+            durations.extend(r['durations'])
+
+        return {
+            'server'      : self.serverimpl,
+            'workers'     : workers,
+            'threads'     : self.numthreads,
+            'games'       : games,
+            'hands'       : hands,
+            'seconds'     : round(wall, 3),
+            'games_s'     : round(games / wall, 3) if wall > 0 else 0,
+            'hands_s'     : round(hands / wall, 3) if wall > 0 else 0,
+            'cpu_ms_hand' : round(1000 * cpu / hands, 3) if hands > 0 else 0,
+            'p50_s'       : round(self.percentile(durations, 50), 4),
+            'p99_s'       : round(self.percentile(durations, 99), 4),
+        }
@@ -0,0 +1,45 @@
+###########################################################################
+# These are the pieces the batch scripts (peuchre-bench, peuchre-league,
+# and peuchre-sweep) share, so they can't drift apart: the -v option, the
+# logging setup it controls, and the choice of server.
+
+import sys
+import logging
+
+from game import Game
+
+
+###########################################################################
+# This adds the option to show the game logs, which are normally
+# suppressed
+#
+def addVerboseOption(parser):
+    parser.add_option("-v", "--verbose",
+                      dest="verbose",
+                      default=False,
+                      action="store_true",
+                      help="show the game logs on stdout")
+
+
+###########################################################################
+# This sets up logging: we only want to see the script's own progress
+# messages, unless we've been asked for the full game logs
+#
+def setupLogging(verbose):
+    logging.basicConfig(
+        stream=sys.stdout,
+        format="%(asctime)s :: %(message)s",
+        datefmt='%Y-%m-%d %H:%M:%S',
+        level=logging.INFO if verbose else logging.WARNING)
+
+
+###########################################################################
+# This picks the server (see Game.defaultServerImpl()), and exits if the
+# one asked for isn't available
+#
+def pickServer(serverimpl):
+    try:
+        return Game.defaultServerImpl(serverimpl)
+    except ValueError as e:
+        sys.stderr.write("%s\n" % (e))
+        sys.exit(1)
@@ -0,0 +1,141 @@
+###########################################################################
+# This runs duplicate games, as in duplicate bridge: every set of deals is
+# played twice, once with the team 1 module in the team 1 seats (p0t1 and
+# p2t1) and the team 2 module in the team 2 seats (p1t2 and p3t2), and once
+# with the modules swapped between the seat pairs.  Both games of a pair
+# are run at the same time, in their own thread slots and on their own
+# tables, with the same scripted deals (see pyeuchred.Table).
+#
+# Each deal is scored as the team 1 module's net points over both plays of
+# it: whatever the cards favoured in one game, they favoured the other
+# module in its twin, so the card luck cancels out and what's left is the
+# difference between the modules.  A game of a pair can end before its
+# twin, so the pairs are the deals played in both.
+
+import csv
+import random
+import threading
+
+from pyeuchred import shuffleDeal
+from replay import DealScore, meanError
+
+
+class Duplicate:
+
+    ###########################################################################
+    # This initializes the object
+    #
+    def __init__(self, **kwargs):
+        # the number of deals we script for each pair of games: a game is
+        # rarely more than 20 hands, and if one does run out, it just ends
+        self.deals = 40
+        if 'deals' in kwargs:
+            self.deals = kwargs['deals']
+
+        # the random number generator we shuffle with
+        self.rng = random.Random()
+        if 'rng' in kwargs:
+            self.rng = kwargs['rng']
+
+        self.lock = threading.Lock()
+        self.pairs = 0
+
+        # the nets from the first game of each pair to finish, by pair, and
+        # the paired results, as (pair, hand, straight, swapped)
+        self.waiting = {}
+        self.results = []
+
+
+    ###########################################################################
+    # This returns a new pair number, and the deals for both its games
+    #
+    def newPair(self):
+        with self.lock:
+            self.pairs += 1
+            pair = self.pairs
+        dealer = self.rng.randrange(4)
+        deals = []
+        for i in range(self.deals):
+            deals.append(shuffleDeal(self.rng, dealer))
+            dealer = (dealer + 1) % 4
+        return (pair, deals)
+
+
+    ###########################################################################
+    # This returns the observer that scores one game of a pair: swapped is
+    # set for the game with the team 2 module in the team 1 seats
+    #
+    def collector(self, pair, swapped):
+        return DealScore(lambda nets: self.add(pair, swapped, nets))
+
+
+    ###########################################################################
+    # This takes a game's team 1 seat nets: once we have both games of a
+    # pair, we pair them up by deal, as the team 1 module's nets
+    #
+    def add(self, pair, swapped, nets):
+        with self.lock:
+            if pair not in self.waiting:
+                self.waiting[pair] = (swapped, nets)
+                return
+            (otherswapped, othernets) = self.waiting.pop(pair)
+            if swapped:
+                (straight, flipped) = (othernets, nets)
+            else:
+                (straight, flipped) = (nets, othernets)
+            for hand in range(min(len(straight), len(flipped))):
+                self.results.append(
+                    (pair, hand, straight[hand], -flipped[hand]))
+
+
+    ###########################################################################
+    # This returns the lines of our report: the team 1 module's mean net
+    # per deal played, with its standard error and 95% interval, and how
+    # many more hands we'd have needed for the same error from independent
+    # deals.  A pair whose other game never finished (eg. it hit the
+    # timeout) will never be paired up now, so it's dropped.
+    #
+    def report(self):
+        with self.lock:
+            results = list(self.results)
+            orphans = len(self.waiting)
+            self.waiting.clear()
+        lines = []
+        if orphans:
+            lines.append("duplicate: %d pairs dropped, as only one of their "
+                "games finished" % (orphans))
+        if not results:
+            return lines + [
+                "duplicate: no deals played in both games of a pair" ]
+
+        # each deal was played twice, so the net per hand is half the pair's
+        (n, mean, err) = meanError([ (r[2] + r[3])/2 for r in results ])
+        lines += [
+            "duplicate: %d deals, each played twice" % (n),
+            "duplicate: team 1 module net per hand %+.4f +/- %.4f "
+                "(95%%: %+.4f to %+.4f)"
+                % (mean, err, mean - 1.96*err, mean + 1.96*err),
+        ]
+
+        # the error we'd get from the same 2n hands played independently
+        singles = [ r[2] for r in results ] + [ r[3] for r in results ]
+        (m, smean, serr) = meanError(singles)
+        if err > 0:
+            lines.append("duplicate: pairing needs %.1fx fewer hands than "
+                "independent deals" % ((serr / err)**2))
+        return lines
+
+
+    ###########################################################################
+    # This writes the per-deal results out as CSV: the team 1 module's net
+    # in each game of the pair, and their sum
+    #
+    def writeCsv(self, filename):
+        with self.lock:
+            results = list(self.results)
+        with open(filename, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["pair", "hand", "straight", "swapped", "sum"])
+            for (pair, hand, straight, swapped) in results:
+                writer.writerow([pair, hand, straight, swapped,
+                    straight + swapped])
@@ -0,0 +1,115 @@
+###########################################################################
+# This is the encoder for the messages peuchre sends to the server.  Every
+# client message is one of a handful of fixed layouts, so rather than build
+# a format string and a new bytes object for each message, we compile a
+# struct.Struct for each layout once, and pack the messages into a buffer
+# that's allocated once per player:
+#  - plain : <msglen> <msg> <gh> <ph> <tail>
+#  - suit  : <msglen> <msg> <gh> <ph> <suit> <tail>
+#  - card  : <msglen> <msg> <gh> <ph> <value> <suit> <tail>
+#  - join  : <msglen> <JOIN> <protocol> <namelen> <name> <tail>
+#
+# The join is the only variable length message: its name is sent as its
+# own buffer, between the packed header and the tail.
+#
+# Messages are sent as soon as they're packed, and always written in full:
+# socket.send() can write only part of a buffer, so we loop until
+# everything has gone.  A player only ever sends one message per turn, so
+# there's nothing for the client to batch; the module level sendFrames()
+# is where batching happens, in the python stand-in server, which sends
+# all the frames it has queued for a connection in one sendmsg() call.
+
+import struct
+
+# the trailing bytes that end every message, as per EuchrePlayer.messageId
+TAIL1 = 250
+TAIL2 = 222
+
+# the most buffers we hand to a single sendmsg() call: this is well under
+# the usual IOV_MAX of 1024
+MAXFRAMES = 512
+
+
+###########################################################################
+# This makes one sendmsg() call for a list of buffers, and returns the list
+# of what's left to send: the buffers that went in full are dropped, and a
+# partly sent buffer is replaced by a view of its unsent tail.  On a
+# non-blocking socket this raises BlockingIOError if nothing could be sent.
+#
+def sendFrames(sock, frames):
+    sent = sock.sendmsg(frames[:MAXFRAMES])
+    i = 0
+    while i < len(frames) and sent >= len(frames[i]):
+        sent -= len(frames[i])
+        i += 1
+    frames = frames[i:]
+    if sent:
+        frames[0] = memoryview(frames[0])[sent:]
+    return frames
+
+
+class Encoder:
+
+    # the compiled message layouts, including the leading size
+    plainStruct = struct.Struct("!iiiiBB")
+    suitStruct = struct.Struct("!iiiiiBB")
+    cardStruct = struct.Struct("!iiiiiiBB")
+    joinStruct = struct.Struct("!iiii")
+    tail = struct.pack("!BB", TAIL1, TAIL2)
+
+
+    ###########################################################################
+    # This initializes the object: the socket to write to, and a buffer with
+    # room for the largest fixed layout
+    #
+    def __init__(self, sock):
+        self.sock = sock
+        self.buf = bytearray(self.cardStruct.size)
+        self.view = memoryview(self.buf)
+
+
+    ###########################################################################
+    # This packs a message with the given layout into the buffer, and sends
+    # it; the size field doesn't count itself, so it's 4 less than the
+    # packed size
+    #
+    def pack(self, layout, *values):
+        layout.pack_into(self.buf, 0, layout.size - 4, *values)
+        self.write(self.view[:layout.size])
+
+
+    ###########################################################################
+    # These pack and send each of the fixed layouts
+    #
+    def plain(self, msg, gh, ph):
+        self.pack(self.plainStruct, msg, gh, ph, TAIL1, TAIL2)
+
+    def suit(self, msg, gh, ph, suit):
+        self.pack(self.suitStruct, msg, gh, ph, suit, TAIL1, TAIL2)
+
+    def card(self, msg, gh, ph, card):
+        self.pack(self.cardStruct, msg, gh, ph, card.value, card.suit,
+            TAIL1, TAIL2)
+
+
+    ###########################################################################
+    # This sends a join message: the header is packed into the buffer, and
+    # the name and tail go as separate buffers in the same sendmsg() call
+    #
+    def join(self, msg, protocol, name):
+        name = str.encode(name)
+        layout = self.joinStruct
+        layout.pack_into(self.buf, 0,
+            layout.size - 4 + len(name) + len(self.tail),
+            msg, protocol, len(name))
+        self.write(self.view[:layout.size], name, self.tail)
+
+
+    ###########################################################################
+    # This writes the buffers of a message, in one sendmsg() call (or as few
+    # as it takes to write them all)
+    #
+    def write(self, *buffers):
+        frames = list(buffers)
+        while frames:
+            frames = sendFrames(self.sock, frames)
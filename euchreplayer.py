@@ -10,6 +10,30 @@
 #  - decideDefend()
 #  - decidePlayLead()
 #  - decidePlayFollow()
+#
+# The game as parsed from the server's STATE messages is in self.state, a
+# GameState (see gamestate.py): eg. self.state.dealer is the dealer's
+# player handle, and self.state.seats[ph].card the card played by ph.
+#
+# Incoming messages are dispatched through a table from message ID to
+# handler, built when the class (or a sub-class) is created.  A handler is
+# a method marked with @handles('NAME'); a sub-class can override one just
+# by redefining the method, and can hook a message without replacing its
+# handler by marking a method with @before('NAME') or @after('NAME'), or
+# with '*' to hook every message.  A before hook is called with the
+# message bytes, and an after hook with the bytes and the handler's
+# result.  Instrumentation can add hooks to an existing class with
+# addHook().
+#
+# A player's tunable constants can be declared in a params dict on the
+# class, of name to default value: each is set as an attribute of the
+# player for every game, eg. self.orderRate, and can be overridden for a
+# game with the params kwarg, which is how peuchre-sweep tries out
+# different values without editing the player.
+#
+# Each player times its messages and decisions into latency histograms (see
+# latency.py), kept in self.timings by kind, which it hands to the record
+# at the end of the game to be merged for its team module.
 
 import socket
 import struct
@@ -19,8 +43,91 @@ import random
 import string
 import select
 
+from time import perf_counter_ns
+
 from logging import warning as warn, log, debug, info, error, critical
 from card import Card
+from encoder import Encoder
+from gamestate import GameState
+from latency import Histogram
+
+
+###########################################################################
+# This is the logger for a player: it prefixes each message with the
+# player's id string (eg. "p0t1 g3h2t1 : "), and as with any logger the
+# message is only formatted, and the prefix only added, if the level is
+# enabled, so messages should be logged with %-style arguments rather
+# than built up front, eg.
+#    self.log.info("leading with %s", card)
+#
+class PlayerLog(logging.LoggerAdapter):
+    def process(self, msg, kwargs):
+        return (self.extra.id + msg, kwargs)
+
+
+###########################################################################
+# This wraps a call so it's only made if the log message it's an argument
+# to is actually formatted, eg.
+#    self.log.info("cards: %s", Lazy(self.printHand, self.hand))
+#
+class Lazy:
+    __slots__ = ('fn', 'args')
+
+    def __init__(self, fn, *args):
+        self.fn = fn
+        self.args = args
+
+    def __str__(self):
+        return str(self.fn(*self.args))
+
+
+###########################################################################
+# These decorators mark a method as the handler for a message, or as a
+# hook to run before or after the handler for a message
+#
+def handles(name):
+    def mark(fn):
+        fn.handles = name
+        return fn
+    return mark
+
+def before(name):
+    def mark(fn):
+        fn.before = name
+        return fn
+    return mark
+
+def after(name):
+    def mark(fn):
+        fn.after = name
+        return fn
+    return mark
+
+
+###########################################################################
+# This is the base class for a player observer: an object a player reports
+# the game to as it's played (see EuchrePlayer.reset()), eg. the hand
+# history collector.  Each method is called with the reporting player as
+# the first argument, and does nothing here, so an observer only overrides
+# the ones it cares about:
+#  - deal(player)             : once our hand is dealt
+#  - bid(player, op, suit)    : for each order, call, or defend message we
+#                               send (suit for calls)
+#  - drop(player, card)       : when we drop a card as dealer
+#  - play(player, card)       : for each card we play
+#  - handOver(player)         : at the end of each hand
+#  - gameOver(player)         : at the end of the game
+# Every player in the game reports to the same observers, so each event at
+# the end of a hand or game is seen four times.
+#
+class Observer:
+    def deal(self, player): pass
+    def bid(self, player, op, suit=None): pass
+    def drop(self, player, card): pass
+    def play(self, player, card): pass
+    def handOver(self, player): pass
+    def gameOver(self, player): pass
+
 
 class EuchrePlayer:
     # this is the dict that maps message ID to message name: we also generate
@@ -115,54 +222,203 @@ class EuchrePlayer:
         'TAIL2' : 222 ,
     }
 
+    # the run of ints in each joined seat's STATE data, from the team number
+    # through the cardinplay boolean
+    seatStruct = struct.Struct("!15i")
+
     # now generate the reverse mapping: thanks stack overflow!
     #messageName = {v: k for k,v in messageId.items()}
     messageName = {}
     for k, v in messageId.items():
         messageName[v] = k
 
+    # hooks added from outside the class by addHook(), as (when, name, fn)
+    addedHooks = []
+
+    # the tunable parameters and their defaults, as above
+    params = {}
+
+
+    ###########################################################################
+    # This builds the dispatch table for each sub-class as it's created
+    #
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.buildDispatch()
+
+
+    ###########################################################################
+    # This builds the class's dispatch table, from message ID to a function
+    # taking (self, bytes).  We find the handler methods by name through the
+    # whole class hierarchy, so a handler overridden in a sub-class is
+    # picked up even without the decorator; if a message has hooks, its
+    # entry is a wrapper that runs them around the handler, so a message
+    # with no hooks costs one dict lookup and the handler call.
+    #
+    @classmethod
+    def buildDispatch(cls):
+        handlers = {}
+        hooks = { 'before': [], 'after': [] }
+        seen = set()
+        for klass in reversed(cls.__mro__):
+            for (attr, fn) in vars(klass).items():
+                if hasattr(fn, 'handles'):
+                    handlers[fn.handles] = attr
+                for when in hooks:
+                    if hasattr(fn, when) and attr not in seen:
+                        hooks[when].append((getattr(fn, when), attr))
+                        seen.add(attr)
+        for klass in reversed(cls.__mro__):
+            for (when, name, fn) in vars(klass).get('addedHooks', []):
+                hooks[when].append((name, fn))
+
+        cls.dispatch = {}
+        for (name, attr) in handlers.items():
+            handler = getattr(cls, attr)
+            pre = [ cls.hookFunction(fn) for (n, fn) in hooks['before']
+                    if n == name or n == '*' ]
+            post = [ cls.hookFunction(fn) for (n, fn) in hooks['after']
+                     if n == name or n == '*' ]
+            if pre or post:
+                handler = cls.hookedHandler(handler, pre, post)
+            cls.dispatch[cls.messageId[name]] = handler
+
+
+    ###########################################################################
+    # A hook is either a method name in the class, or a plain function
+    #
+    @classmethod
+    def hookFunction(cls, fn):
+        if isinstance(fn, str):
+            return getattr(cls, fn)
+        return fn
+
+
+    ###########################################################################
+    # This returns a handler wrapped with its before and after hooks
+    #
+    @staticmethod
+    def hookedHandler(handler, pre, post):
+        def hooked(self, bytes):
+            for fn in pre:
+                fn(self, bytes)
+            result = handler(self, bytes)
+            for fn in post:
+                fn(self, bytes, result)
+            return result
+        return hooked
+
+
+    ###########################################################################
+    # This adds a hook to this class and all its sub-classes, and rebuilds
+    # their dispatch tables: a before hook is called as fn(player, bytes),
+    # and an after hook as fn(player, bytes, result)
+    #
+    @classmethod
+    def addHook(cls, name, before=None, after=None):
+        if 'addedHooks' not in vars(cls):
+            cls.addedHooks = []
+        if before is not None:
+            cls.addedHooks.append(('before', name, before))
+        if after is not None:
+            cls.addedHooks.append(('after', name, after))
+
+        classes = [ cls ]
+        while classes:
+            klass = classes.pop()
+            klass.buildDispatch()
+            classes.extend(klass.__subclasses__())
+
 
     ###########################################################################
     #
     def __init__(self, **kwargs):
+        # randomize that name!  we only do this once per object, since a
+        # pooled player keeps its name from game to game
+        self.name = ''.join(random.choices(
+            string.ascii_uppercase + string.digits, k=10))
+
+        # our logger, which tags messages with our id
+        self.log = PlayerLog(logging.getLogger("peuchre"), self)
+
+        # our own random number generator: player logic should use this
+        # rather than the random module, so that each player has its own
+        # stream, which is reproducible if we're given a seed
+        self.rng = random.Random()
+
+        # everything else is per-game state
+        self.s = None
+        self.reset(**kwargs)
+
+
+    ###########################################################################
+    # This clears our per-game state and takes the kwargs for the next game:
+    # it's called when the object is created, and again each time a pooled
+    # player is reused for a new game (see pool.py).  A sub-class with its
+    # own per-game state should override this and call up to us, while
+    # anything that's expensive to build and doesn't change between games,
+    # like a strategy table, belongs in __init__.
+    #
+    def reset(self, **kwargs):
+        # a reused player is done with its connection from the last game
+        if self.s is not None:
+            self.s.close()
+
         self.server = "0.0.0.0"
         self.port = -1
+        self.s = None
+        self.encoder = None
         self.playerhandle = -1
         self.gamehandle = -1
         self.team = -1
 
         # this tracks the data from the most recent state information
-        self.state = {}
-        self.state[0] = {}
-        self.state[1] = {}
-        self.state[2] = {}
-        self.state[3] = {}
-        self.state['state'] = 0
+        self.state = GameState()
 
-        # initialize scores and tricks to 0
-        self.state['usscore']   = 0
-        self.state['themscore'] = 0
-        self.state['ustricks']   = 0
-        self.state['themtricks'] = 0
-
-        # init orderer to -1
-        self.state['orderer'] = -1
-
-        # randomize that name!
-        self.name = ''.join(random.SystemRandom().choice(string.ascii_uppercase + string.digits) for _ in range(10))
+        # and we've no cards yet
+        self.hand = []
+        self.originalHand = []
 
         # override the defaults if we were passed relevant arguments
         if 'server' in kwargs:
             self.server = kwargs['server']
         if 'port' in kwargs:
             self.port = kwargs['port']
+
+        # if we were handed an already connected socket (eg. one end of a
+        # socketpair), we use it rather than connecting ourselves
+        if 'sock' in kwargs:
+            self.s = kwargs['sock']
         if 'name' in kwargs:
             self.name = kwargs['name']
 
+        # if the server hosts many tables on one address, this is the game
+        # handle of the table we're to join: we tag our name with it
+        self.table = None
+        if 'table' in kwargs:
+            self.table = kwargs['table']
+
         # if we were passed a record object, save it
         if 'record' in kwargs:
             self.record = kwargs['record']
 
+        # in the swapped game of a duplicate pair, our module is the other
+        # team's, so that's the team the record credits us to (statsteam,
+        # set once we have a seat)
+        self.swapped = False
+        if 'swapped' in kwargs:
+            self.swapped = kwargs['swapped']
+        self.statsteam = -1
+
+        # our latency histograms for this game, by kind
+        self.timings = {}
+
+        # the game's trace, if we're tracing (see tracer.py): everything we
+        # time is added to it as a span
+        self.trace = None
+        if 'trace' in kwargs:
+            self.trace = kwargs['trace']
+
         # we use this to ID hands in the log
         self.gcount = 0
         if 'gcount' in kwargs:
@@ -174,6 +430,25 @@ class EuchrePlayer:
         if 'lock' in kwargs:
             self.lock = kwargs['lock']
 
+        # set our tunable parameters: the defaults, unless we've been given
+        # values for this game
+        overrides = {}
+        if 'params' in kwargs:
+            overrides = kwargs['params']
+        for (name, default) in self.params.items():
+            setattr(self, name, overrides.get(name, default))
+
+        # if we're given a seed, we reseed our generator with it for the
+        # new game, otherwise we carry on with the stream we have
+        if 'seed' in kwargs and kwargs['seed'] is not None:
+            self.rng.seed(kwargs['seed'])
+
+        # the observers we report the hand to as it's played, eg. the hand
+        # history collector (see history.py, and Observer above)
+        self.observers = ()
+        if 'observers' in kwargs:
+            self.observers = kwargs['observers']
+
 
     ###########################################################################
     # This is a utility function to set the self.id string: it uses the
@@ -186,12 +461,29 @@ class EuchrePlayer:
             "%s g%dh%dt%d : " % (self.name,self.gcount,self.hcount,self.tcount)
 
 
+    ###########################################################################
+    # This adds a time, in nanoseconds since start (a perf_counter_ns()
+    # value), to our latency histogram for the given kind, and to the
+    # game's trace as a span, if we're tracing: the wait for a message isn't
+    # traced, since the game's own wait on the server covers it
+    #
+    def timed(self, kind, start):
+        end = perf_counter_ns()
+        hist = self.timings.get(kind)
+        if hist is None:
+            hist = self.timings[kind] = Histogram()
+        hist.add(end - start)
+        if self.trace is not None and kind != 'wait':
+            self.trace.span(self.playerhandle, kind, start, end,
+                hand=self.hcount, trick=self.tcount)
+
+
     ###########################################################################
     # prints the score
     #
     def printScore(self):
-        info(self.id+"score us:%d  them:%d" %
-            (self.state['usscore'],self.state['themscore']) )
+        self.log.info("score us:%d  them:%d",
+            self.state.usscore, self.state.themscore)
 
 
     ###########################################################################
@@ -199,14 +491,14 @@ class EuchrePlayer:
     #
     def status(self):
         info("")
-        info(self.id+"My Status")
-        info(self.id+"    server: " + self.server)
-        info(self.id+"    port  : " + str(self.port))
+        self.log.info("My Status")
+        self.log.info("    server: %s", self.server)
+        self.log.info("    port  : %s", self.port)
         info("")
-        info(self.id+"    Name  : " + str(self.name))
-        info(self.id+"    Player: " + str(self.playerhandle))
-        info(self.id+"    Team  : " + str(self.team))
-        info(self.id+"    Game  : " + str(self.gamehandle))
+        self.log.info("    Name  : %s", self.name)
+        self.log.info("    Player: %s", self.playerhandle)
+        self.log.info("    Team  : %s", self.team)
+        self.log.info("    Game  : %s", self.gamehandle)
 
         # just the game stuff
         self.gameStatus()
@@ -222,27 +514,27 @@ class EuchrePlayer:
     #
     def gameStatus(self):
         info("")
-        info(self.id+"Game Status:")
-        info(self.id+"    Score : %d vs %d"
-            % (self.state['usscore'],self.state['themscore']))
-        info(self.id+"    Tricks: %d vs %d"
-            % (self.state['ustricks'],self.state['themtricks']))
-        info(self.id+"    Game Started: %d" % (self.state['ingame']))
-        info(self.id+"    Hand Status : %d" % (self.state['hstate']))
-        info(self.id+"    options:")
-        info(self.id+"        Can Defend Alone:       %d"
-            % (self.state['defend']))
-        info(self.id+"        Must Go Alone on Order: %d"
-            % (self.state['aloneonorder']))
-        info(self.id+"        Screw the Dealer:       %d"
-            % (self.state['screw']))
-        info(self.id+"    Number of cards: %d (%s)"
-            % (self.state['numcards'], self.printHand(self.hand)) )
-        info(self.id+"    Trump is Set: %d" % (self.state['trumpset']))
-        if not self.state['holein']:
-            info(self.id+"    Hole Card: not dealt")
+        self.log.info("Game Status:")
+        self.log.info("    Score : %d vs %d",
+            self.state.usscore, self.state.themscore)
+        self.log.info("    Tricks: %d vs %d",
+            self.state.ustricks, self.state.themtricks)
+        self.log.info("    Game Started: %d", self.state.ingame)
+        self.log.info("    Hand Status : %d", self.state.hstate)
+        self.log.info("    options:")
+        self.log.info("        Can Defend Alone:       %d",
+            self.state.defend)
+        self.log.info("        Must Go Alone on Order: %d",
+            self.state.aloneonorder)
+        self.log.info("        Screw the Dealer:       %d",
+            self.state.screw)
+        self.log.info("    Number of cards: %d (%s)",
+            self.state.numcards, Lazy(self.printHand, self.hand))
+        self.log.info("    Trump is Set: %d", self.state.trumpset)
+        if not self.state.holein:
+            self.log.info("    Hole Card: not dealt")
         else:
-            info(self.id+"    Hole Card: " + self.state['hole'])
+            self.log.info("    Hole Card: %s", self.state.hole)
 
 
     ###########################################################################
@@ -251,71 +543,99 @@ class EuchrePlayer:
     def playerStatus(self):
         for i in (0,1,2,3):
             # skip this player if their state isn't joined
-            if self.state[i]['state'] != 2:
+            if self.state.seats[i].state != 2:
                 continue
 
             # otherwise print all the info
             info("")
-            info(self.id+"Player %d:" % (i))
-            info(self.id+"    Name: %s" % (self.state[i]['name']))
-            info(self.id+"    Team: %d" % (self.state[i]['team']))
-            info(self.id+"    Dealer: %d" % (self.state[i]['dealer']))
-            info(self.id+"    Ordered: %d" % (self.state[i]['ordered']))
-            info(self.id+"    Passed: %d" % (self.state[i]['passed']))
-            info(self.id+"    Made It: %d" % (self.state[i]['maker']))
-            info(self.id+"    Alone: %d" % (self.state[i]['alone']))
-            info(self.id+"    Lead: %d" % (self.state[i]['leader']))
-            info(self.id+"    Creator: %d" % (self.state[i]['creator']))
-            info(self.id+"    Offers:")
-            info(self.id+"        Drop: %d" % (self.state[i]['dropoffer']))
-            info(self.id+"        Order: %d"
-                % (self.state[i]['orderoffer']))
-            info(self.id+"        Call: %d" % (self.state[i]['calloffer']))
-            info(self.id+"        Play: %d" % (self.state[i]['playoffer']))
-            info(self.id+"        Defend: %d"
-                % (self.state[i]['defendoffer']))
+            self.log.info("Player %d:", i)
+            self.log.info("    Name: %s", self.state.seats[i].name)
+            self.log.info("    Team: %d", self.state.seats[i].team)
+            self.log.info("    Dealer: %d", self.state.seats[i].dealer)
+            self.log.info("    Ordered: %d", self.state.seats[i].ordered)
+            self.log.info("    Passed: %d", self.state.seats[i].passed)
+            self.log.info("    Made It: %d", self.state.seats[i].maker)
+            self.log.info("    Alone: %d", self.state.seats[i].alone)
+            self.log.info("    Lead: %d", self.state.seats[i].leader)
+            self.log.info("    Creator: %d", self.state.seats[i].creator)
+            self.log.info("    Offers:")
+            self.log.info("        Drop: %d", self.state.seats[i].dropoffer)
+            self.log.info("        Order: %d",
+                self.state.seats[i].orderoffer)
+            self.log.info("        Call: %d", self.state.seats[i].calloffer)
+            self.log.info("        Play: %d", self.state.seats[i].playoffer)
+            self.log.info("        Defend: %d",
+                self.state.seats[i].defendoffer)
 
             # if the player has a card in play, show it
-            if self.state[i]['cardinplay']:
-                info(self.id+"    Card Played: " + self.state[i]['card'])
+            if self.state.seats[i].cardinplay:
+                self.log.info("    Card Played: %s", self.state.seats[i].card)
             else:
-                info(self.id+"    Card Played: none")
+                self.log.info("    Card Played: none")
 
 
     ###########################################################################
-    # this routine will connect to the game server
+    # This creates our connection to the server.  The server can be a host
+    # name or address (used with self.port), or "unix:/path" for a Unix
+    # domain socket; and if we were handed a connected socket, there's
+    # nothing to do.  On TCP we turn off Nagle, since all our messages are
+    # small and latency bound.  Once we're connected we set up the encoder
+    # for our outgoing messages.
     #
-    def sendJoin(self):
-        # create the socket for connection to the server: we'll need this
-        # for use in the rest of the object
+    def connect(self):
+        if self.s is not None:
+            self.encoder = Encoder(self.s)
+            return True
+
         try:
-            self.s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.s.connect((self.server,self.port))
-        except ConnectionRefusedError:
+            if self.server.startswith("unix:"):
+                self.s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self.s.connect(self.server[5:])
+            else:
+                self.s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                self.s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self.s.connect((self.server,self.port))
+        except (ConnectionRefusedError, FileNotFoundError):
+            return False
+
+        self.encoder = Encoder(self.s)
+        return True
+
+
+    ###########################################################################
+    # This reads exactly size bytes from the server socket: a stream socket
+    # can hand us a message in pieces, and recv() only returns what's there
+    #
+    def recvAll(self, size):
+        bytes = self.s.recv(size)
+        while len(bytes) < size:
+            more = self.s.recv(size - len(bytes))
+            if not more:
+                raise ConnectionError("server closed the connection")
+            bytes += more
+        return bytes
+
+
+    ###########################################################################
+    # this routine will connect to the game server: normally we wait for the
+    # server's reply, but if wait is false we return as soon as the JOIN is
+    # sent, and the reply is handled by parseMessage() like any other
+    #
+    def sendJoin(self, wait=True):
+        # create the connection to the server: we'll need the socket for use
+        # in the rest of the object
+        if not self.connect():
             return False
 
-        # get the length of the name and use that length in the format strign
-        namelen = len(self.name)
-        format = "!iiii" + str(namelen) + "sBB"
-        size = struct.calcsize(format)
-        # reduce the size by 4, to leave out the space needed for the
-        # leading size value
-        size = size - 4
-
-        # now generate a packed array of bytes for the message using that
-        # format string
-        message = struct.pack(format,
-            size,
-            self.messageId['JOIN'],
-            1,
-            len(self.name),
-            str.encode(self.name),
-            self.messageId['TAIL1'],
-            self.messageId['TAIL2'],
-        )
-
-        #self.printMessage(message)
-        self.s.send(message)
+        # if we're joining a specific table, tag our name with it
+        name = self.name
+        if self.table is not None:
+            name = "%s@%d" % (self.name, self.table)
+
+        # send the join, with protocol version 1
+        self.encoder.join(self.messageId['JOIN'], 1, name)
+        if not wait:
+            return True
 
         # set up a select with this socket
         inputs = [ self.s ]
@@ -325,30 +645,47 @@ class EuchrePlayer:
 
         # we read  single int from the socket: this should represent the
         # length of the entire message
-        (size,) = struct.unpack("!i",self.s.recv(4))
+        (size,) = struct.unpack("!i",self.recvAll(4))
 
         # read the specified number of bytes from the socket
-        bytes = self.s.recv(size)
-        #info(self.id+"len of bytes is " + str(len(bytes)))
+        bytes = self.recvAll(size)
+        #self.log.info("len of bytes is %s", len(bytes))
 
         # decode the message identifier
         (id,) = struct.unpack_from("!i",bytes)
-        #info(self.id+"message is: %s (%d)" % (self.messageName[id],id))
+        #self.log.info("message is: %s (%d)", self.messageName[id],id)
 
         # now we mung out a case switch on the message identifier
         if ( id == self.messageId['JOINACCEPT'] ):
-            info(self.id+"join successful")
+            self.log.info("join successful")
             return self.parseJoinAccept(bytes)
         elif ( id == self.messageId['JOINDENY'] ):
             return self.parseJoinDeny(bytes)
         elif ( id == self.messageId['DECLINE'] ):
             return self.parseDecline(bytes)
         else:
-            info(self.id+"unknown join response: %s (%d)" %
-                (self.messageName[id],id))
+            self.log.info("unknown join response: %s (%d)",
+                self.messageName.get(id, "unknown"), id)
             return self.badMessage(bytes)
 
 
+    ###########################################################################
+    # This takes over the seat of another player object that has joined the
+    # server: its connection, and the handles and team from its JOINACCEPT.
+    # This lets the game join its seats before it knows which team (and so
+    # which player class) each seat will be.
+    #
+    def takeSeat(self, joiner):
+        self.s            = joiner.s
+        self.encoder      = joiner.encoder
+        self.table        = joiner.table
+        self.gamehandle   = joiner.gamehandle
+        self.playerhandle = joiner.playerhandle
+        self.team         = joiner.team
+        self.statsteam    = 3 - self.team if self.swapped else self.team
+        self.log.info("join successful")
+
+
     ###########################################################################
     # this routine will send the start message to the game server
     #
@@ -356,26 +693,8 @@ class EuchrePlayer:
         # a start message looks like this:
         #  <msg> : <msglen> <START> <gh> <ph> <tail>
 
-        # prep the format string
-        format = "!iiiiBB"
-        size = struct.calcsize(format)
-        # reduce the size by 4, to leave out the space needed for the
-        # leading size value
-        size = size - 4
-
-        # now generate a packed array of bytes for the message using that
-        # format string
-        message = struct.pack(format,
-            size,
-            self.messageId['START'],
-            self.gamehandle,
-            self.playerhandle,
-            self.messageId['TAIL1'],
-            self.messageId['TAIL2'],
-        )
-
-        #self.printMessage(message)
-        self.s.send(message)
+        self.encoder.plain(self.messageId['START'],
+            self.gamehandle, self.playerhandle)
 
 
     ###########################################################################
@@ -391,28 +710,15 @@ class EuchrePlayer:
 
         # get the message we should send to the server: this should be one
         # of ORDER, ORDERALONE, or ORDERPASS
+        start = perf_counter_ns()
         message = self.decideOrderPass()
+        self.timed('decideOrderPass', start)
 
-        # prep the format string
-        format = "!iiiiBB"
-        size = struct.calcsize(format)
-        # reduce the size by 4, to leave out the space needed for the
-        # leading size value
-        size = size - 4
-
-        # now generate a packed array of bytes for the message using that
-        # format string
-        message = struct.pack(format,
-            size,
-            message,
-            self.gamehandle,
-            self.playerhandle,
-            self.messageId['TAIL1'],
-            self.messageId['TAIL2'],
-        )
-
-        #self.printMessage(message)
-        self.s.send(message)
+        start = perf_counter_ns()
+        self.encoder.plain(message, self.gamehandle, self.playerhandle)
+        self.timed('send', start)
+        for observer in self.observers:
+            observer.bid(self, message)
 
 
     ###########################################################################
@@ -431,54 +737,25 @@ class EuchrePlayer:
         # of CALL, CALLALONE, or CALLPASS, and a suit (which will be
         # None if the return is a CALLPASS
         
+        start = perf_counter_ns()
         result = self.decideCallPass()
+        self.timed('decideCallPass', start)
         op = result['op']
         suit = result['suit']
 
-        # now generate a packed array of bytes for the message using that
-        # format string, depending on the message we're supposed to return
+        # now send the message, with the suit if we're calling
+        start = perf_counter_ns()
         if    op == self.messageId['CALL'] \
            or op == self.messageId['CALLALONE']:
-            # prep the format string
-            format = "!iiiiiBB"
-            size = struct.calcsize(format)
-            # reduce the size by 4, to leave out the space needed for the
-            # leading size value
-            size = size - 4
-
-            message = struct.pack(format,
-                size,
-                op,
-                self.gamehandle,
-                self.playerhandle,
-                suit,
-                self.messageId['TAIL1'],
-                self.messageId['TAIL2'],
-            )
-
-            #self.printMessage(message)
-            self.s.send(message)
-
-        # now generate a packed array of bytes for the message using that
-        # format string, depending on the message we're supposed to return
-        if op == self.messageId['CALLPASS']:
-            format = "!iiiiBB"
-            size = struct.calcsize(format)
-            # reduce the size by 4, to leave out the space needed for the
-            # leading size value
-            size = size - 4
+            self.encoder.suit(op, self.gamehandle, self.playerhandle, suit)
 
-            message = struct.pack(format,
-                size,
-                op,
-                self.gamehandle,
-                self.playerhandle,
-                self.messageId['TAIL1'],
-                self.messageId['TAIL2'],
-            )
+        if op == self.messageId['CALLPASS']:
+            self.encoder.plain(op, self.gamehandle, self.playerhandle)
+            suit = None
+        self.timed('send', start)
 
-            #self.printMessage(message)
-            self.s.send(message)
+        for observer in self.observers:
+            observer.bid(self, op, suit)
 
 
     ###########################################################################
@@ -489,30 +766,16 @@ class EuchrePlayer:
         #  <msg> : <msglen> <DROP> <gh> <ph> <card> <tail>
 
         # call decideDrop() which should return a card to drop
-        card = self.decideDrop(self.state['hole'])
-
-        # prep the format string
-        format = "!iiiiiiBB"
-        size = struct.calcsize(format)
-        # reduce the size by 4, to leave out the space needed for the
-        # leading size value
-        size = size - 4
-
-        # now generate a packed array of bytes for the message using that
-        # format string
-        message = struct.pack(format,
-            size,
-            self.messageId['DROP'],
-            self.gamehandle,
-            self.playerhandle,
-            card.value,
-            card.suit,
-            self.messageId['TAIL1'],
-            self.messageId['TAIL2'],
-        )
-
-        #self.printMessage(message)
-        self.s.send(message)
+        start = perf_counter_ns()
+        card = self.decideDrop(self.state.hole)
+        self.timed('decideDrop', start)
+
+        start = perf_counter_ns()
+        self.encoder.card(self.messageId['DROP'],
+            self.gamehandle, self.playerhandle, card)
+        self.timed('send', start)
+        for observer in self.observers:
+            observer.drop(self, card)
 
 
     ###########################################################################
@@ -524,28 +787,15 @@ class EuchrePlayer:
 
         # call the decideDefend() routine to determine if we should
         # defend alone or not
+        start = perf_counter_ns()
         message = self.decideDefend()
+        self.timed('decideDefend', start)
 
-        # prep the format string
-        format = "!iiiiBB"
-        size = struct.calcsize(format)
-        # reduce the size by 4, to leave out the space needed for the
-        # leading size value
-        size = size - 4
-
-        # now generate a packed array of bytes for the message using that
-        # format string
-        message = struct.pack(format,
-            size,
-            message,
-            self.gamehandle,
-            self.playerhandle,
-            self.messageId['TAIL1'],
-            self.messageId['TAIL2'],
-        )
-
-        #self.printMessage(message)
-        self.s.send(message)
+        start = perf_counter_ns()
+        self.encoder.plain(message, self.gamehandle, self.playerhandle)
+        self.timed('send', start)
+        for observer in self.observers:
+            observer.bid(self, message)
 
 
     ###########################################################################
@@ -557,7 +807,7 @@ class EuchrePlayer:
 
         # are we leading?
         me = self.playerhandle
-        leader = self.state[me]['leader']
+        leader = self.state.seats[me].leader
 
         # if we're the leader, we can play anything
         if leader:
@@ -573,34 +823,20 @@ class EuchrePlayer:
     def sendPlayLead(self):
         # call decidePlayLead() to determine what card we should play as
         # a lead
+        start = perf_counter_ns()
         card = self.decidePlayLead()
+        self.timed('decidePlayLead', start)
 
         # remove the card from our hand
         self.removeCard(card)
 
-        # prep the format string
-        format = "!iiiiiiBB"
-        size = struct.calcsize(format)
-        # reduce the size by 4, to leave out the space needed for the
-        # leading size value
-        size = size - 4
-
-        # now generate a packed array of bytes for the message using that
-        # format string
-        message = struct.pack(format,
-            size,
-            self.messageId['PLAY'],
-            self.gamehandle,
-            self.playerhandle,
-            card.value,
-            card.suit,
-            self.messageId['TAIL1'],
-            self.messageId['TAIL2'],
-        )
-
-        #info(self.id+"sending PLAY")
-        #self.printMessage(message)
-        self.s.send(message)
+        #self.log.info("sending PLAY")
+        start = perf_counter_ns()
+        self.encoder.card(self.messageId['PLAY'],
+            self.gamehandle, self.playerhandle, card)
+        self.timed('send', start)
+        for observer in self.observers:
+            observer.play(self, card)
 
 
     ###########################################################################
@@ -610,34 +846,20 @@ class EuchrePlayer:
     def sendPlayFollow(self):
         # call decidePlayFollow() to determine the card we should follow
         # with: this assumes that the returned card is valid
+        start = perf_counter_ns()
         card = self.decidePlayFollow()
+        self.timed('decidePlayFollow', start)
 
         # remove the card from our hand
         self.removeCard(card)
 
-        # prep the format string
-        format = "!iiiiiiBB"
-        size = struct.calcsize(format)
-        # reduce the size by 4, to leave out the space needed for the
-        # leading size value
-        size = size - 4
-
-        # now generate a packed array of bytes for the message using that
-        # format string
-        message = struct.pack(format,
-            size,
-            self.messageId['PLAY'],
-            self.gamehandle,
-            self.playerhandle,
-            card.value,
-            card.suit,
-            self.messageId['TAIL1'],
-            self.messageId['TAIL2'],
-        )
-
-        #info(self.id+"sending PLAY")
-        #self.printMessage(message)
-        self.s.send(message)
+        #self.log.info("sending PLAY")
+        start = perf_counter_ns()
+        self.encoder.card(self.messageId['PLAY'],
+            self.gamehandle, self.playerhandle, card)
+        self.timed('send', start)
+        for observer in self.observers:
+            observer.play(self, card)
 
 
     ###########################################################################
@@ -646,65 +868,36 @@ class EuchrePlayer:
     def parseMessage(self):
         # we read  single int from the socket: this should represent the
         # length of the entire message
-        (size,) = struct.unpack("!i",self.s.recv(4))
+        start = perf_counter_ns()
+        (size,) = struct.unpack("!i",self.recvAll(4))
 
         # read the specified number of bytes from the socket
-        bytes = self.s.recv(size)
-        #info(self.id+"len of bytes is " + str(len(bytes)))
+        bytes = self.recvAll(size)
+        self.timed('wait', start)
+        #self.log.info("len of bytes is %s", len(bytes))
 
         # decode the message identifier
         (id,) = struct.unpack_from("!i",bytes)
-        #info(self.id+"message is: %s (%d)" % (self.messageName[id],id))
-
-        # now we mung out a case switch on the message identifier
-        if ( id == self.messageId['JOINACCEPT'] ):
-            return self.parseJoinAccept(bytes)
-        elif ( id == self.messageId['JOINDENY'] ):
-            return self.parseJoinDeny(bytes)
-        elif ( id == self.messageId['CHAT'] ):
-            return self.parseChat(bytes)
-        elif ( id == self.messageId['STATE'] ):
-            return self.parseState(bytes)
-        elif ( id == self.messageId['DEAL'] ):
-            return self.parseDeal(bytes)
-        elif ( id == self.messageId['STARTDENY'] ):
-            return self.parseStartDeny(bytes)
-        elif ( id == self.messageId['ORDEROFFER'] ):
-            return self.parseOrderOffer(bytes)
-        elif ( id == self.messageId['ORDERDENY'] ):
-            return self.parseOrderDeny(bytes)
-        elif ( id == self.messageId['CALLOFFER'] ):
-            return self.parseCallOffer(bytes)
-        elif ( id == self.messageId['CALLDENY'] ):
-            return self.parseCallDeny(bytes)
-        elif ( id == self.messageId['DROPOFFER'] ):
-            return self.parseDropOffer(bytes)
-        elif ( id == self.messageId['DROPDENY'] ):
-            return self.parseDropDeny(bytes)
-        elif ( id == self.messageId['DEFENDOFFER'] ):
-            return self.parseDefendOffer(bytes)
-        elif ( id == self.messageId['DEFENDDENY'] ):
-            return self.parseDefendDeny(bytes)
-        elif ( id == self.messageId['PLAYOFFER'] ):
-            return self.parsePlayOffer(bytes)
-        elif ( id == self.messageId['PLAYDENY'] ):
-            return self.parsePlayDeny(bytes)
-        elif ( id == self.messageId['TRICKOVER'] ):
-            return self.parseTrickOver(bytes)
-        elif ( id == self.messageId['HANDOVER'] ):
-            return self.parseHandOver(bytes)
-        elif ( id == self.messageId['GAMEOVER'] ):
-            return self.parseGameOver(bytes)
-        else:
-            info(self.id+"message is: %s (%d)" % (self.messageName[id],id))
+        #self.log.info("message is: %s (%d)", self.messageName[id],id)
+
+        # now look up the handler for the message identifier, and time it
+        start = perf_counter_ns()
+        handler = self.dispatch.get(id)
+        if handler is None:
+            self.log.info("message is: %s (%d)",
+                self.messageName.get(id, "unknown"), id)
             return self.badMessage(bytes)
+        result = handler(self, bytes)
+        self.timed(self.messageName[id], start)
+        return result
 
 
     ###########################################################################
     # This routine parses a JOINACCEPT message
     #
+    @handles('JOINACCEPT')
     def parseJoinAccept(self, bytes):
-        #debug(self.id+"parsing JOINACCEPT")
+        #self.log.debug("parsing JOINACCEPT")
         #self.printMessage(bytes)
 
         # the format of a JOINACCEPT message is:
@@ -714,7 +907,7 @@ class EuchrePlayer:
 
         # run some sanity checks
         if tail1 != self.messageId['TAIL1'] or tail2 != self.messageId['TAIL2']:
-            error(self.id+"bad tail value in parseJoinAccept()")
+            self.log.error("bad tail value in parseJoinAccept()")
             return False
 
         # ok, otherwise we carry on
@@ -728,8 +921,9 @@ class EuchrePlayer:
     ###########################################################################
     # This routine parses a JOINDENY message
     #
+    @handles('JOINDENY')
     def parseJoinDeny(self, bytes):
-        #debug(self.id+"parsing JOINDENY")
+        #self.log.debug("parsing JOINDENY")
         #self.printMessage(bytes)
 
         # the format of a JOINDENY message is:
@@ -737,7 +931,7 @@ class EuchrePlayer:
         # where the string explains why it was denied
         message = self.parseString(bytes[4:-2])
 
-        info(self.id+"join denied: " + message)
+        self.log.info("join denied: %s", message)
 
         return(False)
 
@@ -745,8 +939,9 @@ class EuchrePlayer:
     ###########################################################################
     # This routine parses a DECLINE message
     #
+    @handles('DECLINE')
     def parseDecline(self, bytes):
-        #debug(self.id+"parsing DECLINE")
+        #self.log.debug("parsing DECLINE")
         #self.printMessage(bytes)
 
         # the format of a DECLINE message is:
@@ -754,7 +949,7 @@ class EuchrePlayer:
         # where the string explains why it was denied
         message = self.parseString(bytes[4:-2])
 
-        info(self.id+"join declined: " + message)
+        self.log.info("join declined: %s", message)
 
         return(False)
 
@@ -762,8 +957,9 @@ class EuchrePlayer:
     ###########################################################################
     # This routine parses a CHAT message
     #
+    @handles('CHAT')
     def parseChat(self, bytes):
-        #debug(self.id+"parsing CHAT")
+        #self.log.debug("parsing CHAT")
         #self.printMessage(bytes)
 
         # the format of a CHAT message is:
@@ -779,11 +975,11 @@ class EuchrePlayer:
 
         # run some sanity checks
         if tail1 != self.messageId['TAIL1'] or tail2 != self.messageId['TAIL2']:
-            error(self.id+"bad tail value in parseChat()")
+            self.log.error("bad tail value in parseChat()")
             return False
 
         # ok, log the chat
-        #info(self.id+"" + chat)
+        #self.log.info("%s", chat)
 
         return True
 
@@ -793,13 +989,13 @@ class EuchrePlayer:
     # to be passed a bytes array beginning with the string length
     #
     def parseString(self, bytes):
-        #debug(self.id+"parsing string")
+        #self.log.debug("parsing string")
         #self.printMessage(bytes)
 
         # the format of a string is:
         #   <string> : <textlen> <text>
         (len,) = struct.unpack_from("!i",bytes)
-        #info(self.id+"string len: " + str(len))
+        #self.log.info("string len: %s", len)
 
         # now parse out the text of the string
         format = "!"+str(len)+"s"
@@ -814,8 +1010,9 @@ class EuchrePlayer:
     # This routine parses a string component of a message: it expects
     # to be passed a bytes array beginning with the string length
     #
+    @handles('STATE')
     def parseState(self, bytes):
-        #info(self.id+"parsing STATE")
+        #self.log.info("parsing STATE")
         #self.printMessage(bytes)
         offset = 0
 
@@ -881,7 +1078,7 @@ class EuchrePlayer:
         # check that we have a valid tail
         (tail1,tail2) = struct.unpack("!BB",bytes[-2:])
         if tail1 != self.messageId['TAIL1'] or tail2 != self.messageId['TAIL2']:
-            error(self.id+"bad tail value in parseState()")
+            self.log.error("bad tail value in parseState()")
             return False
 
         return True
@@ -891,7 +1088,7 @@ class EuchrePlayer:
     # This routine parses the player data of the <STATE> message
     #
     def parseStatePlayer(self, bytes):
-        #debug(self.id+"parsing player STATE")
+        #self.log.debug("parsing player STATE")
         offset = 0
 
         #info("")
@@ -910,7 +1107,7 @@ class EuchrePlayer:
     # This reads the N'th player state information
     #
     def parseStatePlayerN(self, bytes, n):
-        #debug(self.id+"parsing player STATE for player %d" % (n))
+        #self.log.debug("parsing player STATE for player %d", n)
         offset = 0
 
         # The player data looks like this:
@@ -935,136 +1132,77 @@ class EuchrePlayer:
 
         # pull player 0 state: 0 is unconnected, 1 is connected, 2 is joined;
         # if the value is 2, there will be further player data
-        (self.state[n]['state'],) = struct.unpack_from("!i",bytes)
+        (self.state.seats[n].state,) = struct.unpack_from("!i",bytes)
         offset += 4 # track the offset into the bytes array
 
         # if this is our state, promote it up
         if n == self.playerhandle:
-            self.state['state'] = self.state[n]['state']
+            self.state.state = self.state.seats[n].state
 
         # if player state is 2 (ie. connected), then read the rest of the info
-        if self.state[n]['state'] == 2:
+        if self.state.seats[n].state == 2:
             # get the player handle: not sure why I duped this, since the
             # handle is implicit in the order, but anyway...
             (ph,) = struct.unpack_from("!i",bytes[offset:])
             offset += 4
 
             # get the name
-            self.state[ph]['name'] = self.parseString(bytes[offset:])
-            offset += 4+len(self.state[ph]['name'])
-            #info(self.id+"player name is " + self.state[ph]['name'])
+            self.state.seats[ph].name = self.parseString(bytes[offset:])
+            offset += 4+len(self.state.seats[ph].name)
+            #self.log.info("player name is %s", self.state.seats[ph].name)
 
             # get the client name
-            self.state[ph]['clientname'] = self.parseString(bytes[offset:])
-            offset += 4+len(self.state[ph]['clientname'])
+            self.state.seats[ph].clientname = self.parseString(bytes[offset:])
+            offset += 4+len(self.state.seats[ph].clientname)
 
             # get the client hardware
-            self.state[ph]['hardware'] = self.parseString(bytes[offset:])
-            offset += 4+len(self.state[ph]['hardware'])
+            self.state.seats[ph].hardware = self.parseString(bytes[offset:])
+            offset += 4+len(self.state.seats[ph].hardware)
 
             # get the OS
-            self.state[ph]['os'] = self.parseString(bytes[offset:])
-            offset += 4+len(self.state[ph]['os'])
+            self.state.seats[ph].os = self.parseString(bytes[offset:])
+            offset += 4+len(self.state.seats[ph].os)
 
             # get the comment
-            self.state[ph]['comment'] = self.parseString(bytes[offset:])
-            offset += 4+len(self.state[ph]['comment'])
-
-            # get the team number
-            (self.state[ph]['team'],) = struct.unpack_from("!i",bytes[offset:])
-            offset += 4
-
-            # get the number of cards
-            (self.state[ph]['numcards'],) = \
-                struct.unpack_from("!i",bytes[offset:])
-            offset += 4
-
-            # get the creator boolean
-            (self.state[ph]['creator'],) = \
-                struct.unpack_from("!i",bytes[offset:])
+            self.state.seats[ph].comment = self.parseString(bytes[offset:])
+            offset += 4+len(self.state.seats[ph].comment)
+
+            # the rest of the seat data is a run of 15 ints, from the team
+            # number through the cardinplay boolean, which we unpack in one
+            # go straight into the seat
+            seat = self.state.seats[ph]
+            (seat.team, seat.numcards, seat.creator, seat.ordered,
+             seat.dealer, seat.alone, seat.defend, seat.leader, seat.maker,
+             seat.playoffer, seat.orderoffer, seat.dropoffer, seat.calloffer,
+             seat.defendoffer, seat.cardinplay) = \
+                self.seatStruct.unpack_from(bytes, offset)
+            offset += self.seatStruct.size
+
+            # some of the booleans are promoted up to the game state, as the
+            # player handle of the seat that has them
             if ph == self.playerhandle:
-                self.state['creator'] = self.state[ph]['creator']
-            offset += 4
-
-            # get the ordered boolean
-            (self.state[ph]['ordered'],) = \
-                struct.unpack_from("!i",bytes[offset:])
-            if self.state[ph]['ordered'] == 1:
-                self.state['orderer'] = ph
-            offset += 4
-
-            # get the dealer boolean
-            (self.state[ph]['dealer'],) = \
-                struct.unpack_from("!i",bytes[offset:])
-            if self.state[ph]['dealer'] == 1:
-                self.state['dealer'] = ph
-            offset += 4
-
-            # get the alone boolean
-            (self.state[ph]['alone'],) = struct.unpack_from("!i",bytes[offset:])
-            if self.state[ph]['alone'] == 1:
-                self.state['aloner'] = ph
-            offset += 4
-
-            # get the defend boolean
-            (self.state[ph]['defend'],) = \
-                struct.unpack_from("!i",bytes[offset:])
-            if self.state[ph]['defend'] == 1:
-                self.state['defender'] = ph
-            offset += 4
-
-            # get the leader boolean
-            (self.state[ph]['leader'],) = \
-                struct.unpack_from("!i",bytes[offset:])
-            if self.state[ph]['leader'] == 1:
-                self.state['leader'] = ph
-            offset += 4
-
-            # get the maker boolean
-            (self.state[ph]['maker'],) = struct.unpack_from("!i",bytes[offset:])
-            if self.state[ph]['maker'] == 1:
-                self.state['maker'] = ph
-            offset += 4
-
-            # get the playoffer boolean
-            (self.state[ph]['playoffer'],) = \
-                struct.unpack_from("!i",bytes[offset:])
-            offset += 4
-
-            # get the orderoffer boolean
-            (self.state[ph]['orderoffer'],) = \
-                struct.unpack_from("!i",bytes[offset:])
-            offset += 4
-
-            # get the dropoffer boolean
-            (self.state[ph]['dropoffer'],) = \
-                struct.unpack_from("!i",bytes[offset:])
-            offset += 4
-
-            # get the calloffer boolean
-            (self.state[ph]['calloffer'],) = \
-                struct.unpack_from("!i",bytes[offset:])
-            offset += 4
-
-            # get the defendoffer boolean
-            (self.state[ph]['defendoffer'],) = \
-                struct.unpack_from("!i",bytes[offset:])
-            offset += 4
-
-            # get the cardinplay boolean
-            (self.state[ph]['cardinplay'],) = \
-                struct.unpack_from("!i",bytes[offset:])
-            offset += 4
+                self.state.creator = seat.creator
+            if seat.ordered == 1:
+                self.state.orderer = ph
+            if seat.dealer == 1:
+                self.state.dealer = ph
+            if seat.alone == 1:
+                self.state.aloner = ph
+            if seat.defend == 1:
+                self.state.defender = ph
+            if seat.leader == 1:
+                self.state.leader = ph
+            if seat.maker == 1:
+                self.state.maker = ph
 
             # if there is a card in play, read it
-            if self.state[ph]['cardinplay'] == 1:
-                (value,suit) = struct.unpack_from("!ii",bytes[offset:])
+            if seat.cardinplay == 1:
+                (value,suit) = struct.unpack_from("!ii",bytes,offset)
                 offset += 8
-                self.state[ph]['card'] = Card(value=value,suit=suit)
+                seat.card = Card(value=value,suit=suit)
 
             # get whether they've passed or not
-            (self.state[ph]['passed'],) = \
-                struct.unpack_from("!i",bytes[offset:])
+            (seat.passed,) = struct.unpack_from("!i",bytes,offset)
             offset += 4
 
         return offset
@@ -1074,7 +1212,7 @@ class EuchrePlayer:
     # This routine parses the game data of the <STATE> message
     #
     def parseStateGame(self, bytes):
-        #debug(self.id+"parsing game STATE")
+        #self.log.debug("parsing game STATE")
         #self.printMessage(bytes)
         offset = 0
 
@@ -1101,94 +1239,94 @@ class EuchrePlayer:
         #       <defend>|<aloneonorder>|<screw> : <boolean>
 
         # get the ingame boolean
-        (self.state['ingame'],) = struct.unpack_from("!i",bytes[offset:])
+        (self.state.ingame,) = struct.unpack_from("!i",bytes[offset:])
         offset += 4
 
         # get the hand state: 0, 1, 2, 3, or 4, corresponding to a hand state
         # of pregame (hands haven't been dealt yet), hole (hole card ordering
         # is available), trump (arbitrary trump can be called), defend (defend
         # alone is on offer), play (game is underway)
-        (self.state['hstate'],) = struct.unpack_from("!i",bytes[offset:])
+        (self.state.hstate,) = struct.unpack_from("!i",bytes[offset:])
         offset += 4
 
         # get the suspend state: this would be true only if the number of
         # players drops below 4
-        (self.state['suspend'],) = struct.unpack_from("!i",bytes[offset:])
+        (self.state.suspend,) = struct.unpack_from("!i",bytes[offset:])
         offset += 4
 
         # get the hole card available state: this would be true if there is a
         # a hole card on offer
-        (self.state['holein'],) = struct.unpack_from("!i",bytes[offset:])
+        (self.state.holein,) = struct.unpack_from("!i",bytes[offset:])
         offset += 4
 
         # if there is a hole card on offer, read it
-        if self.state['holein'] == 1:
-            #info(self.id+"parsing hole card")
+        if self.state.holein == 1:
+            #self.log.info("parsing hole card")
             (value,suit) = struct.unpack_from("!ii",bytes[offset:])
-            self.state['hole'] = Card(value=value,suit=suit)
+            self.state.hole = Card(value=value,suit=suit)
             offset += 8
 
         # read whether trump has been set
-        (self.state['trumpset'],) = struct.unpack_from("!i",bytes[offset:])
+        (self.state.trumpset,) = struct.unpack_from("!i",bytes[offset:])
         offset += 4
 
         # if it has, read the trump suit
-        if self.state['trumpset'] == 1:
-            (self.state['trump'],) = struct.unpack_from("!i",bytes[offset:])
+        if self.state.trumpset == 1:
+            (self.state.trump,) = struct.unpack_from("!i",bytes[offset:])
             offset += 4
             #info("")
-            #info(self.id+"trump is " + Card.suitName(self.state['trump']))
+            #self.log.info("trump is %s", Card.suitName(self.state.trump))
 
         # and set the number of tricks for each team
         (tricks0,tricks1) = struct.unpack_from("!ii",bytes[offset:])
         offset += 8
 
         # store the previous us and them tricks, so we can compute deltas
-        prevus   = self.state['ustricks']
-        prevthem = self.state['themtricks']
+        prevus   = self.state.ustricks
+        prevthem = self.state.themtricks
 
         # set the tricks as an "ustricks" and "themtricks", to make things
         # easier to parse later
         if self.team == 1:
-            self.state['ustricks']   = tricks0
-            self.state['themtricks'] = tricks1
+            self.state.ustricks   = tricks0
+            self.state.themtricks = tricks1
         elif self.team == 2:
-            self.state['ustricks']   = tricks1
-            self.state['themtricks'] = tricks0
+            self.state.ustricks   = tricks1
+            self.state.themtricks = tricks0
 
         # if the tricks have changed, compute the delta: either ustricks
         # has changed, or themtricks, but can't (shouldn't) be both
-        if prevus != self.state['ustricks']:
-            self.state['trickdelta'] = self.state['ustricks'] - prevus
-        if prevthem != self.state['themtricks']:
-            self.state['trickdelta'] = -1*(self.state['themtricks'] - prevthem)
+        if prevus != self.state.ustricks:
+            self.state.trickdelta = self.state.ustricks - prevus
+        if prevthem != self.state.themtricks:
+            self.state.trickdelta = -1*(self.state.themtricks - prevthem)
 
         # similarly, parse the score values into usscore and themscore
         (score0,score1) = struct.unpack_from("!ii",bytes[offset:])
         offset += 8
 
         # store the previous us and them scores, so we can compute deltas
-        prevus   = self.state['usscore']
-        prevthem = self.state['themscore']
+        prevus   = self.state.usscore
+        prevthem = self.state.themscore
 
         # set the scores as an "usscore" and "themscore", to make things
         # easier to parse later
         if self.team == 1:
-            self.state['usscore']   = score0
-            self.state['themscore'] = score1
+            self.state.usscore   = score0
+            self.state.themscore = score1
         elif self.team == 2:
-            self.state['usscore']   = score1
-            self.state['themscore'] = score0
+            self.state.usscore   = score1
+            self.state.themscore = score0
 
         # if the score has changed, compute the delta: either usscore
         # has changed, or themscore, but can't (shouldn't) be both
-        if prevus != self.state['usscore']:
-            self.state['scoredelta'] = self.state['usscore'] - prevus
-        if prevthem != self.state['themscore']:
-            self.state['scoredelta'] = -1*(self.state['themscore'] - prevthem)
+        if prevus != self.state.usscore:
+            self.state.scoredelta = self.state.usscore - prevus
+        if prevthem != self.state.themscore:
+            self.state.scoredelta = -1*(self.state.themscore - prevthem)
 
         # and then read a bunch of options
-        (self.state['defend'],self.state['aloneonorder'],self.state['screw'],)\
+        (self.state.defend,self.state.aloneonorder,self.state.screw,)\
             = struct.unpack_from("!iii",bytes[offset:])
         offset += 12
 
@@ -1199,7 +1337,7 @@ class EuchrePlayer:
     # This reads the cards information in the state message
     #
     def parseStateCards(self, bytes):
-        #debug(self.id+"parsing cards STATE")
+        #self.log.debug("parsing cards STATE")
         #self.printMessage(bytes)
         offset = 0
 
@@ -1208,12 +1346,12 @@ class EuchrePlayer:
         #        <cardN> : <value> <suit>
 
         # get the number of cards to be read
-        (self.state['numcards'],) = struct.unpack_from("!i",bytes)
+        (self.state.numcards,) = struct.unpack_from("!i",bytes)
         offset += 4
 
         # if we have a non-zero number of cards, read them
         self.hand = list([])
-        for i in range(self.state['numcards']):
+        for i in range(self.state.numcards):
             (value,suit) = struct.unpack_from("!ii",bytes[offset:])
             self.hand.append(Card(value=value,suit=suit))
             offset += 8
@@ -1226,9 +1364,10 @@ class EuchrePlayer:
     # for the deal are completed.  The state structure for the player
     # receiving the deal message should be fully populated
     #
+    @handles('DEAL')
     def parseDeal(self, bytes):
         debug("")
-        debug(self.id+"parsing DEAL")
+        self.log.debug("parsing DEAL")
         #self.printMessage(bytes)
 
         # the format of a DEAL message is:
@@ -1239,13 +1378,15 @@ class EuchrePlayer:
         # check we have a valid tail
         (tail1, tail2) = struct.unpack("!BB",bytes[-2:])
         if tail1 != self.messageId['TAIL1'] or tail2 != self.messageId['TAIL2']:
-            error(self.id+"bad tail value in parseDeal()")
+            self.log.error("bad tail value in parseDeal()")
             return False
 
         # at this point we've received and parsed the state message with
         # our hand details in it: we will want to know our original hand
         # later, to run stats on it, so we record the original hand now
         self.originalHand = self.hand
+        for observer in self.observers:
+            observer.deal(self)
 
         return True
 
@@ -1253,8 +1394,9 @@ class EuchrePlayer:
     ###########################################################################
     # This routine parses a STARTDENY message
     #
+    @handles('STARTDENY')
     def parseStartDeny(self, bytes):
-        #debug(self.id+"parsing STARTDENY")
+        #self.log.debug("parsing STARTDENY")
         #self.printMessage(bytes)
 
         # the format of a STARTDENY message is:
@@ -1265,11 +1407,11 @@ class EuchrePlayer:
         # check we have a valid tail
         (tail1, tail2) = struct.unpack("!BB",bytes[-2:])
         if tail1 != self.messageId['TAIL1'] or tail2 != self.messageId['TAIL2']:
-            error(self.id+"bad tail value in parseStartDeny()")
+            self.log.error("bad tail value in parseStartDeny()")
             return False
 
         info("")
-        info(self.id+"uh-oh, got a STARTDENY message: " + message)
+        self.log.info("uh-oh, got a STARTDENY message: %s", message)
 
         return False
 
@@ -1277,8 +1419,9 @@ class EuchrePlayer:
     ###########################################################################
     # This routine parses an ORDEROFFER message
     #
+    @handles('ORDEROFFER')
     def parseOrderOffer(self, bytes):
-        debug(self.id+"parsing ORDEROFFER")
+        self.log.debug("parsing ORDEROFFER")
         #self.printMessage(bytes)
 
         # the format of an ORDEROFFER message is:
@@ -1289,7 +1432,7 @@ class EuchrePlayer:
         # check we have a valid tail
         (tail1, tail2) = struct.unpack("!BB",bytes[-2:])
         if tail1 != self.messageId['TAIL1'] or tail2 != self.messageId['TAIL2']:
-            error(self.id+"bad tail value in parseOrderOffer()")
+            self.log.error("bad tail value in parseOrderOffer()")
             return False
 
         # if the person offered the order is us, call sendOrderPass()
@@ -1302,8 +1445,9 @@ class EuchrePlayer:
     ###########################################################################
     # This routine parses a ORDERDENY message
     #
+    @handles('ORDERDENY')
     def parseOrderDeny(self, bytes):
-        #debug(self.id+"parsing ORDERDENY")
+        #self.log.debug("parsing ORDERDENY")
         #self.printMessage(bytes)
 
         # the format of a ORDERDENY message is:
@@ -1314,11 +1458,11 @@ class EuchrePlayer:
         # check we have a valid tail
         (tail1, tail2) = struct.unpack("!BB",bytes[-2:])
         if tail1 != self.messageId['TAIL1'] or tail2 != self.messageId['TAIL2']:
-            error(self.id+"bad tail value in parseDefendDeny()")
+            self.log.error("bad tail value in parseDefendDeny()")
             return False
 
         info("")
-        info(self.id+"uh-oh, got a ORDERDENY message: " + message)
+        self.log.info("uh-oh, got a ORDERDENY message: %s", message)
 
         return False
 
@@ -1326,8 +1470,9 @@ class EuchrePlayer:
     ###########################################################################
     # This routine parses a CALLOFFER message
     #
+    @handles('CALLOFFER')
     def parseCallOffer(self, bytes):
-        debug(self.id+"parsing CALLOFFER")
+        self.log.debug("parsing CALLOFFER")
         #self.printMessage(bytes)
 
         # the format of an CALLOFFER message is:
@@ -1338,7 +1483,7 @@ class EuchrePlayer:
         # check we have a valid tail
         (tail1, tail2) = struct.unpack("!BB",bytes[-2:])
         if tail1 != self.messageId['TAIL1'] or tail2 != self.messageId['TAIL2']:
-            error(self.id+"bad tail value in parseOrderOffer()")
+            self.log.error("bad tail value in parseOrderOffer()")
             return False
 
         # if the person offered the order is us, call sendOrderPass()
@@ -1351,8 +1496,9 @@ class EuchrePlayer:
     ###########################################################################
     # This routine parses a CALLDENY message
     #
+    @handles('CALLDENY')
     def parseCallDeny(self, bytes):
-        #debug(self.id+"parsing CALLDENY")
+        #self.log.debug("parsing CALLDENY")
         #self.printMessage(bytes)
 
         # the format of a CALLDENY message is:
@@ -1363,11 +1509,11 @@ class EuchrePlayer:
         # check we have a valid tail
         (tail1, tail2) = struct.unpack("!BB",bytes[-2:])
         if tail1 != self.messageId['TAIL1'] or tail2 != self.messageId['TAIL2']:
-            error(self.id+"bad tail value in parseDefendDeny()")
+            self.log.error("bad tail value in parseDefendDeny()")
             return False
 
         info("")
-        info(self.id+"uh-oh, got a CALLDENY message: " + message)
+        self.log.info("uh-oh, got a CALLDENY message: %s", message)
 
         return False
 
@@ -1375,8 +1521,9 @@ class EuchrePlayer:
     ###########################################################################
     # This routine parses a DROPOFFER message
     #
+    @handles('DROPOFFER')
     def parseDropOffer(self, bytes):
-        #debug(self.id+"parsing DROPOFFER")
+        #self.log.debug("parsing DROPOFFER")
         #self.printMessage(bytes)
 
         # the format of an DROPOFFER message is:
@@ -1387,7 +1534,7 @@ class EuchrePlayer:
         # check we have a valid tail
         (tail1, tail2) = struct.unpack("!BB",bytes[-2:])
         if tail1 != self.messageId['TAIL1'] or tail2 != self.messageId['TAIL2']:
-            error(self.id+"bad tail value in parseDropOffer()")
+            self.log.error("bad tail value in parseDropOffer()")
             return False
 
         # if the person offered the drop is us, call sendDrop()
@@ -1400,8 +1547,9 @@ class EuchrePlayer:
     ###########################################################################
     # This routine parses a DROPDENY message
     #
+    @handles('DROPDENY')
     def parseDropDeny(self, bytes):
-        #debug(self.id+"parsing DROPDENY")
+        #self.log.debug("parsing DROPDENY")
         #self.printMessage(bytes)
 
         # the format of a DROPDENY message is:
@@ -1412,11 +1560,11 @@ class EuchrePlayer:
         # check we have a valid tail
         (tail1, tail2) = struct.unpack("!BB",bytes[-2:])
         if tail1 != self.messageId['TAIL1'] or tail2 != self.messageId['TAIL2']:
-            error(self.id+"bad tail value in parseDefendDeny()")
+            self.log.error("bad tail value in parseDefendDeny()")
             return False
 
         info("")
-        info(self.id+"uh-oh, got a DROPDENY message: " + message)
+        self.log.info("uh-oh, got a DROPDENY message: %s", message)
 
         return False
 
@@ -1424,8 +1572,9 @@ class EuchrePlayer:
     ###########################################################################
     # This routine parses a DEFENDOFFER message
     #
+    @handles('DEFENDOFFER')
     def parseDefendOffer(self, bytes):
-        #debug(self.id+"parsing DEFENDOFFER")
+        #self.log.debug("parsing DEFENDOFFER")
         #self.printMessage(bytes)
 
         # the format of an DEFENDOFFER message is:
@@ -1436,12 +1585,12 @@ class EuchrePlayer:
         # check we have a valid tail
         (tail1, tail2) = struct.unpack("!BB",bytes[-2:])
         if tail1 != self.messageId['TAIL1'] or tail2 != self.messageId['TAIL2']:
-            error(self.id+"bad tail value in parseDefendOffer()")
+            self.log.error("bad tail value in parseDefendOffer()")
             return False
 
         # if the person offered the defend is us, call sendDefend()
         if ph == self.playerhandle:
-            info(self.id+"declining defend alone")
+            self.log.info("declining defend alone")
             self.sendDefend()
 
         return True
@@ -1450,8 +1599,9 @@ class EuchrePlayer:
     ###########################################################################
     # This routine parses a DEFENDDENY message
     #
+    @handles('DEFENDDENY')
     def parseDefendDeny(self, bytes):
-        #debug(self.id+"parsing DEFENDDENY")
+        #self.log.debug("parsing DEFENDDENY")
         #self.printMessage(bytes)
 
         # the format of a DEFENDDENY message is:
@@ -1462,11 +1612,11 @@ class EuchrePlayer:
         # check we have a valid tail
         (tail1, tail2) = struct.unpack("!BB",bytes[-2:])
         if tail1 != self.messageId['TAIL1'] or tail2 != self.messageId['TAIL2']:
-            error(self.id+"bad tail value in parseDefendDeny()")
+            self.log.error("bad tail value in parseDefendDeny()")
             return False
 
         info("")
-        info(self.id+"uh-oh, got a DEFENDDENY message: " + message)
+        self.log.info("uh-oh, got a DEFENDDENY message: %s", message)
 
         return False
 
@@ -1474,8 +1624,9 @@ class EuchrePlayer:
     ###########################################################################
     # This routine parses a PLAYOFFER message
     #
+    @handles('PLAYOFFER')
     def parsePlayOffer(self, bytes):
-        #info(self.id+"parsing PLAYOFFER")
+        #self.log.info("parsing PLAYOFFER")
         #self.printMessage(bytes)
 
         # the format of an PLAYOFFER message is:
@@ -1483,12 +1634,12 @@ class EuchrePlayer:
         # it's really just a notification message, unless we're the <ph>
         (msg, ph) = struct.unpack_from("!ii",bytes)
         #info("")
-        #info(self.id+"got PLAYOFFER for %s" % (self.state[ph]['name']))
+        #self.log.info("got PLAYOFFER for %s", self.state.seats[ph].name)
 
         # check we have a valid tail
         (tail1, tail2) = struct.unpack("!BB",bytes[-2:])
         if tail1 != self.messageId['TAIL1'] or tail2 != self.messageId['TAIL2']:
-            error(self.id+"bad tail value in parseDropOffer()")
+            self.log.error("bad tail value in parseDropOffer()")
             return False
 
         # if the person offered the play is us, call sendPlay()
@@ -1501,8 +1652,9 @@ class EuchrePlayer:
     ###########################################################################
     # This routine parses a PLAYDENY message
     #
+    @handles('PLAYDENY')
     def parsePlayDeny(self, bytes):
-        #debug(self.id+"parsing PLAYDENY")
+        #self.log.debug("parsing PLAYDENY")
         #self.printMessage(bytes)
 
         # the format of a PLAYDENY message is:
@@ -1513,11 +1665,11 @@ class EuchrePlayer:
         # check we have a valid tail
         (tail1, tail2) = struct.unpack("!BB",bytes[-2:])
         if tail1 != self.messageId['TAIL1'] or tail2 != self.messageId['TAIL2']:
-            error(self.id+"bad tail value in parsePlayDeny()")
+            self.log.error("bad tail value in parsePlayDeny()")
             return False
 
         info("")
-        info(self.id+"uh-oh, got a PLAYDENY message: " + message)
+        self.log.info("uh-oh, got a PLAYDENY message: %s", message)
 
         return False
 
@@ -1525,8 +1677,9 @@ class EuchrePlayer:
     ###########################################################################
     # This routine parses a TRICKOVER message
     #
+    @handles('TRICKOVER')
     def parseTrickOver(self, bytes):
-        #debug(self.id+"parsing TRICKOVER")
+        #self.log.debug("parsing TRICKOVER")
         #self.printMessage(bytes)
 
         # the format of a TRICKOVER message is:
@@ -1536,17 +1689,17 @@ class EuchrePlayer:
         # check we have a valid tail
         (tail1, tail2) = struct.unpack("!BB",bytes[-2:])
         if tail1 != self.messageId['TAIL1'] or tail2 != self.messageId['TAIL2']:
-            error(self.id+"bad tail value in parseTrickOver()")
+            self.log.error("bad tail value in parseTrickOver()")
             return False
 
         # we don't want to clutter the log by reporting all instances
         # of the trick over message, so we only print it for the maker
-        if self.playerhandle == self.state['maker']:
-            if self.state['trickdelta'] < 0: wl="lost"
-            elif self.state['trickdelta'] > 0: wl="won"
+        if self.playerhandle == self.state.maker:
+            if self.state.trickdelta < 0: wl="lost"
+            elif self.state.trickdelta > 0: wl="won"
             else: wl="bad bad bad"
-            info(self.id+"trick is over, we %s, now %d to %d"
-                % (wl,self.state['ustricks'],self.state['themtricks']))
+            self.log.info("trick is over, we %s, now %d to %d",
+                wl, self.state.ustricks, self.state.themtricks)
 
         # increment the trick counter for the id string
         self.tcount += 1
@@ -1558,9 +1711,10 @@ class EuchrePlayer:
     ###########################################################################
     # This routine parses a HANDOVER message
     #
+    @handles('HANDOVER')
     def parseHandOver(self, bytes):
         #info("")
-        #info(self.id+"parsing HANDOVER")
+        #self.log.info("parsing HANDOVER")
         #self.printMessage(bytes)
 
         # the format of a HANDOVER message is:
@@ -1570,35 +1724,40 @@ class EuchrePlayer:
         # check we have a valid tail
         (tail1, tail2) = struct.unpack("!BB",bytes[-2:])
         if tail1 != self.messageId['TAIL1'] or tail2 != self.messageId['TAIL2']:
-            error(self.id+"bad tail value in parseHandOver()")
+            self.log.error("bad tail value in parseHandOver()")
             return False
 
         # if we were the maker, print some info and then record the score
         # delta for this hand
-        if self.playerhandle == self.state['maker']:
+        if self.playerhandle == self.state.maker:
             info("")
-            info(self.id+"hand is over")
+            self.log.info("hand is over")
             self.printScore()
-            info(self.id+"score delta: %d" % (self.state['scoredelta']))
-            info(self.id+"original hand: %s, trump: %s"
-                % (self.printHand(self.originalHand),
-                   Card.suitName(self.state['trump'])))
+            self.log.info("score delta: %d", self.state.scoredelta)
+            self.log.info("original hand: %s, trump: %s",
+                Lazy(self.printHand, self.originalHand),
+                Lazy(Card.suitName, self.state.trump))
 
             # log our data in a thread-safe fashion
+            start = perf_counter_ns()
             self.lock.acquire()
+            self.timed('lock', start)
             remap = ""
             try:
                 remap = self.record.addHand(
-                    self.originalHand, self.state['trump'],
-                    self.state['scoredelta'], self)
+                    self.originalHand, self.state.trump,
+                    self.state.scoredelta, self)
             finally:
                 self.lock.release()
 
             # log the remapped hand: makes it easier to debug things later
-            info(self.id+"remapped hand: %s" % (remap))
+            self.log.info("remapped hand: %s", remap)
+
+        for observer in self.observers:
+            observer.handOver(self)
 
         # clear the orderer info
-        self.state['orderer'] = -1
+        self.state.orderer = -1
 
 
         # increment the hand and trick counters for the id string
@@ -1612,9 +1771,10 @@ class EuchrePlayer:
     ###########################################################################
     # This routine parses a GAMEOVER message
     #
+    @handles('GAMEOVER')
     def parseGameOver(self, bytes):
         #info("")
-        #info(self.id+"parsing GAMEOVER")
+        #self.log.info("parsing GAMEOVER")
         #self.printMessage(bytes)
 
         # the format of a GAMEOVER message is:
@@ -1624,14 +1784,14 @@ class EuchrePlayer:
         # check we have a valid tail
         (tail1, tail2) = struct.unpack("!BB",bytes[-2:])
         if tail1 != self.messageId['TAIL1'] or tail2 != self.messageId['TAIL2']:
-            error(self.id+"bad tail value in parseHandOver()")
+            self.log.error("bad tail value in parseHandOver()")
             return False
 
         # we don't want to clutter the log by reporting all instances
         # of the trick over message, so we only print it for the maker
-        if self.playerhandle == self.state['maker']:
+        if self.playerhandle == self.state.maker:
             info("")
-            info(self.id+"game is over")
+            self.log.info("game is over")
             self.printScore()
             info("")
 
@@ -1642,6 +1802,16 @@ class EuchrePlayer:
             finally:
                 self.lock.release()
 
+        # every player hands its latency histograms to the record, for its
+        # team module
+        self.lock.acquire()
+        try:
+            self.record.addTimings(type(self).__module__, self.timings)
+        finally:
+            self.lock.release()
+
+        for observer in self.observers:
+            observer.gameOver(self)
 
         # we set the new game, hand, and trick values: this is really
         # mostly useless, since when the game is over, the player object
@@ -1660,7 +1830,7 @@ class EuchrePlayer:
     # This routine parses a random bad message
     #
     def badMessage(self, bytes):
-        #debug(self.id+"parsing bad message")
+        #self.log.debug("parsing bad message")
         #self.printMessage(bytes)
 
         return False
@@ -1700,19 +1870,19 @@ class EuchrePlayer:
         # begin by determining who the leader of the hand was
         leader = -1
         for i in (0,1,2,3):
-            if self.state[i]['leader'] == 1:
+            if self.state.seats[i].leader == 1:
                 leader = i
 
         # set the trump and complimentary suits
-        trumpsuit = self.state['trump']
-        compsuit  = Card.suitComp(self.state['trump'])
+        trumpsuit = self.state.trump
+        compsuit  = Card.suitComp(self.state.trump)
 
         # set the leadsuit to the suit of the lead card, unless the lead
         # card is the left (ie. the J of compsuit), in which case set the
         # leadsuit to trump
-        leadsuit  = self.state[leader]['card'].suit
+        leadsuit  = self.state.seats[leader].card.suit
         if leadsuit == compsuit and \
-           self.state[leader]['card'].value == Card.nameValue("J"):
+           self.state.seats[leader].card.value == Card.nameValue("J"):
             leadsuit = trumpsuit
 
         # step through the player's hand: anything with the same suit
@@ -1735,17 +1905,20 @@ class EuchrePlayer:
                 playable.append(card)
 
         # if we have no playable cards by suit, then we can play anything
-        #info(self.id+"before playable cards: " + self.printHand(playable))
+        #self.log.info("before playable cards: %s", self.printHand(playable))
         if len(playable) == 0:
             playable = self.hand.copy()
 
         # print the hand
-        info(self.id+"playable: " + self.printHand(playable)
-            + ", lead: " + Card.suitName(leadsuit)
-            + ", trump: " + Card.suitName(trumpsuit) )
+        self.log.info("playable: %s, lead: %s, trump: %s",
+            Lazy(self.printHand, playable),
+            Lazy(Card.suitName, leadsuit),
+            Lazy(Card.suitName, trumpsuit))
 
         # generate some stats for follow requirements in a thread-safe way
+        start = perf_counter_ns()
         self.lock.acquire()
+        self.timed('lock', start)
         try:
             self.record.addFollow(len(self.hand),len(playable))
         finally:
@@ -1768,3 +1941,7 @@ class EuchrePlayer:
         for card in self.hand:
             if card.value == value and card.suit == suit:
                 self.hand.remove(card)
+
+
+# build the dispatch table for the base class itself
+EuchrePlayer.buildDispatch()
@@ -7,15 +7,39 @@
 
 
 from threading import Thread
+from time import perf_counter_ns
+import os
 import time
 import socket
 import subprocess
 import select
 
+import pyeuchred
+from euchreplayer import EuchrePlayer
+from pool import Pool
+
 import logging
 from logging import warning as warn, log, debug, info, error, critical
 
 class Game(Thread):
+    # this is the path to the euchred server binary
+    euchred = "/usr/src/euchred/src/euchred"
+
+    ###########################################################################
+    # This returns the server implementation to use, given the one asked
+    # for, if any: with none asked for we use euchred if it's installed, and
+    # the python stand-in otherwise.  It raises a ValueError if we're asked
+    # for euchred and it isn't installed.
+    #
+    @staticmethod
+    def defaultServerImpl(serverimpl=None):
+        installed = os.path.exists(Game.euchred)
+        if serverimpl is None:
+            serverimpl = "euchred" if installed else "python"
+        if serverimpl == "euchred" and not installed:
+            raise ValueError("can't find the euchred server at %s"
+                % (Game.euchred))
+        return serverimpl
 
     ###########################################################################
     # initialize ourselves
@@ -40,8 +64,81 @@ class Game(Thread):
         if 'timeout' in kwargs:
             self.timeout = kwargs['timeout']
 
-        # get a port to use for the server
-        self.port = self.getPort()
+        # the server implementation: "euchred" runs the C server binary,
+        # "python" hosts the game on the in-process stand-in server, with
+        # the players attached over socketpairs, and "multi" registers a
+        # table on the in-process server's shared address
+        self.serverimpl = "euchred"
+        if 'serverimpl' in kwargs:
+            self.serverimpl = kwargs['serverimpl']
+
+        # the pool we take our players from: the mainline passes in one
+        # per game slot, so the slot's players are reused from game to game
+        self.pool = Pool()
+        if 'pool' in kwargs:
+            self.pool = kwargs['pool']
+
+        # the hand history store, if we're keeping one: our players report
+        # each hand to a collector for this game, which adds it to the store
+        self.history = None
+        if 'history' in kwargs:
+            self.history = kwargs['history']
+
+        # similarly the binary game record, if we're capturing one
+        self.capture = None
+        if 'capture' in kwargs:
+            self.capture = kwargs['capture']
+
+        # any other observers our players report to, eg. a replay's scorer
+        self.observers = []
+        if 'observers' in kwargs:
+            self.observers = list(kwargs['observers'])
+
+        # the seed for the run: if we have one, our table's shuffle and each
+        # of our players' generators are seeded from it, the game number,
+        # and the seat, so each game is reproducible on its own
+        self.seed = None
+        if 'seed' in kwargs:
+            self.seed = kwargs['seed']
+
+        # the tunable parameters for each team's players, if we're to
+        # override their defaults, as { team: { name: value } }
+        self.params = {}
+        if 'params' in kwargs:
+            self.params = kwargs['params']
+
+        # whether we're the swapped game of a duplicate pair, with the
+        # team 2 module in the team 1 seats and vice versa: our players
+        # credit the record with their module's team, not their seat's
+        self.swapped = False
+        if 'swapped' in kwargs:
+            self.swapped = kwargs['swapped']
+
+        # the scripted deals for our table, if we're replaying deals rather
+        # than shuffling (see pyeuchred.Table): euchred always shuffles its
+        # own, so these only work with the python servers
+        self.deals = None
+        if 'deals' in kwargs:
+            self.deals = kwargs['deals']
+
+        # the tracer, if we're tracing games (see tracer.py): we start our
+        # game's trace when we run, and our players add their spans to it
+        self.tracer = None
+        if 'tracer' in kwargs:
+            self.tracer = kwargs['tracer']
+        self.trace = None
+
+        # the address the players connect to, and the table they join if
+        # the server hosts many tables on one address: the port is picked
+        # when we start the server
+        self.host = "127.0.0.1"
+        self.port = 0
+        self.table = None
+
+        # wall clock times of the start and end of the game: the benchmark
+        # uses these to compute game duration percentiles
+        self.begin = 0
+        self.end = 0
 
 
     ########################################################################### 
@@ -52,62 +149,137 @@ class Game(Thread):
     # needed).
     #
     def run(self):
-        # start the server
-        self.startServer()
-        time.sleep(0.01)
+        self.begin = time.time()
+        if self.tracer is not None:
+            self.trace = self.tracer.game(self.gcount)
+
+        try:
+            # start the server
+            start = perf_counter_ns()
+            self.startServer()
+            if self.trace is not None:
+                self.trace.span(-1, "server start", start, perf_counter_ns(),
+                    impl=self.serverimpl)
+
+            # now play the game
+            self.playGame()
 
-        # now play the game
-        self.playGame()
+            # when playGame() returns, the game is ended, so we kill the
+            # server
+            self.server.kill()
 
-        # when playGame() returns, the game is ended, so we kill the server
-        self.server.kill()
+        # whatever happened, the trace of the game so far is kept
+        finally:
+            if self.trace is not None:
+                self.trace.close()
+
+        self.end = time.time()
 
 
     ###########################################################################
     # This takes a port number and starts a server for this game
     #
     def startServer(self):
+        # the stand-in server adds a table to the shared server and hands it
+        # back: our players are attached to it over socketpairs, so there's
+        # no port to pick, and nothing to wait for
+        if self.serverimpl == "python":
+            self.shared = pyeuchred.Server.shared()
+            self.server = self.shared.newTable(deals=self.deals,
+                seed=self.deriveSeed("table"))
+            return
+
+        # similarly the multi-table server registers a table on its shared
+        # address, and our players tag their joins with the table's handle
+        if self.serverimpl == "multi":
+            shared = pyeuchred.Server.shared()
+            self.server = shared.registerTable(deals=self.deals,
+                seed=self.deriveSeed("table"))
+            (self.host, self.port) = shared.address
+            self.table = self.server.gamehandle
+            return
+
+        # get a port to use for the server
+        self.port = self.getPort()
+
         # this starts the server:
         #  -m           : reduces the protocol
         #  -L /dev/null : eliminates the log file
         #  -p <port>    : sets the port number
-        self.server = subprocess.Popen(["/usr/src/euchred/src/euchred",
+        self.server = subprocess.Popen([self.euchred,
             "-m","-L","/dev/null","-p","%d" % (self.port)],
             stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
             )
 
+        # give the server a moment to start listening
+        time.sleep(0.01)
+
 
     ###########################################################################
-    # This returns true if all 4 players are in joined state, false otherwise
+    # This returns the seed for one of our generators, derived from the run
+    # seed, the game number, and what it's for, or None if we've no seed:
+    # string seeds are hashed by random.seed(), so derived streams are
+    # independent and the same from run to run
     #
-    def allJoined(self, players):
-        # default to true
-        state = True
+    def deriveSeed(self, what):
+        if self.seed is None:
+            return None
+        return "%s:g%d:%s" % (self.seed, self.gcount, what)
+
+
+    ###########################################################################
+    # This returns an already connected socket for a player to use, if our
+    # server hands them out, or None if the player should connect itself
+    #
+    def playerSocket(self):
+        if self.serverimpl == "python":
+            return self.shared.attach(self.server)
+        return None
 
-        # if any player has not joined, set to false
-        for player in players:
-            if 'state' not in player.state or player.state['state'] != 2:
-                state = False
 
-        return state
+    ###########################################################################
+    # This creates the player for a seat that's been accepted by the server:
+    # the player is of the class for the team the server put the seat on,
+    # and is named for its player handle and team, eg. p0t1
+    #
+    def seatPlayer(self, joiner):
+        if joiner.team == 1:
+            team = self.team1
+        else:
+            team = self.team2
+
+        player = self.pool.take(team,
+            name="p%dt%d" % (joiner.playerhandle, joiner.team),
+            record=self.record, gcount=self.gcount, lock=self.lock,
+            observers=self.observers,
+            params=self.params.get(joiner.team, {}),
+            swapped=self.swapped,
+            seed=self.deriveSeed("p%d" % (joiner.playerhandle)),
+            trace=self.trace)
+        player.takeSeat(joiner)
+        if self.trace is not None:
+            self.trace.name(player.playerhandle, player.name)
+        return player
 
 
     ###########################################################################
-    # This sends a start message to begin the game: it figures out who the
-    # creator is and sends a message as that person
+    # This sends a start message to begin the game, from the player the
+    # server has marked as the creator in its STATE: it returns false if
+    # none of our players has seen that STATE yet, and we have to wait for
+    # it
     #
     def sendStart(self, players):
-        # figure out the creator
         for player in players:
-            if player.state['creator'] == 1:
+            if player.state.creator == 1:
                 player.sendStart()
-                return
+                return True
+        return False
 
 
     ###########################################################################
     # This routine plays a game:
-    #  - it instantiates 4 players and connects them to the server
+    #  - it joins 4 seats to the server, and instantiates a player for each
     #  - it serves messages from the server to the players until a
     #    parseMessage() call returns false
     #  - then it exits
@@ -120,49 +292,47 @@ class Game(Thread):
         # we track whether we've sent a start message or not
         started = 0
 
-        # first we create up to 4 players and join them to the server: we
-        # stagger the player joins by team, since the server will assign the
-        # added players to team 0, then team 1, then team 0 again, then team
-        # 1 again; after each join, we check if the join succeeded, and if so,
-        # we add the player to the list of players and sockets
-        player = self.team1(
-            server="127.0.0.1", port=self.port, name="p0t1",
-            record=self.record, gcount=self.gcount, lock=self.lock)
-        if player.sendJoin():
-            players.append(player)
-            inputs.append(player.s)
-
-        player = self.team2(
-            server="127.0.0.1", port=self.port, name="p1t2",
-            record=self.record, gcount=self.gcount, lock=self.lock)
-        if player.sendJoin():
-            players.append(player)
-            inputs.append(player.s)
-
-        player = self.team1(
-            server="127.0.0.1", port=self.port, name="p2t1",
-            record=self.record, gcount=self.gcount, lock=self.lock)
-        if player.sendJoin():
-            players.append(player)
-            inputs.append(player.s)
-
-        player = self.team2(
-            server="127.0.0.1", port=self.port, name="p3t2",
-            record=self.record, gcount=self.gcount, lock=self.lock)
-        if player.sendJoin():
-            players.append(player)
-            inputs.append(player.s)
+        # the observers our players report the game to
+        if self.history is not None:
+            self.observers.append(self.history.collector(self.gcount))
+        if self.capture is not None:
+            self.observers.append(self.capture.collector(self.gcount))
+
+        # first we connect all 4 seats and send their joins at once, rather
+        # than waiting for each seat's reply before joining the next: the
+        # server alternates the teams in the order the joins arrive, so we
+        # can't know a seat's team until its JOINACCEPT comes back, and we
+        # only create the seat's player, of its team's class, at that point
+        joiners = []
+        joined = {}
+        for i in range(4):
+            start = perf_counter_ns()
+            joiner = self.pool.take(EuchrePlayer,
+                server=self.host, port=self.port, table=self.table,
+                sock=self.playerSocket(),
+                name="p%d" % (i), gcount=self.gcount, trace=self.trace)
+            joined[joiner] = start
+            if joiner.sendJoin(wait=False):
+                joiners.append(joiner)
+                inputs.append(joiner.s)
 
         # loop across our player sockets checking for input to process
-        while players:
+        while joiners or players:
+            start = perf_counter_ns()
             readable, writable, exceptional = \
                 select.select(inputs, [], [], self.timeout)
+            if self.trace is not None:
+                self.trace.span(-1, "server wait", start, perf_counter_ns())
 
             # if there are no results in inputs, then we hit the timeout, which
             # probably means something went wrong (a client died?) and we should
             # just reset the whole thing
             if len(readable) == 0:
                 error("uh-oh, hit timeout, terminating game")
+                with self.lock:
+                    self.record.addTimeout()
+                if self.trace is not None:
+                    self.trace.mark("timeout")
                 return
 
             # loop across each readable socket
@@ -172,16 +342,30 @@ class Game(Thread):
                         players.remove(player)
                         inputs.remove(player.s)
 
-            # Ugh, the server doesn't support a STARTOFFER message (yet), so
-            # we need to detect when we have 4 connected players to know when
-            # to start
-            if players and self.allJoined(players):
-                # this sends the start message: let the games begin!
-                if players[0].state['hstate'] == 0 and started != 1:
+            # then handle any join replies: an accepted seat gets its player,
+            # which reads the rest of the seat's messages from here on
+            for joiner in joiners[:]:
+                if joiner.s in readable:
+                    joiners.remove(joiner)
+                    inputs.remove(joiner.s)
+                    if joiner.parseMessage():
+                        if self.trace is not None:
+                            self.trace.span(joiner.playerhandle, "join",
+                                joined[joiner],
+                                perf_counter_ns())
+                        player = self.seatPlayer(joiner)
+                        players.append(player)
+                        inputs.append(player.s)
+
+            # Ugh, the server doesn't support a STARTOFFER message (yet), but
+            # once all 4 seats are accepted the game can be started, so we
+            # send the start as soon as the creator knows it's the creator
+            # (every join is followed by a STATE to everyone seated, so it
+            # will): let the games begin!
+            if len(players) == 4 and started != 1:
+                if self.sendStart(players):
                     info("")
-                    info("server: everyone is joined, p%d sending start"
-                        % (started))
-                    self.sendStart(players)
+                    info("server: everyone is joined, sending start")
                     started = 1
 
         # if we get here, all the clients have left, so we just return and a
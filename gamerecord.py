@@ -0,0 +1,307 @@
+###########################################################################
+# This is the binary game record: where Record only keeps aggregates, this
+# keeps everything that happened in each game, in a compact form that can
+# be streamed back for offline analysis.
+#
+# The file starts with a 5 byte header, "PEGR" and a version byte, and is
+# followed by one length prefixed record per game:
+#    <record> : <size> <game> <flags> <events>
+#      <size>   : !I, the length of the events, as stored
+#      <game>   : !I, the game number
+#      <flags>  : !B, 1 if the events are zlib compressed
+#
+# The events are a byte string, in the order they happened, each a tag
+# byte followed by a fixed number of bytes for that tag:
+#    DEAL     : <seat> <dealer> <hole> <card> x5   (a seat's dealt hand)
+#    BID      : <seat> <op> <suit>                 (order, call, or defend)
+#    DROP     : <seat> <card>                      (the dealer's drop)
+#    PLAY     : <seat> <card>
+#    HANDOVER : <score1> <score2>                  (the scores after it)
+#
+# A card is a byte, value*4 + suit; an op is its message ID less 123400,
+# and the suit is 255 if there isn't one (ie. for everything but calls).
+# A hand starts with the first DEAL after a HANDOVER, and a DEAL for a seat
+# that's already been dealt means the cards were thrown in and redealt.
+#
+# The players report to a GameCapture for their game (see
+# euchreplayer.Observer), which just appends a few bytes per event, and the
+# whole game is written in one go when it's over.  readGames() streams the
+# games back one at a time, eg.
+#    for game in readGames("games.pegr"):
+#        for hand in game.hands:
+#            ...
+
+import sys
+import zlib
+import struct
+import threading
+
+from card import Card
+from euchreplayer import EuchrePlayer, Observer
+
+
+MAGIC = b"PEGR"
+VERSION = 1
+
+# the record header, and the compressed flag
+recordStruct = struct.Struct("!IIB")
+COMPRESSED = 1
+
+# the event tags, and the number of bytes that follow each
+DEAL = 1
+BID = 2
+DROP = 3
+PLAY = 4
+HANDOVER = 5
+eventSize = { DEAL: 8, BID: 3, DROP: 2, PLAY: 2, HANDOVER: 2 }
+
+# the base the op codes are stored relative to, and the no suit marker
+OPBASE = 123400
+NOSUIT = 255
+
+
+###########################################################################
+# These convert a card to and from its byte
+#
+def cardByte(card):
+    return card.value*4 + card.suit
+
+def byteCard(b):
+    return Card(value=b >> 2, suit=b & 3)
+
+
+class GameRecorder:
+
+    ###########################################################################
+    # This initializes the object: it opens the file to append games to,
+    # and writes the header if the file is new
+    #
+    def __init__(self, filename, **kwargs):
+        # whether we zlib compress each game's events
+        self.compress = True
+        if 'compress' in kwargs:
+            self.compress = kwargs['compress']
+
+        self.lock = threading.Lock()
+        self.f = open(filename, "ab")
+        if self.f.tell() == 0:
+            self.f.write(MAGIC + bytes((VERSION,)))
+
+
+    ###########################################################################
+    # This returns a capture for one game
+    #
+    def collector(self, gcount):
+        return GameCapture(self, gcount)
+
+
+    ###########################################################################
+    # This writes one game's events as a record
+    #
+    def add(self, gcount, events):
+        flags = 0
+        if self.compress:
+            events = zlib.compress(events, 1)
+            flags = COMPRESSED
+        header = recordStruct.pack(len(events), gcount, flags)
+        with self.lock:
+            if self.f is not None:
+                self.f.write(header + events)
+
+
+    ###########################################################################
+    # This closes the file
+    #
+    def close(self):
+        with self.lock:
+            self.f.close()
+            self.f = None
+
+
+class GameCapture(Observer):
+
+    ###########################################################################
+    # This initializes the object: the recorder our game goes to, and the
+    # game number
+    #
+    def __init__(self, recorder, gcount):
+        self.recorder = recorder
+        self.gcount = gcount
+        self.events = bytearray()
+
+        # the last hand we've written a HANDOVER for: all four players see
+        # the end of each hand, but we only want it once
+        self.hands = 0
+        self.over = False
+
+
+    ###########################################################################
+    # These are called by the players as the game goes on, and each just
+    # appends the event to our buffer
+    #
+    def deal(self, player):
+        hand = player.originalHand
+        self.events.extend((DEAL, player.playerhandle, player.state.dealer,
+            cardByte(player.state.hole), cardByte(hand[0]),
+            cardByte(hand[1]), cardByte(hand[2]), cardByte(hand[3]),
+            cardByte(hand[4])))
+
+    def bid(self, player, op, suit=None):
+        self.events.extend((BID, player.playerhandle, op - OPBASE,
+            NOSUIT if suit is None else suit))
+
+    def drop(self, player, card):
+        self.events.extend((DROP, player.playerhandle, cardByte(card)))
+
+    def play(self, player, card):
+        self.events.extend((PLAY, player.playerhandle, cardByte(card)))
+
+    def handOver(self, player):
+        if player.hcount < self.hands:
+            return
+        self.hands = player.hcount + 1
+        state = player.state
+        if player.team == 1:
+            self.events.extend((HANDOVER, state.usscore, state.themscore))
+        else:
+            self.events.extend((HANDOVER, state.themscore, state.usscore))
+
+
+    ###########################################################################
+    # When the first player sees the end of the game, we write it out
+    #
+    def gameOver(self, player):
+        if not self.over:
+            self.over = True
+            self.recorder.add(self.gcount, bytes(self.events))
+
+
+class HandData:
+
+    __slots__ = ('dealer', 'hole', 'cards', 'bids', 'dropped', 'plays',
+        'scores')
+
+    ###########################################################################
+    # This initializes an empty hand: the cards are a list of 5 cards for
+    # each seat, the bids a list of (seat, op, suit) with the op a message
+    # ID and suit None if there isn't one, and the plays a list of
+    # (seat, card) in the order they were played
+    #
+    def __init__(self):
+        self.dealer = -1
+        self.hole = None
+        self.cards = [None]*4
+        self.bids = []
+        self.dropped = None
+        self.plays = []
+        self.scores = None
+
+
+class GameData:
+
+    __slots__ = ('game', 'hands', 'scores')
+
+    ###########################################################################
+    # This initializes a game: its number, its finished hands, and the
+    # final scores for team 1 and team 2
+    #
+    def __init__(self, game):
+        self.game = game
+        self.hands = []
+        self.scores = (0, 0)
+
+
+###########################################################################
+# This decodes one game's events: it raises a ValueError if they're
+# damaged, ie. an unknown tag, or an event cut short
+#
+def decodeGame(gcount, events):
+    game = GameData(gcount)
+    hand = HandData()
+    i = 0
+    while i < len(events):
+        tag = events[i]
+        size = eventSize.get(tag)
+        if size is None:
+            raise ValueError("unknown event tag %d at event byte %d"
+                % (tag, i))
+        if i + 1 + size > len(events):
+            raise ValueError("event cut short at event byte %d" % (i))
+        e = events[i+1:i+1+size]
+        i += 1 + size
+
+        if tag == DEAL:
+            if hand.cards[e[0]] is not None:
+                hand = HandData()
+            hand.dealer = e[1]
+            hand.hole = byteCard(e[2])
+            hand.cards[e[0]] = [ byteCard(b) for b in e[3:8] ]
+        elif tag == BID:
+            hand.bids.append((e[0], e[1] + OPBASE,
+                None if e[2] == NOSUIT else e[2]))
+        elif tag == DROP:
+            hand.dropped = byteCard(e[1])
+        elif tag == PLAY:
+            hand.plays.append((e[0], byteCard(e[1])))
+        elif tag == HANDOVER:
+            hand.scores = (e[0], e[1])
+            game.hands.append(hand)
+            game.scores = hand.scores
+            hand = HandData()
+    return game
+
+
+###########################################################################
+# This is a generator that reads a game record file and yields each game in
+# turn, as a GameData: only one game is in memory at a time.  A damaged
+# game raises a ValueError naming the file offset of its record.
+#
+def readGames(filename):
+    with open(filename, "rb") as f:
+        header = f.read(len(MAGIC) + 1)
+        if header[:len(MAGIC)] != MAGIC:
+            raise ValueError("%s isn't a game record file" % (filename))
+
+        while True:
+            offset = f.tell()
+            header = f.read(recordStruct.size)
+            if len(header) < recordStruct.size:
+                return
+            (size, gcount, flags) = recordStruct.unpack(header)
+            events = f.read(size)
+            if len(events) < size:
+                return
+            try:
+                if flags & COMPRESSED:
+                    events = zlib.decompress(events)
+                game = decodeGame(gcount, events)
+            except (ValueError, zlib.error) as e:
+                raise ValueError("%s: damaged game %d at offset %d: %s"
+                    % (filename, gcount, offset, e)) from None
+            yield game
+
+
+###########################################################################
+# Run as a script, this prints out the games in a record file:
+#    python3 gamerecord.py games.pegr
+#
+if __name__ == "__main__":
+    name = EuchrePlayer.messageName
+    for game in readGames(sys.argv[1]):
+        print("game %d: %d hands, %d to %d"
+            % (game.game, len(game.hands), game.scores[0], game.scores[1]))
+        for (h, hand) in enumerate(game.hands):
+            print("  hand %d: dealer %d, hole %s" % (h, hand.dealer, hand.hole))
+            for seat in range(4):
+                if hand.cards[seat] is not None:
+                    print("    p%d %s" % (seat,
+                        " ".join(str(c) for c in hand.cards[seat])))
+            print("    bids: %s" % (" ".join(
+                "%d:%s%s" % (seat, name[op].lower(),
+                    ":" + Card.suitName(suit) if suit is not None else "")
+                for (seat, op, suit) in hand.bids)))
+            if hand.dropped is not None:
+                print("    dropped: %s" % (hand.dropped))
+            print("    plays: %s" % (" ".join(
+                "%d:%s" % (seat, card) for (seat, card) in hand.plays)))
+            print("    score: %d to %d" % hand.scores)
@@ -0,0 +1,119 @@
+###########################################################################
+# These objects hold a player's view of the game, as parsed from the STATE
+# messages: GameState has the game data, and a SeatState for each of the
+# four seats.  They use __slots__, so the parser fills in a fixed set of
+# attributes in place, and player logic reads them as plain attributes:
+#
+#    self.state.dealer
+#    self.state.seats[ph].card
+#
+# For existing code they also work like the dicts they replace, so that
+# self.state['dealer'] and self.state[ph]['card'] still read (and write)
+# the same values.  As with the dicts, a value the server hasn't sent yet
+# (eg. the hole card before the deal) is simply not set: reading it raises
+# KeyError through the dict interface, or AttributeError as an attribute,
+# and "'hole' in self.state" is false until it's set.
+
+
+class SeatState:
+
+    __slots__ = (
+        # 0 is unconnected, 1 is connected, 2 is joined; the rest are only
+        # set once the seat has joined
+        'state',
+
+        # the player's strings
+        'name', 'clientname', 'hardware', 'os', 'comment',
+
+        # the team, and the number of cards in hand
+        'team', 'numcards',
+
+        # the player's booleans
+        'creator', 'ordered', 'dealer', 'alone', 'defend', 'leader', 'maker',
+        'playoffer', 'orderoffer', 'dropoffer', 'calloffer', 'defendoffer',
+        'cardinplay', 'passed',
+
+        # the card played, if cardinplay is set
+        'card',
+    )
+
+
+    ###########################################################################
+    # The dict interface, for code written against the old state dicts
+    #
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return hasattr(self, key)
+
+
+class GameState:
+
+    __slots__ = (
+        # the seats, indexed by player handle
+        'seats',
+
+        # our own seat's joined state, and whether we're the creator
+        'state', 'creator',
+
+        # the scores and tricks from our point of view, and the change in
+        # each since the last STATE that changed them
+        'usscore', 'themscore', 'ustricks', 'themtricks',
+        'scoredelta', 'trickdelta',
+
+        # the player handles of the seats with these roles
+        'orderer', 'dealer', 'aloner', 'defender', 'leader', 'maker',
+
+        # the game data
+        'ingame', 'hstate', 'suspend', 'holein', 'hole', 'trumpset',
+        'trump', 'numcards',
+
+        # the game options
+        'defend', 'aloneonorder', 'screw',
+    )
+
+
+    ###########################################################################
+    # This initializes the state for a new game
+    #
+    def __init__(self):
+        self.seats = (SeatState(), SeatState(), SeatState(), SeatState())
+        self.state = 0
+        self.creator = 0
+
+        # initialize scores and tricks to 0
+        self.usscore    = 0
+        self.themscore  = 0
+        self.ustricks   = 0
+        self.themtricks = 0
+
+        # init orderer to -1
+        self.orderer = -1
+
+
+    ###########################################################################
+    # The dict interface: an int key is a player handle, and returns that
+    # seat's state
+    #
+    def __getitem__(self, key):
+        if type(key) is int:
+            return self.seats[key]
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        if type(key) is int:
+            return 0 <= key < 4
+        return hasattr(self, key)
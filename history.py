@@ -0,0 +1,260 @@
+###########################################################################
+# This is the hand history store: one row per hand played, in an sqlite
+# database, so a particular hand can be looked up with an indexed query
+# rather than by grepping through peuchre.log.  Each row has:
+#  - the run, game, and hand number, and the seats' player modules
+#  - the dealer, the four original hands, and the hole card
+#  - the bids in the order they were made, and the dealer's drop
+#  - trump, the maker's seat and position, whether they went alone, and the
+#    remapped maker's hand (as per Record.remap())
+#  - the plays of each trick, in the order they were made
+#  - the score delta for the maker's team, and the outcome of the hand
+#
+# The game threads don't touch the database themselves: each game has a
+# HandCollector, which the players report to (see euchreplayer.Observer),
+# and finished hands are queued up and written in batches, each in a single
+# transaction.  The peuchre-history script queries the store.
+
+import os
+import time
+import sqlite3
+import threading
+
+from card import Card
+from record import Record
+from euchreplayer import Observer
+
+
+# the columns of the hands table, in order
+COLUMNS = [ 'run', 'game', 'hand', 'seats', 'dealer',
+    'hand0', 'hand1', 'hand2', 'hand3', 'hole', 'bids', 'dropped',
+    'trump', 'maker', 'makerpos', 'alone', 'remap', 'plays',
+    'delta', 'outcome', 'score1', 'score2' ]
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS runs (
+        run TEXT PRIMARY KEY, started REAL, team1 TEXT, team2 TEXT);
+    CREATE TABLE IF NOT EXISTS hands (
+        run TEXT, game INTEGER, hand INTEGER, seats TEXT, dealer INTEGER,
+        hand0 TEXT, hand1 TEXT, hand2 TEXT, hand3 TEXT, hole TEXT,
+        bids TEXT, dropped TEXT, trump TEXT, maker INTEGER,
+        makerpos INTEGER, alone INTEGER, remap TEXT, plays TEXT,
+        delta INTEGER, outcome TEXT, score1 INTEGER, score2 INTEGER);
+    CREATE INDEX IF NOT EXISTS hands_game ON hands (run, game, hand);
+    CREATE INDEX IF NOT EXISTS hands_remap ON hands (remap);
+    CREATE INDEX IF NOT EXISTS hands_maker ON hands (maker);
+    CREATE INDEX IF NOT EXISTS hands_outcome ON hands (outcome);
+"""
+
+
+###########################################################################
+# This returns the outcome of a hand, from the maker's score delta
+#
+def outcome(delta):
+    if delta < 0: return "euchred"
+    if delta == 1: return "made"
+    if delta == 2: return "march"
+    return "alone"
+
+
+class HandHistory:
+
+    ###########################################################################
+    # This initializes the object: it opens (or creates) the database, and
+    # adds a row for this run
+    #
+    def __init__(self, filename, **kwargs):
+        # the number of hands we queue up before writing them
+        self.batch = 500
+        if 'batch' in kwargs:
+            self.batch = kwargs['batch']
+
+        # the run ID tags every hand from this run of peuchre
+        self.run = "%s-%d" % (time.strftime("%Y%m%d-%H%M%S"), os.getpid())
+        if 'run' in kwargs:
+            self.run = kwargs['run']
+
+        team1 = kwargs.get('team1', "")
+        team2 = kwargs.get('team2', "")
+
+        # the game threads hand us rows, but only one of them writes at a
+        # time, under the lock; WAL lets the query script read while we do
+        self.lock = threading.Lock()
+        self.pending = []
+        self.db = sqlite3.connect(filename, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO runs VALUES (?,?,?,?)",
+                (self.run, time.time(), team1, team2))
+
+        self.insert = "INSERT INTO hands (%s) VALUES (%s)" \
+            % (",".join(COLUMNS), ",".join("?"*len(COLUMNS)))
+
+
+    ###########################################################################
+    # This returns a collector for one game's hands
+    #
+    def collector(self, gcount):
+        return HandCollector(self, gcount)
+
+
+    ###########################################################################
+    # This queues up a finished hand, and writes the queue out if it's full
+    #
+    def add(self, row):
+        with self.lock:
+            # a game still running after we're closed (eg. on ^C) loses
+            # its hands
+            if self.db is None:
+                return
+            self.pending.append(row)
+            if len(self.pending) >= self.batch:
+                self.write()
+
+
+    ###########################################################################
+    # This writes out all the queued hands in one transaction: the lock
+    # must be held
+    #
+    def write(self):
+        if not self.pending:
+            return
+        with self.db:
+            self.db.executemany(self.insert, self.pending)
+        self.pending = []
+
+
+    ###########################################################################
+    # This writes out anything still queued, and closes the database
+    #
+    def close(self):
+        with self.lock:
+            self.write()
+            self.db.close()
+            self.db = None
+
+
+class HandCollector(Observer):
+
+    ###########################################################################
+    # This initializes the object: the store the hands go to, and the game
+    # we're collecting for
+    #
+    def __init__(self, history, gcount):
+        self.history = history
+        self.gcount = gcount
+
+        # the hands underway, by hand number: the players don't all see the
+        # end of one hand before some see the start of the next, so there
+        # can be two at once
+        self.hands = {}
+
+
+    ###########################################################################
+    # This returns the data for the hand a player is in
+    #
+    def current(self, player):
+        data = self.hands.get(player.hcount)
+        if data is None:
+            data = self.newHand(player.hcount)
+        return data
+
+    def newHand(self, hcount):
+        data = {
+            'seats'   : [ "" ]*4,
+            'cards'   : [ None ]*4,
+            'bids'    : [],
+            'dropped' : "",
+            'plays'   : [],
+        }
+        self.hands[hcount] = data
+        return data
+
+
+    ###########################################################################
+    # These are called by the players as the hand goes on.  At the deal, we
+    # take each player's hand, and from the first we take the dealer and
+    # the hole card; if everyone passes and the cards are dealt again, a
+    # player's second deal starts the hand over.
+    #
+    def deal(self, player):
+        data = self.current(player)
+        ph = player.playerhandle
+        if data['cards'][ph] is not None:
+            data = self.newHand(player.hcount)
+        data['seats'][ph] = type(player).__module__
+        data['cards'][ph] = list(player.originalHand)
+        if 'dealer' not in data:
+            data['dealer'] = player.state.dealer
+            data['hole'] = str(player.state.hole)
+
+    def bid(self, player, op, suit=None):
+        token = "%d:%s" % (player.playerhandle,
+            player.messageName[op].lower())
+        if suit is not None:
+            token += ":" + Card.suitName(suit)
+        self.current(player)['bids'].append(token)
+
+    def drop(self, player, card):
+        self.current(player)['dropped'] = str(card)
+
+    def play(self, player, card):
+        plays = self.current(player)['plays']
+        while len(plays) <= player.tcount:
+            plays.append([])
+        plays[player.tcount].append("%d:%s" % (player.playerhandle, card))
+
+
+    ###########################################################################
+    # At the end of the hand we build its row from the first player to see
+    # the HANDOVER, and queue it up in the store
+    #
+    def handOver(self, player):
+        data = self.hands.pop(player.hcount, None)
+        if data is None or 'dealer' not in data:
+            return
+
+        state = player.state
+        maker = state.maker
+        makerteam = state.seats[maker].team
+
+        # the score delta is from the player's point of view, so we flip it
+        # if the player isn't on the maker's team
+        delta = state.scoredelta
+        if player.team != makerteam:
+            delta = -delta
+        if player.team == 1:
+            scores = (state.usscore, state.themscore)
+        else:
+            scores = (state.themscore, state.usscore)
+
+        # this is the position index from Record.addHand(): 0 is the first
+        # person after the dealer, and 3 is the dealer
+        pos = (maker - (data['dealer'] + 1)) % 4
+
+        alone = any(seat.alone for seat in state.seats)
+        cards = data['cards']
+        hands = [ " ".join(str(c) for c in hand) if hand is not None else ""
+                  for hand in cards ]
+        remap = ""
+        if cards[maker] is not None:
+            remap = Record.remap(cards[maker], state.trump)
+
+        self.history.add((
+            self.history.run, self.gcount, player.hcount,
+            " ".join(data['seats']), data['dealer'],
+            hands[0], hands[1], hands[2], hands[3], data['hole'],
+            " ".join(data['bids']), data['dropped'],
+            Card.suitName(state.trump), maker, pos, 1 if alone else 0, remap,
+            " / ".join(" ".join(trick) for trick in data['plays']),
+            delta, outcome(delta), scores[0], scores[1] ))
+
+
+    ###########################################################################
+    # We've nothing to do at the end of the game: any hand not finished by
+    # now never will be, so it's dropped
+    #
+    def gameOver(self, player):
+        self.hands.clear()
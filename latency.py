@@ -0,0 +1,118 @@
+###########################################################################
+# This object is a latency histogram, for timing where the time goes in a
+# game: each player keeps one per kind of thing it times (see
+# EuchrePlayer.timed()), and hands them to the Record at the end of each
+# game, which merges them per team module.  The kinds are:
+#  - wait          : the time blocked reading the next message, ie. server
+#                    time plus the other players' turns
+#  - <MESSAGE>     : the time decoding and handling each message type, eg.
+#                    STATE (an offer's time includes the decision and send)
+#  - decide<Name>  : the time in each of the player's decide*() methods
+#  - send          : the time encoding and sending each reply
+#  - lock          : the time waiting for the Record lock
+#
+# Times are taken in integer nanoseconds from the monotonic perf counter,
+# and counted into buckets four to each power of two, so the middle of a
+# bucket is within 12.5% of any time in it: adding a time is a
+# bit_length(), a shift, and a dict update, cheap enough to leave on for
+# every message.
+
+# the percentiles we report
+PERCENTILES = (0.5, 0.9, 0.99)
+
+
+class Histogram:
+
+    __slots__ = ('buckets', 'count', 'total', 'max')
+
+    ###########################################################################
+    # This initializes the object
+    #
+    def __init__(self):
+        # the count of times in each bucket, by bucket index
+        self.buckets = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+
+    ###########################################################################
+    # This adds a time, in nanoseconds: the bucket index is four times the
+    # bit length of the time, plus the two bits after its top bit, and
+    # times under 8ns get a bucket each
+    #
+    def add(self, ns):
+        b = ns.bit_length()
+        if b > 3:
+            i = (b << 2) | ((ns >> (b - 3)) & 3)
+        else:
+            i = ns
+        buckets = self.buckets
+        buckets[i] = buckets.get(i, 0) + 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+
+    ###########################################################################
+    # This adds another histogram's counts into ours
+    #
+    def merge(self, other):
+        for (i, n) in other.buckets.items():
+            self.buckets[i] = self.buckets.get(i, 0) + n
+        self.count += other.count
+        self.total += other.total
+        if other.max > self.max:
+            self.max = other.max
+
+
+    ###########################################################################
+    # This returns the middle of a bucket's range of times, in nanoseconds
+    #
+    @staticmethod
+    def bucketTime(i):
+        if i < 16:
+            return i
+        (b, sub) = (i >> 2, i & 3)
+        return ((4 + sub) << (b - 3)) + (1 << (b - 3)) / 2
+
+
+    ###########################################################################
+    # This returns the time below which the given fraction of the times
+    # fall, in nanoseconds
+    #
+    def percentile(self, q):
+        if self.count == 0:
+            return 0
+        target = q * self.count
+        seen = 0
+        for i in sorted(self.buckets):
+            seen += self.buckets[i]
+            if seen >= target:
+                return min(self.bucketTime(i), self.max)
+        return self.max
+
+
+    ###########################################################################
+    # This returns the mean time, in nanoseconds
+    #
+    def mean(self):
+        if self.count == 0:
+            return 0
+        return self.total / self.count
+
+
+###########################################################################
+# This returns the sort key we list the kinds in: the wait first, then the
+# decisions, then the sends and the lock, then the messages by name
+#
+def kindOrder(kind):
+    if kind == "wait":
+        return (0, kind)
+    if kind.startswith("decide"):
+        return (1, kind)
+    if kind in ("send", "lock"):
+        return (2, kind)
+    return (3, kind)
+
@@ -0,0 +1,321 @@
+###########################################################################
+# This object runs a round-robin league between a list of player modules:
+# every module plays every other, with the games of all the pairings
+# scheduled across one set of game slots, so the slots are kept busy until
+# the last pairing is done.  For each pairing we keep its own Record, and
+# the games won by each side, and a pairing stops once its result is
+# settled:
+#  - decided  : the win rate is far enough from 50% that we know which
+#               module is better (see below)
+#  - precise  : the standard error of the win rate is down to `precision`,
+#               so the modules are as close as we care to measure
+#  - capped   : it's played `maxgames` games
+# and none stop before `mingames`.  A lopsided pairing is decided quickly,
+# so most of the games go to the close ones, which need them.
+#
+# We look at whether a pairing is decided after every game, and a pairing
+# of two even modules that's tested that often at `decide` standard errors
+# will drift past it by chance far more often than a single test would.
+# So `decide` sets the false decision rate of the whole pairing: we split
+# the two-sided error rate of one test at `decide` standard errors evenly
+# across every look we might take (a Bonferroni bound), and each look
+# tests at the stricter threshold that gives.  With the defaults (3 standard
+# errors, 981 looks) that's about 4.7 standard errors per look.
+#
+# From the pairings' results we fit a Bradley-Terry model (which is what
+# Elo ratings approximate) to rate the modules on the Elo scale, and the
+# uncertainty of each rating comes from the model's Fisher information.
+
+import math
+import time
+import threading
+
+from statistics import NormalDist
+
+from logging import warning as warn, log, debug, info, error, critical
+
+from game import Game
+from euchreplayer import Observer
+from record import Record
+from pool import Pool
+
+# converts a logistic rating difference to Elo points
+ELO = 400 / math.log(10)
+
+
+class GameResult(Observer):
+
+    ###########################################################################
+    # This is a player observer (see euchreplayer.Observer) that tells the
+    # given function which team won, once the game is over
+    #
+    def __init__(self, done):
+        self.done = done
+        self.over = False
+
+    # we only care about the end of the game
+    def gameOver(self, player):
+        if self.over:
+            return
+        self.over = True
+        state = player.state
+        if state.usscore > state.themscore:
+            self.done(player.team)
+        else:
+            self.done(3 - player.team)
+
+
+class Pairing:
+
+    ###########################################################################
+    # This initializes a pairing of two modules: module a plays team 1 and
+    # module b team 2
+    #
+    def __init__(self, a, b):
+        self.a = a
+        self.b = b
+        self.record = Record(team1=a, team2=b, files=False)
+        self.wins = 0
+        self.games = 0
+        self.running = 0
+        self.status = "playing"
+
+
+    ###########################################################################
+    # This returns a's win rate and its standard error: the rate is
+    # smoothed by half a game each way, so it's never 0 or 1
+    #
+    def winRate(self):
+        p = (self.wins + 0.5) / (self.games + 1)
+        return (p, math.sqrt(p * (1 - p) / (self.games + 1)))
+
+
+class League:
+
+    ###########################################################################
+    # This initializes the object
+    #
+    def __init__(self, modules, **kwargs):
+        # the modules, and their Player classes
+        self.modules = modules
+        self.classes = {}
+        for module in modules:
+            self.classes[module] = __import__(module, globals(), locals(),
+                ['Player'], 0).Player
+
+        # the number of game slots
+        self.numthreads = 25
+        if 'numthreads' in kwargs:
+            self.numthreads = kwargs['numthreads']
+
+        # the stopping rules, as above
+        self.mingames = 20
+        if 'mingames' in kwargs:
+            self.mingames = kwargs['mingames']
+        self.maxgames = 1000
+        if 'maxgames' in kwargs:
+            self.maxgames = kwargs['maxgames']
+        self.decide = 3.0
+        if 'decide' in kwargs:
+            self.decide = kwargs['decide']
+        self.precision = 0.02
+        if 'precision' in kwargs:
+            self.precision = kwargs['precision']
+
+        # the threshold each look at a pairing tests at, in standard errors,
+        # so that all the looks together decide an even pairing no more
+        # often than one test at `decide` would, as above
+        alpha = 2 * (1 - NormalDist().cdf(self.decide))
+        looks = max(1, self.maxgames - self.mingames + 1)
+        self.threshold = NormalDist().inv_cdf(1 - alpha / (2 * looks))
+
+        # the server inactivity timeout, server implementation, and seed
+        # passed to each game
+        self.timeout = 30
+        if 'timeout' in kwargs:
+            self.timeout = kwargs['timeout']
+        self.serverimpl = "euchred"
+        if 'serverimpl' in kwargs:
+            self.serverimpl = kwargs['serverimpl']
+        self.seed = None
+        if 'seed' in kwargs:
+            self.seed = kwargs['seed']
+
+        # every pairing of two modules
+        self.pairings = []
+        for i in range(len(modules)):
+            for j in range(i+1, len(modules)):
+                self.pairings.append(Pairing(modules[i], modules[j]))
+
+        # the lock guards the pairings' counts and records
+        self.lock = threading.Lock()
+
+
+    ###########################################################################
+    # This records the result of a game of a pairing, and checks whether
+    # the pairing is now settled
+    #
+    def addResult(self, pairing, team):
+        with self.lock:
+            pairing.games += 1
+            if team == 1:
+                pairing.wins += 1
+            if pairing.status != "playing" or pairing.games < self.mingames:
+                return
+            (p, err) = pairing.winRate()
+            if abs(p - 0.5) > self.threshold * err:
+                pairing.status = "decided"
+            elif err <= self.precision:
+                pairing.status = "precise"
+            elif pairing.games >= self.maxgames:
+                pairing.status = "capped"
+            if pairing.status != "playing":
+                info("league: %s vs %s %s after %d games"
+                    % (pairing.a, pairing.b, pairing.status, pairing.games))
+
+
+    ###########################################################################
+    # This returns the pairing the next free slot should play, or None if
+    # none need more games: the one that's unsettled and has the fewest
+    # games played or underway
+    #
+    def nextPairing(self):
+        with self.lock:
+            playing = [ pairing for pairing in self.pairings
+                        if pairing.status == "playing" and
+                        pairing.games + pairing.running < self.maxgames ]
+            if not playing:
+                return None
+            pairing = min(playing,
+                key=lambda pairing: pairing.games + pairing.running)
+            pairing.running += 1
+            return pairing
+
+
+    ###########################################################################
+    # This runs the league to completion
+    #
+    def run(self):
+        threads = [None]*self.numthreads
+        pools = [ Pool() for i in range(self.numthreads) ]
+        pairings = [None]*self.numthreads
+        gcount = 0
+
+        while True:
+            for i in range(self.numthreads):
+                if threads[i] is not None and not threads[i].is_alive():
+                    with self.lock:
+                        pairings[i].running -= 1
+                    threads[i] = None
+                if threads[i] is not None:
+                    continue
+                pairing = self.nextPairing()
+                if pairing is None:
+                    continue
+                pairings[i] = pairing
+                result = GameResult(
+                    lambda team, pairing=pairing: self.addResult(pairing, team))
+                threads[i] = Game(
+                    id=i, gcount=gcount, lock=self.lock,
+                    stats=False, record=pairing.record,
+                    team1=self.classes[pairing.a],
+                    team2=self.classes[pairing.b],
+                    timeout=self.timeout,
+                    serverimpl=self.serverimpl,
+                    seed=self.seed,
+                    pool=pools[i], observers=[result] )
+                threads[i].start()
+                gcount += 1
+
+            if not any(threads):
+                return
+            time.sleep(0.005)
+
+
+    ###########################################################################
+    # This fits the ratings: a Bradley-Terry model of every pairing's
+    # results, by the minorization-maximization iteration (which, unlike a
+    # Newton step on each rating alone, always converges), with the mean
+    # rating fixed at 0.  It returns a dict of module to (rating, error),
+    # in Elo points.
+    #
+    def ratings(self):
+        n = len(self.modules)
+        index = { module: i for (i, module) in enumerate(self.modules) }
+
+        # a small prior of one drawn game in each pairing keeps the ratings
+        # finite if one side has won everything
+        results = []
+        for pairing in self.pairings:
+            results.append((index[pairing.a], index[pairing.b],
+                pairing.wins + 0.5, pairing.games + 1))
+
+        strength = [1.0]*n
+        for iteration in range(1000):
+            wins = [0.0]*n
+            denom = [0.0]*n
+            for (i, j, w, games) in results:
+                wins[i] += w
+                wins[j] += games - w
+                denom[i] += games / (strength[i] + strength[j])
+                denom[j] += games / (strength[i] + strength[j])
+            new = [ wins[k] / denom[k] if denom[k] > 0 else strength[k]
+                    for k in range(n) ]
+            scale = math.exp(sum(math.log(x) for x in new) / n)
+            new = [ x / scale for x in new ]
+            change = max(abs(math.log(new[k] / strength[k]))
+                         for k in range(n))
+            strength = new
+            if change < 1e-9:
+                break
+
+        # the error of each rating comes from the Fisher information
+        r = [ math.log(x) for x in strength ]
+        fisher = [0.0]*n
+        for (i, j, w, games) in results:
+            p = 1 / (1 + math.exp(r[j] - r[i]))
+            fisher[i] += games * p * (1 - p)
+            fisher[j] += games * p * (1 - p)
+
+        return { module: (ELO * r[index[module]],
+            ELO / math.sqrt(fisher[index[module]])
+                if fisher[index[module]] > 0 else float('inf'))
+            for module in self.modules }
+
+
+    ###########################################################################
+    # This returns the rows of the results tables: one per module, best
+    # rated first, and one per pairing
+    #
+    def table(self):
+        ratings = self.ratings()
+        modules = []
+        for module in sorted(self.modules, key=lambda m: -ratings[m][0]):
+            games = sum(pairing.games for pairing in self.pairings
+                        if module in (pairing.a, pairing.b))
+            modules.append({
+                'module' : module,
+                'rating' : round(ratings[module][0], 1),
+                'error'  : round(ratings[module][1], 1),
+                'games'  : games,
+            })
+
+        pairings = []
+        for pairing in self.pairings:
+            (p, err) = pairing.winRate()
+            record = pairing.record
+            euchres = [ record.p(record.euchres.team[t],
+                record.makers.team[t]) for t in (0, 1) ]
+            pairings.append({
+                'team1'    : pairing.a,
+                'team2'    : pairing.b,
+                'games'    : pairing.games,
+                'wins1'    : pairing.wins,
+                'winrate1' : round(p, 4),
+                'error'    : round(err, 4),
+                'hands'    : record.counts.hands,
+                'euchre1'  : euchres[0],
+                'euchre2'  : euchres[1],
+                'status'   : pairing.status,
+            })
+        return (modules, pairings)
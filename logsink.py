@@ -0,0 +1,206 @@
+###########################################################################
+# This is the log sink for peuchre: rather than every game thread writing
+# to the log file (and the console) itself, under the logging module's
+# handler lock, the game threads only put their records on a queue, and a
+# single listener thread does all the writing.  The log file is rotated
+# once it reaches a size limit, and optionally on a time interval too, and
+# each rotated segment is compressed (gzip or lzma) by a thread of its own,
+# so neither the game threads nor the listener ever wait on compression.
+#
+# Rotated segments are named for the time they were rotated, eg.
+#    peuchre.log.20261019-023147.gz
+# so a rotation never has to rename older segments, and only the most
+# recent ones are kept.
+
+import os
+import glob
+import gzip
+import lzma
+import time
+import queue
+import shutil
+import logging
+import threading
+import logging.handlers
+
+
+class RotatingLog(logging.handlers.RotatingFileHandler):
+
+    # the suffix and open routine for each compression type
+    compressors = {
+        'gzip' : ('.gz', gzip.open),
+        'lzma' : ('.xz', lzma.open),
+        'none' : ('', None),
+    }
+
+
+    ###########################################################################
+    # This initializes the handler: the file to log to, the size in bytes
+    # and the interval in seconds to rotate it at (0 for never), the
+    # compression for rotated segments, and how many to keep (0 keeps all)
+    #
+    def __init__(self, filename, **kwargs):
+        self.maxsize = 100*1024*1024
+        if 'maxsize' in kwargs:
+            self.maxsize = kwargs['maxsize']
+        self.interval = 0
+        if 'interval' in kwargs:
+            self.interval = kwargs['interval']
+        self.compress = 'gzip'
+        if 'compress' in kwargs:
+            self.compress = kwargs['compress']
+        self.keep = 10
+        if 'keep' in kwargs:
+            self.keep = kwargs['keep']
+
+        logging.handlers.RotatingFileHandler.__init__(self, filename,
+            mode="a", maxBytes=self.maxsize, delay=True)
+        self.rolloverAt = time.time() + self.interval
+
+        # the segments waiting to be compressed, and the thread that does it
+        self.segments = queue.SimpleQueue()
+        self.compressor = threading.Thread(target=self.compressLoop,
+            name="logcompress", daemon=True)
+        self.compressor.start()
+
+
+    ###########################################################################
+    # We roll over on size, as per RotatingFileHandler, or once the interval
+    # is up
+    #
+    def shouldRollover(self, record):
+        if self.interval and time.time() >= self.rolloverAt:
+            return True
+        return logging.handlers.RotatingFileHandler.shouldRollover(self,
+            record)
+
+
+    ###########################################################################
+    # This rotates the log: the current file is renamed to a timestamped
+    # segment, which is handed off to be compressed, and a new file opened
+    #
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        if os.path.exists(self.baseFilename):
+            stamp = "%s.%s" % (self.baseFilename,
+                time.strftime("%Y%m%d-%H%M%S"))
+            segment = stamp
+            n = 1
+            while self.segmentExists(segment):
+                n += 1
+                segment = "%s-%d" % (stamp, n)
+            os.rename(self.baseFilename, segment)
+            self.segments.put(segment)
+
+        self.rolloverAt = time.time() + self.interval
+        self.stream = self._open()
+
+
+    ###########################################################################
+    # This returns true if a segment name is taken, compressed or not
+    #
+    def segmentExists(self, segment):
+        (suffix, opener) = self.compressors[self.compress]
+        return os.path.exists(segment) or os.path.exists(segment + suffix)
+
+
+    ###########################################################################
+    # This is the compressor thread: it compresses each rotated segment
+    # (writing to a temporary name, so a partial file is never mistaken for
+    # a finished one), then prunes the oldest segments past our limit
+    #
+    def compressLoop(self):
+        (suffix, opener) = self.compressors[self.compress]
+        while True:
+            segment = self.segments.get()
+            if segment is None:
+                return
+
+            if opener is not None:
+                try:
+                    with open(segment, "rb") as src, \
+                         opener(segment + suffix + ".tmp", "wb") as dst:
+                        shutil.copyfileobj(src, dst, 1024*1024)
+                    os.rename(segment + suffix + ".tmp", segment + suffix)
+                    os.unlink(segment)
+                except OSError:
+                    continue
+
+            self.prune(suffix)
+
+
+    ###########################################################################
+    # This returns the sort key of a segment's name, so segments sort in the
+    # order they were rotated: by timestamp, then by the count added to a
+    # second segment in the same second (which would otherwise sort before
+    # the first, as "-" sorts before ".")
+    #
+    def segmentKey(self, segment, suffix):
+        stamp = segment[len(self.baseFilename)+1:]
+        if suffix:
+            stamp = stamp[:-len(suffix)]
+        (day, sep, rest) = stamp.partition("-")
+        (clock, sep, n) = rest.partition("-")
+        return (day, clock, int(n) if n.isdigit() else 1)
+
+
+    ###########################################################################
+    # This removes the oldest finished segments, keeping self.keep of them
+    #
+    def prune(self, suffix):
+        if self.keep <= 0:
+            return
+        segments = sorted(glob.glob(glob.escape(self.baseFilename)
+            + ".[0-9]*" + suffix),
+            key=lambda segment: self.segmentKey(segment, suffix))
+        for segment in segments[:-self.keep]:
+            try:
+                os.unlink(segment)
+            except OSError:
+                pass
+
+
+    ###########################################################################
+    # This closes the file, and waits for any pending compression to finish
+    #
+    def close(self):
+        logging.handlers.RotatingFileHandler.close(self)
+        if self.compressor.is_alive():
+            self.segments.put(None)
+            self.compressor.join()
+
+
+class LogSink:
+
+    ###########################################################################
+    # This initializes the object: the handlers we're to feed, which are
+    # driven by a listener thread from the queue
+    #
+    def __init__(self, handlers):
+        self.queue = queue.SimpleQueue()
+        self.handler = logging.handlers.QueueHandler(self.queue)
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers,
+            respect_handler_level=True)
+        self.handlers = handlers
+
+
+    ###########################################################################
+    # This starts the listener, and routes the root logger through it
+    #
+    def start(self):
+        self.listener.start()
+        logging.getLogger('').addHandler(self.handler)
+
+
+    ###########################################################################
+    # This detaches us from the root logger, writes out everything still on
+    # the queue, and closes the handlers
+    #
+    def stop(self):
+        logging.getLogger('').removeHandler(self.handler)
+        self.listener.stop()
+        for handler in self.handlers:
+            handler.close()
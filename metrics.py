@@ -0,0 +1,179 @@
+###########################################################################
+# This is the metrics endpoint for peuchre --metrics-port: a small HTTP
+# server, on its own thread, that serves the run's stats from the Record in
+# the Prometheus text format at /metrics, so a run can be watched (and
+# graphed) without a terminal attached to it.
+#
+# The game threads update the Record under the record lock, and we don't
+# want a scrape to hold that up, so we never read the Record itself: the
+# mainline takes a snapshot of it (see Record.snapshot()) under the lock
+# about once a second and publishes it to us, and a scrape formats the
+# latest snapshot, which nothing else touches.
+
+import threading
+import http.server
+
+from logging import warning as warn, log, debug, info, error, critical
+from latency import kindOrder
+
+# the upper bounds of the latency histogram buckets we export, in seconds
+BUCKETS = ( 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001,
+            0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10 )
+
+
+###########################################################################
+# This formats a set of labels, eg. {team="1",module="random0"}
+#
+def labels(**kwargs):
+    if not kwargs:
+        return ""
+    return "{" + ",".join('%s="%s"' % (name, str(value).replace('"', '\\"'))
+        for (name, value) in kwargs.items()) + "}"
+
+
+###########################################################################
+# This formats a snapshot of the stats as Prometheus text
+#
+def formatMetrics(snapshot, active):
+    lines = []
+
+    # adds a metric's HELP and TYPE lines, then its samples
+    def metric(name, kind, help, samples):
+        lines.append("# HELP %s %s" % (name, help))
+        lines.append("# TYPE %s %s" % (name, kind))
+        for (suffix, labelset, value) in samples:
+            lines.append("%s%s%s %s" % (name, suffix, labelset, value))
+
+    # the overall counts
+    for (name, key, help) in (
+            ("games", "games", "Games played"),
+            ("hands", "hands", "Hands played"),
+            ("orders", "orders", "Hands where trump was ordered up"),
+            ("calls", "calls", "Hands where trump was called"),
+            ("euchres", "euchres", "Hands where the makers were euchred"),
+            ("timeouts", "timeouts", "Games abandoned at the server timeout")):
+        metric("peuchre_%s_total" % (name), "counter", help,
+            [ ("", "", snapshot[key]) ])
+
+    # the per team counts, labelled with each team's module
+    modules = (snapshot['team1'], snapshot['team2'])
+    for (name, key, help) in (
+            ("team_makes", "makers", "Hands made, by team"),
+            ("team_orders", "orderers", "Hands ordered, by team"),
+            ("team_calls", "callers", "Hands called, by team"),
+            ("team_euchres", "teameuchres", "Hands euchred, by making team")):
+        metric("peuchre_%s_total" % (name), "counter", help,
+            [ ("", labels(team=t+1, module=modules[t]), snapshot[key][t])
+              for t in (0, 1) ])
+
+    # the windowed throughput, and the games underway
+    windows = { 10: "10s", 60: "1m", 600: "10m", 3600: "1h", 86400: "1d" }
+    metric("peuchre_games_per_second", "gauge",
+        "Games finished per second, over each window",
+        [ ("", labels(window=windows[w]), "%.4f" % (snapshot['rates'][w][0]))
+          for w in sorted(snapshot['rates']) ])
+    metric("peuchre_hands_per_second", "gauge",
+        "Hands finished per second, over each window",
+        [ ("", labels(window=windows[w]), "%.4f" % (snapshot['rates'][w][1]))
+          for w in sorted(snapshot['rates']) ])
+    metric("peuchre_active_games", "gauge", "Games underway",
+        [ ("", "", active) ])
+    metric("peuchre_uptime_seconds", "gauge", "Seconds since the run started",
+        [ ("", "", "%.1f" % (snapshot['time'] - snapshot['start'])) ])
+
+    # the latency histograms, by module and kind, in seconds: each of our
+    # buckets is counted under the first exported bound at or above its
+    # middle
+    samples = []
+    for module in sorted(snapshot['latency']):
+        kinds = snapshot['latency'][module]
+        for kind in sorted(kinds, key=kindOrder):
+            hist = kinds[kind]
+            counts = [0]*len(BUCKETS)
+            for (i, n) in hist.buckets.items():
+                t = hist.bucketTime(i) / 1e9
+                for (b, bound) in enumerate(BUCKETS):
+                    if t <= bound:
+                        counts[b] += n
+                        break
+            cumulative = 0
+            for (b, bound) in enumerate(BUCKETS):
+                cumulative += counts[b]
+                samples.append(("_bucket",
+                    labels(module=module, kind=kind, le=bound), cumulative))
+            samples.append(("_bucket",
+                labels(module=module, kind=kind, le="+Inf"), hist.count))
+            samples.append(("_sum", labels(module=module, kind=kind),
+                "%.6f" % (hist.total / 1e9)))
+            samples.append(("_count", labels(module=module, kind=kind),
+                hist.count))
+    metric("peuchre_latency_seconds", "histogram",
+        "Player message, decision, send, and lock wait times", samples)
+
+    return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+
+    ###########################################################################
+    # This serves /metrics from the server's latest snapshot
+    #
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        (snapshot, active) = self.server.metrics.latest
+        if snapshot is None:
+            self.send_error(503, "no stats yet")
+            return
+        body = formatMetrics(snapshot, active).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # scrapes would otherwise be logged to stderr
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer:
+
+    ###########################################################################
+    # This initializes the object, and starts serving on the given address:
+    # by default only on localhost
+    #
+    def __init__(self, port, **kwargs):
+        self.host = "127.0.0.1"
+        if 'host' in kwargs:
+            self.host = kwargs['host']
+
+        # the latest snapshot and active game count: it's replaced whole by
+        # publish(), so a scrape always sees a consistent pair
+        self.latest = (None, 0)
+
+        self.httpd = http.server.ThreadingHTTPServer((self.host, port),
+            MetricsHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.metrics = self
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever,
+            name="metrics", daemon=True)
+        self.thread.start()
+
+
+    ###########################################################################
+    # This publishes a new snapshot of the record, and the number of games
+    # underway
+    #
+    def publish(self, snapshot, active):
+        self.latest = (snapshot, active)
+
+
+    ###########################################################################
+    # This stops serving
+    #
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
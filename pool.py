@@ -0,0 +1,36 @@
+###########################################################################
+# This object is a pool of player objects, for reuse from game to game.
+# The peuchre mainline keeps one pool per game slot, and each game the slot
+# runs takes its players from the pool: a player is created the first time
+# its seat is filled, and after that it's reset() for each new game, so a
+# player that builds large strategy tables in its __init__ only pays for
+# that once per process, rather than once per game.
+#
+# Players are pooled by class and name, and the seat names a game uses are
+# fixed (eg. p0t1), so each seat gets the same object back every game.  A
+# pool must only be used by one game at a time.
+
+class Pool:
+
+    ###########################################################################
+    # This initializes the object
+    #
+    def __init__(self):
+        # the pooled players, by (class, name)
+        self.players = {}
+
+
+    ###########################################################################
+    # This returns a player of the given class for a new game, with the
+    # given kwargs: a pooled one if we have it, reset for the game, and
+    # otherwise a new one, which is added to the pool
+    #
+    def take(self, cls, **kwargs):
+        key = (cls, kwargs.get('name'))
+        player = self.players.get(key)
+        if player is None:
+            player = cls(**kwargs)
+            self.players[key] = player
+        else:
+            player.reset(**kwargs)
+        return player
@@ -0,0 +1,123 @@
+###########################################################################
+# This is a sampling profiler for peuchre: a background thread wakes up
+# `rate` times a second, takes the current stack of every thread we're
+# profiling from sys._current_frames(), and counts each distinct stack.
+# When it's stopped, it writes the counts out in the collapsed stack
+# format that flame graph tools read (flamegraph.pl, speedscope, inferno):
+#
+#    run (game.py:119);playGame (game.py:233);parseMessage (...) 42
+#
+# one line per stack, root first, with the number of samples it was seen
+# in.  Only the sampler does any work, so the game threads run at full
+# speed between samples, unlike with cProfile, which hooks every call.
+# The samples are wall clock: a thread blocked reading from the server
+# shows up under recvAll(), which is where it's spending its time.
+
+import os
+import sys
+import time
+import threading
+
+from logging import warning as warn, log, debug, info, error, critical
+
+
+class Profiler(threading.Thread):
+
+    ###########################################################################
+    # This initializes the profiler: the file to write the stacks to, the
+    # number of samples a second, and a function that picks the threads to
+    # sample, given a Thread (by default, every thread but ours)
+    #
+    def __init__(self, filename, **kwargs):
+        threading.Thread.__init__(self, name="profiler", daemon=True)
+        self.filename = filename
+
+        self.rate = 100
+        if 'rate' in kwargs:
+            self.rate = kwargs['rate']
+        self.match = lambda thread: True
+        if 'match' in kwargs:
+            self.match = kwargs['match']
+
+        # the sample count of each stack, as a tuple of frame labels from
+        # the root, and the label of each code object we've seen
+        self.stacks = {}
+        self.labels = {}
+
+        # the number of times we've sampled, and the time we spent doing it
+        self.samples = 0
+        self.busy = 0
+        self.started = time.perf_counter()
+
+        self.stopping = threading.Event()
+
+
+    ###########################################################################
+    # This returns the label of a code object: its function name, with the
+    # file and first line, so each function is one frame of the graph
+    #
+    def label(self, code):
+        label = self.labels.get(code)
+        if label is None:
+            label = "%s (%s:%d)" % (code.co_name,
+                os.path.basename(code.co_filename), code.co_firstlineno)
+            self.labels[code] = label
+        return label
+
+
+    ###########################################################################
+    # This takes one sample of every thread we're profiling
+    #
+    def sample(self):
+        frames = sys._current_frames()
+        for thread in threading.enumerate():
+            if thread is self or not self.match(thread):
+                continue
+            frame = frames.get(thread.ident)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self.label(frame.f_code))
+                frame = frame.f_back
+            stack = tuple(reversed(stack))
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+        self.samples += 1
+
+
+    ###########################################################################
+    # The sampler thread: sample every 1/rate seconds until we're stopped,
+    # keeping track of the time the sampling itself takes
+    #
+    def run(self):
+        interval = 1 / self.rate
+        while not self.stopping.wait(interval):
+            start = time.perf_counter()
+            self.sample()
+            self.busy += time.perf_counter() - start
+
+
+    ###########################################################################
+    # This stops the sampler, writes out the stacks, and logs how much of
+    # the run the sampler took up
+    #
+    def stop(self):
+        self.stopping.set()
+        self.join()
+        self.write()
+
+        elapsed = time.perf_counter() - self.started
+        info("profile: %d samples of %d stacks written to %s, sampling "
+            "took %.2f%% of the run" % (self.samples, len(self.stacks),
+            self.filename, 100 * self.busy / max(elapsed, 1e-9)))
+
+
+    ###########################################################################
+    # This writes the stacks out in collapsed format, the most sampled
+    # first
+    #
+    def write(self):
+        with open(self.filename, "w") as f:
+            for (stack, count) in sorted(self.stacks.items(),
+                                         key=lambda item: -item[1]):
+                f.write("%s %d\n" % (";".join(stack), count))
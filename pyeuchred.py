@@ -0,0 +1,1119 @@
+###########################################################################
+# This is a Python stand-in for the euchred server: it implements the
+# subset of the euchred "-m" protocol that the peuchre client uses, so
+# that peuchre can be run, tested, and benchmarked on a box without the C
+# build of euchred.  It supports:
+#  - JOIN, answered with JOINACCEPT, JOINDENY, or DECLINE
+#  - START from the creator, once all 4 players have joined
+#  - STATE after every change, and DEAL once the cards are dealt
+#  - ORDEROFFER, CALLOFFER, DROPOFFER, DEFENDOFFER, and PLAYOFFER, along
+#    with the client replies and the matching DENY messages
+#  - TRICKOVER, HANDOVER, and GAMEOVER
+#
+# The options are fixed at: defend alone allowed, must go alone when the
+# dealer's partner orders, and screw the dealer.  Teams are assigned by
+# seat, alternating team 1 and team 2 as players join, and the first player
+# to join is the creator.
+#
+# A table normally shuffles its own deals, but it can be given a scripted
+# deal source instead: an iterable of (dealer, hands, hole) tuples, where
+# hands is the 5 cards for each seat and each card a (value, suit) tuple.
+# The table deals them in order, and ends the game early if they run out;
+# this is how recorded deals are replayed (see replay.py).
+#
+# A single Server object runs one selector loop in its own thread, and can
+# host any number of tables at once.  Tables can be reached two ways:
+#  - players in the same process can be handed one end of a socketpair
+#    attached straight to a table, with no ports involved at all
+#  - or the server can listen on one shared address (a TCP host and port, or
+#    "unix:/path" for a Unix domain socket), and route each JOIN to
+#    a table: a player name of the form "name@N" joins the table with game
+#    handle N (this is how peuchre's own players find their Game's table),
+#    and a plain name joins the first open table with a free seat, with a
+#    new table opened if there isn't one, so manual clients and external
+#    bots can play over the standard protocol
+#
+# Run on its own, this is a standalone multi-table server:
+#    python3 pyeuchred.py -p 1234
+#    python3 pyeuchred.py -s unix:/tmp/euchred.sock
+
+import os
+import socket
+import struct
+import random
+import select
+import selectors
+import threading
+
+from collections import deque
+from logging import warning as warn, log, debug, info, error, critical
+
+from euchreplayer import EuchrePlayer
+from encoder import sendFrames
+
+# the message IDs are shared with the client
+MSG = EuchrePlayer.messageId
+TAIL = struct.pack("!BB", MSG['TAIL1'], MSG['TAIL2'])
+
+# the hand states
+PREGAME = 0
+HOLE    = 1
+TRUMP   = 2
+DEFEND  = 3
+PLAY    = 4
+
+# the smallest and largest client frames we'll accept: the smallest real
+# message is a JOIN with an empty name, or a CLIENTQUIT, and nothing a
+# client sends comes close to the largest
+MINFRAME = 12
+MAXFRAME = 65536
+
+# the values of the cards in a euchre deck, and the jack
+VALUES = (9, 10, 11, 12, 13, 14)
+JACK = 11
+
+
+###########################################################################
+# This shuffles and deals a hand: it returns (dealer, hands, hole) in the
+# same form as a scripted deal
+#
+def shuffleDeal(rng, dealer):
+    deck = [ (v,s) for s in range(4) for v in VALUES ]
+    rng.shuffle(deck)
+    hands = [ deck[seat*5:seat*5+5] for seat in range(4) ]
+    return (dealer, hands, deck[20])
+
+
+###########################################################################
+# These are the message encoding helpers: each returns a complete frame,
+# including the leading size and the trailing tail bytes
+#
+
+# a message with no arguments, eg. DEAL or TRICKOVER
+def frameFlag(msg):
+    return struct.pack("!ii", 6, msg) + TAIL
+
+# a message with a single int argument, eg. the offer messages
+def frameInt(msg, value):
+    return struct.pack("!iii", 10, msg, value) + TAIL
+
+# a message with a string argument, eg. the DENY messages
+def frameString(msg, text):
+    text = text.encode()
+    return struct.pack("!iii", 10+len(text), msg, len(text)) + text + TAIL
+
+# the JOINACCEPT message
+def frameJoinAccept(gh, ph, team):
+    return struct.pack("!iiiii", 18, MSG['JOINACCEPT'], gh, ph, team) + TAIL
+
+# a string component of a message
+def packString(text):
+    text = text.encode()
+    return struct.pack("!i", len(text)) + text
+
+
+###########################################################################
+# This splits a JOIN name into the player name and the table tag, if it
+# has one: "p0t1@12" is player "p0t1" at table 12
+#
+def splitName(name):
+    (base, sep, tag) = name.rpartition("@")
+    if sep and tag.isascii() and tag.isdigit():
+        return (base, int(tag))
+    return (name, None)
+
+
+###########################################################################
+# This returns the player name from a JOIN of the given name length, or
+# None if the length doesn't fit the frame: a name that isn't valid UTF-8
+# raises a ValueError, like any other malformed message
+#
+def joinName(data, namelen):
+    if namelen < 0 or 12 + namelen + len(TAIL) > len(data):
+        return None
+    return bytes(data[12:12+namelen]).decode()
+
+
+###########################################################################
+# This returns the suit of the same colour as the given suit
+#
+def suitComp(suit):
+    return 3 - suit
+
+
+class Conn:
+
+    ###########################################################################
+    # This holds a client connection: the socket, the buffered input and
+    # output, and the table and seat the client is joined to
+    #
+    def __init__(self, sock, table):
+        self.sock = sock
+        self.table = table
+        self.seat = -1
+        self.name = ""
+        self.inbuf = bytearray()
+        self.outbuf = []
+        self.writing = False
+
+
+class Table:
+
+    ###########################################################################
+    # This initializes a table: the seats are empty and no game is underway
+    #
+    def __init__(self, server, **kwargs):
+        self.server = server
+        self.port = 0
+
+        # the game handle we hand out in JOINACCEPT
+        self.gamehandle = 1
+        if 'gamehandle' in kwargs:
+            self.gamehandle = kwargs['gamehandle']
+
+        # whether players without a table tag can be seated here, and
+        # whether the table closes itself once everyone has left (tables
+        # opened for untagged players do, tables registered by a Game are
+        # closed by the Game)
+        self.open = False
+        if 'open' in kwargs:
+            self.open = kwargs['open']
+        self.transient = False
+        if 'transient' in kwargs:
+            self.transient = kwargs['transient']
+
+        # the random number generator used to shuffle, and the scripted
+        # deals, if we're given them
+        self.rng = random.Random()
+        self.deals = None
+        if 'deals' in kwargs and kwargs['deals'] is not None:
+            self.deals = iter(kwargs['deals'])
+        if 'seed' in kwargs and kwargs['seed'] is not None:
+            self.rng.seed(kwargs['seed'])
+
+        # the game options: defend alone, alone on order, screw the dealer
+        self.defend = 1
+        self.aloneonorder = 1
+        self.screw = 1
+
+        # the connections in each seat, and the seat of the creator
+        self.seats = [None]*4
+        self.creator = -1
+
+        # game state
+        self.ingame = 0
+        self.over = False
+        self.score = [0,0]
+        self.dealer = -1
+        self.resetHand()
+
+
+    ###########################################################################
+    # This clears all the per-hand state
+    #
+    def resetHand(self):
+        self.hstate = PREGAME
+        self.hands = [[],[],[],[]]
+        self.hole = None
+        self.holein = 0
+        self.trump = -1
+        self.maker = -1
+        self.orderer = -1
+        self.alone = False
+        self.defender = -1
+        self.passed = [0,0,0,0]
+        self.offer = None
+        self.turn = -1
+        self.leader = -1
+        self.played = [None]*4
+        self.tricks = [0,0]
+
+
+    ###########################################################################
+    # This asks the server to close this table: it's safe to call from any
+    # thread, and is named to match subprocess.Popen.kill(), so a Game can
+    # treat a table like a server process
+    #
+    def kill(self):
+        self.server.removeTable(self)
+
+
+    ###########################################################################
+    # Seat and team helpers: seats alternate team 1 and team 2, and a seat
+    # is out of play if its partner is going (or defending) alone
+    #
+    @staticmethod
+    def team(seat):
+        return seat % 2 + 1
+
+    def sittingOut(self, seat):
+        partner = (seat + 2) % 4
+        if self.alone and partner == self.maker:
+            return True
+        if self.defender >= 0 and partner == self.defender:
+            return True
+        return False
+
+    def nextSeat(self, seat):
+        seat = (seat + 1) % 4
+        while self.sittingOut(seat):
+            seat = (seat + 1) % 4
+        return seat
+
+    def activeSeats(self):
+        return 4 - sum(1 for s in range(4) if self.sittingOut(s))
+
+
+    ###########################################################################
+    # This returns the effective suit of a card, ie. the left is trump
+    #
+    def suitOf(self, card):
+        (value, suit) = card
+        if value == JACK and self.trump >= 0 and suit == suitComp(self.trump):
+            return self.trump
+        return suit
+
+
+    ###########################################################################
+    # This returns the rank of a card within the current trick: the right
+    # and left beat all other trump, trump beats the lead suit, and anything
+    # else can't win
+    #
+    def rank(self, card, leadsuit):
+        (value, suit) = card
+        if value == JACK and suit == self.trump:
+            return 100
+        if value == JACK and suit == suitComp(self.trump):
+            return 99
+        if suit == self.trump:
+            return 50 + value
+        if suit == leadsuit:
+            return value
+        return 0
+
+
+    ###########################################################################
+    # Message output: we queue frames on the connection and the server
+    # flushes them once we're done processing the current input
+    #
+    def send(self, seat, *data):
+        conn = self.seats[seat]
+        if conn is not None:
+            self.server.queue(conn, *data)
+
+    def broadcast(self, data):
+        for seat in range(4):
+            self.send(seat, data)
+
+    def offerTo(self, offer, seat):
+        self.offer = offer
+        self.turn = seat
+        self.broadcastState()
+        self.broadcast(frameInt(MSG[offer], seat))
+
+
+    ###########################################################################
+    # This builds and sends a STATE message to each joined player: the
+    # player and game data are the same for everyone, so we build them once,
+    # and only the trailing cards differ per player: each player's message
+    # is queued as separate buffers, so the common part is never copied
+    #
+    def broadcastState(self):
+        common = bytearray(struct.pack("!i", MSG['STATE']))
+
+        # the player data
+        for seat in range(4):
+            conn = self.seats[seat]
+            if conn is None or conn.seat < 0:
+                common += struct.pack("!i", 0)
+                continue
+
+            card = self.played[seat]
+            common += struct.pack("!ii", 2, seat)
+            common += packString(conn.name)
+            common += packString("peuchre")
+            common += packString("python")
+            common += packString("python")
+            common += packString("")
+            common += struct.pack("!18i",
+                self.team(seat),
+                0 if self.sittingOut(seat) else len(self.hands[seat]),
+                1 if seat == self.creator else 0,
+                1 if seat == self.orderer else 0,
+                1 if seat == self.dealer else 0,
+                1 if self.alone and seat == self.maker else 0,
+                1 if seat == self.defender else 0,
+                1 if seat == self.leader else 0,
+                1 if seat == self.maker else 0,
+                1 if self.offer == 'PLAYOFFER' and seat == self.turn else 0,
+                1 if self.offer == 'ORDEROFFER' and seat == self.turn else 0,
+                1 if self.offer == 'DROPOFFER' and seat == self.turn else 0,
+                1 if self.offer == 'CALLOFFER' and seat == self.turn else 0,
+                1 if self.offer == 'DEFENDOFFER' and seat == self.turn else 0,
+                1 if card is not None else 0,
+                card[0] if card is not None else 0,
+                card[1] if card is not None else 0,
+                self.passed[seat])
+
+            # the card is only packed if there's a card in play, so if there
+            # isn't, we trim the two placeholder ints back off
+            if card is None:
+                common[-12:-4] = b""
+
+        # the game data
+        common += struct.pack("!iiii", self.ingame, self.hstate, 0, self.holein)
+        if self.holein:
+            common += struct.pack("!ii", self.hole[0], self.hole[1])
+        if self.trump >= 0:
+            common += struct.pack("!ii", 1, self.trump)
+        else:
+            common += struct.pack("!i", 0)
+        common += struct.pack("!7i", self.tricks[0], self.tricks[1],
+            self.score[0], self.score[1],
+            self.defend, self.aloneonorder, self.screw)
+
+        # and then each player's own cards
+        common = bytes(common)
+        for seat in range(4):
+            conn = self.seats[seat]
+            if conn is None or conn.seat < 0:
+                continue
+            hand = self.hands[seat]
+            cards = struct.pack("!i", len(hand))
+            for card in hand:
+                cards += struct.pack("!ii", card[0], card[1])
+            size = len(common) + len(cards) + len(TAIL)
+            self.send(seat, struct.pack("!i", size), common, cards, TAIL)
+
+
+    ###########################################################################
+    # This handles a complete message from a connection
+    #
+    def handle(self, conn, data):
+        # check the tail before anything else
+        if len(data) < 6 or data[-2:] != TAIL:
+            error("euchred: bad tail from %s" % (conn.name))
+            return False
+
+        (msg,) = struct.unpack_from("!i", data)
+
+        # a join is the only thing we accept before a player is seated
+        if msg == MSG['JOIN']:
+            return self.join(conn, data)
+        if conn.seat < 0:
+            return False
+
+        # everything else carries the game and player handle
+        (gh, ph) = struct.unpack_from("!ii", data, 4)
+        if gh != self.gamehandle or ph != conn.seat:
+            error("euchred: bad handles from %s" % (conn.name))
+            return False
+
+        if msg == MSG['START']:
+            self.start(ph)
+        elif msg in (MSG['ORDER'], MSG['ORDERALONE'], MSG['ORDERPASS']):
+            self.order(ph, msg)
+        elif msg in (MSG['CALL'], MSG['CALLALONE']):
+            (suit,) = struct.unpack_from("!i", data, 12)
+            self.call(ph, msg, suit)
+        elif msg == MSG['CALLPASS']:
+            self.call(ph, msg, -1)
+        elif msg == MSG['DROP']:
+            self.drop(ph, struct.unpack_from("!ii", data, 12))
+        elif msg in (MSG['DEFEND'], MSG['DEFENDPASS']):
+            self.defendAlone(ph, msg)
+        elif msg == MSG['PLAY']:
+            self.play(ph, struct.unpack_from("!ii", data, 12))
+        elif msg == MSG['CLIENTQUIT']:
+            return False
+        else:
+            debug("euchred: ignoring message %d from %s" % (msg, conn.name))
+
+        return True
+
+
+    ###########################################################################
+    # This handles a JOIN: we seat the player in the first free seat
+    #
+    def join(self, conn, data):
+        (msg, protocol, namelen) = struct.unpack_from("!iii", data)
+        name = joinName(data, namelen)
+        if name is None:
+            error("euchred: bad name length from %s" % (conn.name))
+            return False
+        (name, tag) = splitName(name)
+
+        if protocol != 1:
+            self.server.queue(conn,
+                frameString(MSG['JOINDENY'], "unsupported protocol"))
+            return True
+        if conn.seat >= 0 or self.ingame:
+            self.server.queue(conn,
+                frameString(MSG['JOINDENY'], "game already underway"))
+            return True
+        if None not in self.seats:
+            self.server.queue(conn, frameString(MSG['DECLINE'], "game is full"))
+            return True
+
+        seat = self.seats.index(None)
+        self.seats[seat] = conn
+        conn.seat = seat
+        conn.name = name
+        if self.creator < 0:
+            self.creator = seat
+
+        self.send(seat, frameJoinAccept(self.gamehandle, seat, self.team(seat)))
+        self.broadcastState()
+        return True
+
+
+    ###########################################################################
+    # This handles a START from the creator: we start the game and deal the
+    # first hand
+    #
+    def start(self, seat):
+        if seat != self.creator:
+            self.send(seat, frameString(MSG['STARTDENY'], "not the creator"))
+            return
+        if None in self.seats:
+            self.send(seat, frameString(MSG['STARTDENY'], "need 4 players"))
+            return
+        if self.ingame:
+            self.send(seat, frameString(MSG['STARTDENY'], "already started"))
+            return
+
+        self.ingame = 1
+        self.score = [0,0]
+        self.dealer = self.rng.randrange(4)
+        self.deal()
+
+
+    ###########################################################################
+    # This deals a new hand, with the deal passing to the left, or the next
+    # scripted deal if we have them
+    #
+    def deal(self):
+        self.resetHand()
+        if self.deals is not None:
+            deal = next(self.deals, None)
+            if deal is None:
+                self.gameOver()
+                return
+        else:
+            deal = shuffleDeal(self.rng, (self.dealer + 1) % 4)
+        (self.dealer, hands, self.hole) = deal
+        self.hands = [ list(hand) for hand in hands ]
+        self.holein = 1
+        self.hstate = HOLE
+
+        self.broadcastState()
+        self.broadcast(frameFlag(MSG['DEAL']))
+        self.offerTo('ORDEROFFER', (self.dealer + 1) % 4)
+
+
+    ###########################################################################
+    # This handles the replies to an order offer
+    #
+    def order(self, seat, msg):
+        if self.hstate != HOLE or self.offer != 'ORDEROFFER' \
+           or seat != self.turn:
+            self.send(seat, frameString(MSG['ORDERDENY'], "not your turn"))
+            return
+
+        # a pass moves the offer along, and once the dealer passes, we move
+        # on to calling trump
+        if msg == MSG['ORDERPASS']:
+            self.passed[seat] = 1
+            if seat == self.dealer:
+                self.passed = [0,0,0,0]
+                self.hstate = TRUMP
+                self.holein = 0
+                self.offerTo('CALLOFFER', (self.dealer + 1) % 4)
+            else:
+                self.offerTo('ORDEROFFER', (seat + 1) % 4)
+            return
+
+        # otherwise the hole card is ordered up
+        self.orderer = seat
+        self.maker = seat
+        self.trump = self.hole[1]
+        self.alone = msg == MSG['ORDERALONE'] or \
+            (self.aloneonorder and seat == (self.dealer + 2) % 4)
+
+        # the dealer picks up the hole card and drops one, unless the dealer
+        # is sitting out
+        if self.sittingOut(self.dealer):
+            self.holein = 0
+            self.trumpSet()
+        else:
+            self.hands[self.dealer].append(self.hole)
+            self.offerTo('DROPOFFER', self.dealer)
+
+
+    ###########################################################################
+    # This handles the replies to a call offer
+    #
+    def call(self, seat, msg, suit):
+        if self.hstate != TRUMP or self.offer != 'CALLOFFER' \
+           or seat != self.turn:
+            self.send(seat, frameString(MSG['CALLDENY'], "not your turn"))
+            return
+
+        if msg == MSG['CALLPASS']:
+            if seat == self.dealer and self.screw:
+                self.send(seat,
+                    frameString(MSG['CALLDENY'], "dealer must call"))
+                return
+            self.passed[seat] = 1
+            if seat == self.dealer:
+                self.deal()
+            else:
+                self.offerTo('CALLOFFER', (seat + 1) % 4)
+            return
+
+        if suit not in (0,1,2,3) or suit == self.hole[1]:
+            self.send(seat, frameString(MSG['CALLDENY'], "can't call that"))
+            return
+
+        self.maker = seat
+        self.trump = suit
+        self.alone = msg == MSG['CALLALONE']
+        self.trumpSet()
+
+
+    ###########################################################################
+    # This handles the dealer's drop
+    #
+    def drop(self, seat, card):
+        if self.offer != 'DROPOFFER' or seat != self.turn \
+           or card not in self.hands[seat]:
+            self.send(seat, frameString(MSG['DROPDENY'], "can't drop that"))
+            return
+
+        self.hands[seat].remove(card)
+        self.holein = 0
+        self.trumpSet()
+
+
+    ###########################################################################
+    # Once trump is set, either the defenders get a chance to defend alone,
+    # or we go straight to play
+    #
+    def trumpSet(self):
+        if self.alone and self.defend:
+            self.hstate = DEFEND
+            self.offerTo('DEFENDOFFER', self.defenders()[0])
+        else:
+            self.startPlay()
+
+    def defenders(self):
+        first = (self.maker + 1) % 4
+        return [ first, (first + 2) % 4 ]
+
+
+    ###########################################################################
+    # This handles the replies to a defend offer
+    #
+    def defendAlone(self, seat, msg):
+        if self.offer != 'DEFENDOFFER' or seat != self.turn:
+            self.send(seat, frameString(MSG['DEFENDDENY'], "not your turn"))
+            return
+
+        if msg == MSG['DEFEND']:
+            self.defender = seat
+            self.startPlay()
+        elif seat == self.defenders()[0]:
+            self.offerTo('DEFENDOFFER', self.defenders()[1])
+        else:
+            self.startPlay()
+
+
+    ###########################################################################
+    # This starts the play of the hand, with the player left of the dealer
+    # leading
+    #
+    def startPlay(self):
+        self.hstate = PLAY
+        self.leader = self.nextSeat(self.dealer)
+        self.offerTo('PLAYOFFER', self.leader)
+
+
+    ###########################################################################
+    # This handles a card being played
+    #
+    def play(self, seat, card):
+        if self.hstate != PLAY or self.offer != 'PLAYOFFER' \
+           or seat != self.turn or card not in self.hands[seat]:
+            self.send(seat, frameString(MSG['PLAYDENY'], "can't play that"))
+            return
+
+        # if we're following, the card must follow suit if we can
+        if seat != self.leader:
+            leadsuit = self.suitOf(self.played[self.leader])
+            if self.suitOf(card) != leadsuit:
+                for held in self.hands[seat]:
+                    if self.suitOf(held) == leadsuit:
+                        self.send(seat,
+                            frameString(MSG['PLAYDENY'], "must follow suit"))
+                        return
+
+        self.hands[seat].remove(card)
+        self.played[seat] = card
+
+        # if not everyone has played, offer the play to the next player
+        if sum(1 for c in self.played if c is not None) < self.activeSeats():
+            self.offerTo('PLAYOFFER', self.nextSeat(seat))
+            return
+
+        # otherwise the trick is over: find the winner
+        leadsuit = self.suitOf(self.played[self.leader])
+        winner = self.leader
+        for s in range(4):
+            if self.played[s] is not None and \
+               self.rank(self.played[s], leadsuit) > \
+               self.rank(self.played[winner], leadsuit):
+                winner = s
+        self.tricks[self.team(winner) - 1] += 1
+        self.played = [None]*4
+        self.offer = None
+        self.turn = -1
+
+        # if that was the last trick, the hand is over
+        if sum(self.tricks) == 5:
+            self.handOver()
+            return
+
+        self.leader = winner
+        self.broadcastState()
+        self.broadcast(frameFlag(MSG['TRICKOVER']))
+        self.offerTo('PLAYOFFER', winner)
+
+
+    ###########################################################################
+    # This scores the hand, and either deals the next one or ends the game
+    #
+    def handOver(self):
+        maker = self.team(self.maker) - 1
+        taken = self.tricks[maker]
+        if taken == 5:
+            points = 4 if self.alone else 2
+            self.score[maker] += points
+        elif taken >= 3:
+            self.score[maker] += 1
+        else:
+            points = 4 if self.defender >= 0 else 2
+            self.score[1 - maker] += points
+
+        self.broadcastState()
+        self.broadcast(frameFlag(MSG['TRICKOVER']))
+        self.broadcast(frameFlag(MSG['HANDOVER']))
+
+        if max(self.score) >= 10:
+            self.gameOver()
+        else:
+            self.deal()
+
+
+    ###########################################################################
+    # This ends the game
+    #
+    def gameOver(self):
+        self.ingame = 0
+        self.over = True
+        self.broadcast(frameFlag(MSG['GAMEOVER']))
+
+
+    ###########################################################################
+    # This handles a player leaving: if a game was underway, it can't
+    # continue, so we end it for everyone
+    #
+    def leave(self, conn):
+        if conn.seat >= 0 and self.seats[conn.seat] is conn:
+            self.seats[conn.seat] = None
+            if self.ingame:
+                self.ingame = 0
+                self.over = True
+                self.broadcast(frameFlag(MSG['GAMEOVER']))
+            elif not self.over:
+                self.broadcastState()
+        conn.seat = -1
+
+        # a transient table goes away once its last player has left
+        if self.transient and self.seats == [None]*4:
+            self.server.closeTable(self)
+
+
+class Server(threading.Thread):
+
+    # the shared server instance, created on first use
+    instance = None
+    instanceLock = threading.Lock()
+
+
+    ###########################################################################
+    # This returns the shared server, starting it if need be
+    #
+    @classmethod
+    def shared(cls):
+        with cls.instanceLock:
+            if cls.instance is None:
+                cls.instance = cls()
+                cls.instance.start()
+            return cls.instance
+
+
+    ###########################################################################
+    # A forked child (eg. a benchmark worker) doesn't get our thread, so it
+    # needs to start its own shared server
+    #
+    @classmethod
+    def forget(cls):
+        cls.instance = None
+        cls.instanceLock = threading.Lock()
+
+
+    ###########################################################################
+    # This initializes the server: the selector, and a socketpair used to
+    # wake the selector loop up when another thread hands us work
+    #
+    def __init__(self):
+        threading.Thread.__init__(self, name="euchred", daemon=True)
+        self.selector = selectors.DefaultSelector()
+        self.commands = deque()
+        self.wakeR, self.wakeW = socket.socketpair()
+        self.wakeR.setblocking(False)
+        self.wakeW.setblocking(False)
+        self.selector.register(self.wakeR, selectors.EVENT_READ, None)
+        self.dirty = []
+        self.gamehandle = 0
+        self.lock = threading.Lock()
+
+        # the tables by game handle, and the shared listening socket and its
+        # (host, port) address, if we've been asked to listen on one: for a
+        # Unix domain socket the host is "unix:/path" and the port is 0
+        self.tables = {}
+        self.listener = None
+        self.address = None
+
+
+    ###########################################################################
+    # This hands a callable to the selector thread to run
+    #
+    def command(self, fn, *args):
+        self.commands.append((fn, args))
+        try:
+            self.wakeW.send(b"x")
+        except BlockingIOError:
+            pass
+
+
+    ###########################################################################
+    # This creates a new table and adds it to our table list
+    #
+    def newTable(self, **kwargs):
+        with self.lock:
+            self.gamehandle += 1
+            table = Table(self, gamehandle=self.gamehandle, **kwargs)
+            self.tables[table.gamehandle] = table
+        return table
+
+
+    ###########################################################################
+    # This attaches a connection straight to a table over a socketpair, and
+    # returns the client's end, for a player in this process to use as its
+    # server socket
+    #
+    def attach(self, table):
+        (ours, theirs) = socket.socketpair()
+        ours.setblocking(False)
+        conn = Conn(ours, table)
+        self.command(self.selector.register, ours, selectors.EVENT_READ, conn)
+        return theirs
+
+
+    ###########################################################################
+    # This starts listening on the shared address: players connecting here
+    # are routed to a table by their JOIN; it returns the port we're
+    # listening on.  A host of "unix:/path" listens on a Unix domain socket
+    # instead, replacing any stale socket file left at that path.
+    #
+    def listen(self, host="127.0.0.1", port=1234):
+        if host.startswith("unix:"):
+            path = host[5:]
+            if os.path.exists(path):
+                os.unlink(path)
+            listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            listener.bind(path)
+            port = 0
+        else:
+            listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            listener.bind((host, port))
+            port = listener.getsockname()[1]
+        listener.listen(1024)
+        listener.setblocking(False)
+        self.listener = listener
+        self.address = (host, port)
+
+        self.command(self.selector.register, listener,
+            selectors.EVENT_READ, self)
+        return self.address[1]
+
+
+    ###########################################################################
+    # This registers a table on the shared address: players join it by
+    # tagging their name with the table's game handle; if open is set,
+    # untagged players can take any free seats too; any other kwargs are
+    # passed on to the Table
+    #
+    def registerTable(self, open=False, **kwargs):
+        table = self.newTable(open=open, **kwargs)
+        table.port = self.address[1]
+        return table
+
+
+    ###########################################################################
+    # This asks the selector thread to close a table and its connections
+    #
+    def removeTable(self, table):
+        self.command(self.closeTable, table)
+
+    def closeTable(self, table):
+        with self.lock:
+            self.tables.pop(table.gamehandle, None)
+        for conn in table.seats:
+            if conn is not None:
+                self.closeConn(conn)
+
+
+    ###########################################################################
+    # Output handling: frames are queued on the connection, and flushed
+    # after each batch of input, so several frames go out in one sendmsg();
+    # a broadcast frame is queued on each connection without being copied
+    #
+    def queue(self, conn, *data):
+        if not conn.outbuf:
+            self.dirty.append(conn)
+        conn.outbuf.extend(data)
+
+    def flush(self):
+        for conn in self.dirty:
+            self.write(conn)
+        self.dirty = []
+
+    def write(self, conn):
+        if conn.sock is None:
+            return
+        try:
+            conn.outbuf = sendFrames(conn.sock, conn.outbuf)
+        except BlockingIOError:
+            pass
+        except OSError:
+            self.closeConn(conn)
+            return
+
+        # if there's anything left, wait for the socket to be writable
+        want = selectors.EVENT_READ
+        if conn.outbuf:
+            want |= selectors.EVENT_WRITE
+        if conn.writing != bool(conn.outbuf):
+            conn.writing = bool(conn.outbuf)
+            self.selector.modify(conn.sock, want, conn)
+
+
+    ###########################################################################
+    # Input handling: we read what's available and handle each complete
+    # frame in turn
+    #
+    def read(self, conn):
+        try:
+            data = conn.sock.recv(65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self.closeConn(conn)
+            return
+
+        buf = conn.inbuf
+        buf += data
+        while len(buf) >= 4:
+            (size,) = struct.unpack_from("!i", buf)
+            if size < MINFRAME or size > MAXFRAME:
+                error("euchred: bad frame size %d from %s" % (size, conn.name))
+                self.closeConn(conn)
+                return
+            if len(buf) < 4 + size:
+                break
+            frame = buf[4:4+size]
+            del buf[:4+size]
+            try:
+                if conn.table is None:
+                    ok = self.route(conn, frame)
+                else:
+                    ok = conn.table.handle(conn, frame)
+            except (struct.error, ValueError):
+                error("euchred: malformed message from %s" % (conn.name))
+                ok = False
+            if not ok:
+                self.closeConn(conn)
+                return
+
+
+    ###########################################################################
+    # This accepts a new connection on the shared listening socket: it's
+    # routed to a table when its JOIN arrives
+    #
+    def accept(self):
+        try:
+            (sock, addr) = self.listener.accept()
+        except (BlockingIOError, OSError):
+            return
+        sock.setblocking(False)
+        if sock.family != socket.AF_UNIX:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = Conn(sock, None)
+        self.selector.register(sock, selectors.EVENT_READ, conn)
+
+
+    ###########################################################################
+    # This routes a connection on the shared listening socket to a table,
+    # based on its JOIN: a tagged name goes to that table, and an untagged
+    # one to the first open table with a free seat, or a brand new table
+    #
+    def route(self, conn, data):
+        (msg, protocol, namelen) = struct.unpack_from("!iii", data)
+        if msg != MSG['JOIN']:
+            return False
+        name = joinName(data, namelen)
+        if name is None:
+            error("euchred: bad name length from %s" % (conn.name))
+            return False
+        (name, tag) = splitName(name)
+
+        # game threads add tables as we go, so look under the lock
+        table = None
+        if tag is not None:
+            with self.lock:
+                table = self.tables.get(tag)
+            if table is None:
+                self.queue(conn, frameString(MSG['DECLINE'], "no such table"))
+                return True
+        else:
+            with self.lock:
+                for t in self.tables.values():
+                    if t.open and not t.ingame and not t.over \
+                       and None in t.seats:
+                        table = t
+                        break
+            if table is None:
+                table = self.newTable(open=True, transient=True)
+                table.port = self.address[1]
+
+        conn.table = table
+        return table.handle(conn, data)
+
+
+    ###########################################################################
+    # This closes a connection, and tells its table the player has left
+    #
+    def closeConn(self, conn):
+        if conn.sock is None:
+            return
+        if conn.table is not None:
+            conn.table.leave(conn)
+        self.selector.unregister(conn.sock)
+        conn.sock.close()
+        conn.sock = None
+
+
+    ###########################################################################
+    # This is the selector loop: anything that goes wrong handling one
+    # connection closes that connection, rather than stopping the loop and
+    # with it every table we host
+    #
+    def run(self):
+        while True:
+            for (key, mask) in self.selector.select():
+                try:
+                    self.dispatch(key.data, mask)
+                except Exception:
+                    error("euchred: error handling %s" % (key.fileobj),
+                        exc_info=True)
+                    if isinstance(key.data, Conn):
+                        try:
+                            self.closeConn(key.data)
+                        except Exception:
+                            pass
+            self.flush()
+
+
+    ###########################################################################
+    # This handles one ready socket from the selector
+    #
+    def dispatch(self, data, mask):
+        # a wakeup: drain the socket and run the queued commands
+        if data is None:
+            try:
+                self.wakeR.recv(4096)
+            except BlockingIOError:
+                pass
+            while self.commands:
+                (fn, args) = self.commands.popleft()
+                try:
+                    fn(*args)
+                except Exception:
+                    error("euchred: error running %s" % (fn.__name__),
+                        exc_info=True)
+
+        # the shared listening socket: accept the connection
+        elif data is self:
+            self.accept()
+
+        # a client connection
+        else:
+            if mask & selectors.EVENT_WRITE:
+                self.write(data)
+            if mask & selectors.EVENT_READ and data.sock is not None:
+                self.read(data)
+
+
+# make sure forked children start their own server
+os.register_at_fork(after_in_child=Server.forget)
+
+
+###########################################################################
+# Run on its own, we're a standalone multi-table server
+#
+if __name__ == "__main__":
+    import logging
+    from optparse import OptionParser
+
+    parser = OptionParser()
+    parser.add_option("-s", "--server",
+                      dest="server",
+                      default="127.0.0.1",
+                      help="address to listen on, or unix:/path")
+    parser.add_option("-p", "--port",
+                      type="int",
+                      dest="port",
+                      default=1234,
+                      help="port to listen on")
+    (options, args) = parser.parse_args()
+
+    logging.basicConfig(
+        format="%(asctime)s :: %(message)s",
+        datefmt='%Y-%m-%d %H:%M:%S',
+        level=logging.INFO)
+
+    server = Server()
+    port = server.listen(options.server, options.port)
+    if options.server.startswith("unix:"):
+        info("euchred: hosting tables on %s" % (options.server))
+    else:
+        info("euchred: hosting tables on %s:%d" % (options.server, port))
+    try:
+        server.run()
+    except KeyboardInterrupt:
+        pass
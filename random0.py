@@ -20,14 +20,20 @@
 #  - follows randomly
 
 
-import random
 
 from logging import warning as warn, log, debug, info, error, critical
 from card import Card
-from euchreplayer import EuchrePlayer
+from euchreplayer import EuchrePlayer, Lazy
 
 class Player(EuchrePlayer):
 
+    # our tunable parameters: the chance of ordering the hole card (see
+    # decideOrderPass()), and of calling a suit when not the dealer
+    params = {
+        'orderRate' : 0.15219,
+        'callRate'  : 0.25,
+    }
+
     ###########################################################################
     #
     def __init__(self, **kwargs):
@@ -50,33 +56,34 @@ class Player(EuchrePlayer):
     # I've never tested this with aloneonorder false, but it should still work.
     #
     def decideOrderPass(self):
-        # randomly choose to order with 15.219% probability
+        # randomly choose to order with orderRate probability (15.219% by
+        # default)
         op = "ORDERPASS"
-        if random.random() < 0.15219:
+        if self.rng.random() < self.orderRate:
             op = "ORDER"
 
         # if aloneonorder is true, and we're the dealer's partner, we never
         # order, since it will force a go alone
-        if self.state['aloneonorder'] == 1:
-            if self.team == self.state[self.state['dealer']]['team']:
+        if self.state.aloneonorder == 1:
+            if self.team == self.state.seats[self.state.dealer].team:
                 op = "ORDERPASS"
             # to make up for the imbalance caused by the dealer's partner
             # never ordering, the dealer will order with twice the probability
             # of the dealer-opposing team members: thus there is the same
             # probability that the dealer's team will order as the non-dealer's
             # team, it's just that the ordering is only ever done by the dealer
-            if self.playerhandle == self.state['dealer']:
+            if self.playerhandle == self.state.dealer:
                 op = "ORDERPASS"
-                if random.random() < (0.15219*2):
+                if self.rng.random() < (self.orderRate*2):
                     op = "ORDER"
         
         info("")
-        info(self.id+"cards: " + self.printHand(self.hand))
+        self.log.info("cards: %s", Lazy(self.printHand, self.hand))
         if op == "ORDER":
-            info(self.id+"I will order " + self.state['hole']
-                + " to " + self.state[ self.state['dealer'] ]['name'] )
+            self.log.info("I will order %s to %s",
+                self.state.hole, self.state.seats[ self.state.dealer ].name)
         else:
-            info(self.id+"I will pass on ordering " + self.state['hole'])
+            self.log.info("I will pass on ordering %s", self.state.hole)
 
         return self.messageId[op]
 
@@ -95,23 +102,25 @@ class Player(EuchrePlayer):
         op = "CALL"
         suit = None
 
-        # if we're not the dealer, call with 25% chance
-        if self.state['dealer'] != self.playerhandle:
-            op = random.choice(["CALL","CALLPASS","CALLPASS","CALLPASS"])
+        # if we're not the dealer, call with callRate chance (25% by default)
+        if self.state.dealer != self.playerhandle:
+            op = "CALLPASS"
+            if self.rng.random() < self.callRate:
+                op = "CALL"
         
         info("")
-        info(self.id+"cards: " + self.printHand(self.hand))
+        self.log.info("cards: %s", Lazy(self.printHand, self.hand))
 
         # if we're going to call, get a list of all the suits, remove the
         # suit of the hole card (since it's been declined) and randomly
         # choose amongst the remainder
         if op == "CALL":
             suits = Card.suits()
-            suits.remove(self.state['hole'].suit)
-            suit = random.choice(suits)
-            info(self.id+"I will call " + Card.suitName(suit))
+            suits.remove(self.state.hole.suit)
+            suit = self.rng.choice(suits)
+            self.log.info("I will call %s", Lazy(Card.suitName, suit))
         else:
-            info(self.id+"I will pass on calling")
+            self.log.info("I will pass on calling")
 
         # returning this dict seems to be the easiest way to return multiple
         # values out a function in python
@@ -126,8 +135,8 @@ class Player(EuchrePlayer):
     def decideDrop(self, hole):
         # log our intent
         info("")
-        info(self.id+"cards: " + self.printHand(self.hand))
-        info(self.id+"dropping ordered card: " + hole)
+        self.log.info("cards: %s", Lazy(self.printHand, self.hand))
+        self.log.info("dropping ordered card: %s", hole)
         info("")
 
         return hole
@@ -147,13 +156,13 @@ class Player(EuchrePlayer):
     #
     def decidePlayLead(self):
         # choose a random card from our hand to lead
-        (card,) = random.sample(self.hand,1)
+        (card,) = self.rng.sample(self.hand,1)
 
         # log our intent
         info("")
-        info(self.id+"cards: " + self.printHand(self.hand))
-        info(self.id+"leading with " + card
-            + " (" + self.printHand(self.hand) + ")")
+        self.log.info("cards: %s", Lazy(self.printHand, self.hand))
+        self.log.info("leading with %s (%s)",
+            card, Lazy(self.printHand, self.hand))
 
         return card
 
@@ -166,12 +175,12 @@ class Player(EuchrePlayer):
     def decidePlayFollow(self):
         # choose a random card from the set of cards that we can follow with
         info("")
-        info(self.id+"cards: " + self.printHand(self.hand))
+        self.log.info("cards: %s", Lazy(self.printHand, self.hand))
         cards = self.followCards()
-        (card,) = random.sample(cards,1)
+        (card,) = self.rng.sample(cards,1)
 
         # log our intent
-        info(self.id+"following with " + card
-            + " (" + self.printHand(self.hand) + ")")
+        self.log.info("following with %s (%s)",
+            card, Lazy(self.printHand, self.hand))
 
         return card
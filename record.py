@@ -10,6 +10,9 @@
 #  - number of tricks
 #  - % of total possible calling hands
 #  - some time stamps to compute hands/s
+#  - the game and hand counts sampled every second for the last hour, and
+#    every minute for the last week, to compute windowed rates
+#  - latency histograms of each team module's messages and decisions
 
 import os
 import time
@@ -17,7 +20,8 @@ import sys
 import curses
 
 from card import Card
-from collections import namedtuple
+from collections import namedtuple, deque
+from latency import Histogram, PERCENTILES, kindOrder
 
 class Record: 
 
@@ -28,14 +32,16 @@ class Record:
         # records the time of the first submitted hand, in seconds
         self.start = time.time()
 
-        # track total number of games, hands, and euchres
+        # track total number of games, hands, and euchres, and the games
+        # that hit the server timeout
         self.counts = namedtuple('Counts',
-            ['games','hands','orders','calls','euchres'])
+            ['games','hands','orders','calls','euchres','timeouts'])
         self.counts.games = 0
         self.counts.hands = 0
         self.counts.orders = 0
         self.counts.calls = 0
         self.counts.euchres = 0
+        self.counts.timeouts = 0
 
         # a dict to track makers
         self.makers = namedtuple('Makers',
@@ -84,9 +90,28 @@ class Record:
         self.follow[4] = {}
         self.follow[5] = {}
 
+        # the throughput series: for each sampling interval in seconds, a
+        # ring buffer of (time, games, hands) samples of the counts, and the
+        # time the next sample is due (see sample())
+        self.series = {
+            1  : deque([(self.start, 0, 0)], maxlen=3600),
+            60 : deque([(self.start, 0, 0)], maxlen=7*24*60),
+        }
+        self.seriesnext = { interval: self.start + interval
+                            for interval in self.series }
+
+        # the latency histograms handed in by the players, merged by team
+        # module and then kind (see latency.py)
+        self.latency = {}
+
         # initialize the lastwrite time to 0
         self.lastwrite = 0
 
+        # the thread count and windowed hands/s, if the mainline is tuning
+        # the number of threads; None means it isn't
+        self.threads = None
+        self.windowhps = 0
+
         # if we were passed the name of the team1 and team2 algorithms,
         # store them, otherwise default to "unknown"
         self.team1 = "unknown"
@@ -96,38 +121,73 @@ class Record:
         if "team2" in kwargs:
             self.team2 = kwargs['team2']
 
+        # if we were told not to write the csv files (the benchmark doesn't
+        # want them clobbered), note that
+        self.files = True
+        if "files" in kwargs:
+            self.files = kwargs['files']
+
         # if we were passed stats, init the object value
         self.stats = False
         if "stats" in kwargs:
             self.stats = kwargs['stats']
 
+        # if we're showing the stats of another run (see load()), this is
+        # the data it published, otherwise None
+        self.published = None
+
+        # the curses windows, once the screen is opened
+        self.header = None
+        self.latwin = None
+
         # if stats is enabled, initialize curses, so we can have a bit more
         # control of our output
         if self.stats:
-            # initialize curses and get current screen size
+            # initialize curses and lay out the screen
             curses.initscr()
-            width = curses.COLS
-            height = curses.LINES
 
             # if the screen isn't at least 90x30, curses will abort, so check
-            if width < 90 or height < 30:
+            if not self.openScreen():
+                curses.endwin()
                 sys.stderr.write("\n")
                 sys.stderr.write("Screen must be at least 90x30 to show stats")
                 sys.stderr.write("\n")
                 sys.stderr.write("\n")
                 sys.exit(1)
 
-            # these are some variables to make adjusting the col sizes easier
-            headerx = width ; headery = 3
-            col1x   = 25    ; col1y   = 24
-            col2x   = 65    ; col2y   = 24
-            footerx = width ; footery = 3
 
-            # make the curses calls to create the windows
-            self.header = curses.newwin(headery,headerx,0,0)
-            self.col1   = curses.newwin(col1y,col1x,headery,0)
-            self.col2   = curses.newwin(col2y,col2x,headery,col1x)
-            self.footer = curses.newwin(footery,footerx,headery+col1y,0)
+    ###########################################################################
+    # This lays out the stats windows for the current screen size, once
+    # curses is initialized: it returns False, without making any windows,
+    # if the screen is less than 90x30.  peuchre-top calls this again when
+    # its screen is resized.
+    #
+    def openScreen(self):
+        width = curses.COLS
+        height = curses.LINES
+        self.header = None
+        self.latwin = None
+        if width < 90 or height < 30:
+            return False
+
+        # these are some variables to make adjusting the col sizes easier
+        headerx = width ; headery = 3
+        col1x   = 25    ; col1y   = 24
+        col2x   = 65    ; col2y   = 24
+        footerx = width ; footery = 3
+
+        # make the curses calls to create the windows
+        self.header = curses.newwin(headery,headerx,0,0)
+        self.col1   = curses.newwin(col1y,col1x,headery,0)
+        self.col2   = curses.newwin(col2y,col2x,headery,col1x)
+        self.footer = curses.newwin(footery,footerx,headery+col1y,0)
+
+        # if the screen is taller than that, we show the latencies
+        # underneath
+        lattop = headery + col1y + footery
+        if height > lattop + 3:
+            self.latwin = curses.newwin(height-lattop,width,lattop,0)
+        return True
 
 
     ###########################################################################
@@ -151,6 +211,112 @@ class Record:
         return 0.00
 
 
+    ###########################################################################
+    # This records the current thread count and the windowed hands/s the
+    # tuner measured for it, so we can show them on the stats screen
+    #
+    def setThreads(self, threads, hps):
+        self.threads = threads
+        self.windowhps = hps
+
+
+    ###########################################################################
+    # This samples the game and hand counts into the throughput series: the
+    # mainline calls it every second or so, and each series gets a sample
+    # for every one of its intervals that's passed since the last call (so
+    # a stall shows up as samples with no change, rather than a gap)
+    #
+    def sample(self):
+        now = time.time()
+        for (interval, series) in self.series.items():
+            while self.seriesnext[interval] <= now:
+                series.append((self.seriesnext[interval],
+                    self.counts.games, self.counts.hands))
+                self.seriesnext[interval] += interval
+
+
+    ###########################################################################
+    # This returns the games/s and hands/s over the last window seconds,
+    # from the finest series that covers it, or over as much of it as we
+    # have
+    #
+    def windowRate(self, window):
+        if self.published is not None:
+            return tuple(self.published['rates'][str(window)])
+        choice = None
+        for (interval, series) in sorted(self.series.items()):
+            span = series[-1][0] - series[0][0]
+            if choice is None or span > choice[2] or span >= window:
+                choice = (interval, series, span)
+            if span >= window:
+                break
+        (interval, series, span) = choice
+        back = min(len(series) - 1, int(window // interval))
+        (t0, games0, hands0) = series[-1 - back]
+        (t1, games1, hands1) = series[-1]
+        if t1 <= t0:
+            return (0, 0)
+        return ((games1 - games0) / (t1 - t0), (hands1 - hands0) / (t1 - t0))
+
+
+    ###########################################################################
+    # This returns a sparkline of the hands/s in each of the last n seconds,
+    # and the peak rate it's scaled to
+    #
+    def sparkline(self, n):
+        ramp = " .:-=+*#%@"
+        series = list(self.series[1])[-(n+1):]
+        rates = [ b[2] - a[2] for (a, b) in zip(series, series[1:]) ]
+        peak = max(rates, default=0)
+        line = ""
+        for rate in rates:
+            if peak > 0:
+                line += ramp[min(len(ramp)-1, int(len(ramp) * rate / peak))]
+            else:
+                line += ramp[0]
+        return (line.rjust(n), peak)
+
+
+    ###########################################################################
+    # This returns the number of unique remapped calling hands we've seen
+    #
+    def uniqueHands(self):
+        if self.published is not None:
+            return self.published['unique']
+        return len(self.chand)
+
+
+    ###########################################################################
+    # This merges a player's latency histograms, by kind, into those for its
+    # team module
+    #
+    def addTimings(self, module, timings):
+        latency = self.latency.setdefault(module, {})
+        for (kind, hist) in timings.items():
+            if kind not in latency:
+                latency[kind] = Histogram()
+            latency[kind].merge(hist)
+
+
+    ###########################################################################
+    # This returns a time in nanoseconds as a short string of microseconds,
+    # for the stats screen
+    #
+    @staticmethod
+    def usec(ns):
+        if ns < 100000:
+            return "%.1f" % (ns/1000)
+        return "%.0f" % (ns/1000)
+
+
+    ###########################################################################
+    # This returns the team modules we have latencies for, team 1's first
+    #
+    def latencyModules(self):
+        return sorted(self.latency,
+            key=lambda m: (m != self.team1, m != self.team2, m))
+
+
     ###########################################################################
     # This tracks overall game counts
     #
@@ -161,6 +327,129 @@ class Record:
         self.write()
 
 
+    ###########################################################################
+    # This counts a game that was abandoned at the server timeout
+    #
+    def addTimeout(self):
+        self.counts.timeouts += 1
+
+
+    ###########################################################################
+    # This returns a copy of the stats as plain values, so they can be read
+    # (eg. by the metrics endpoint, see metrics.py) without holding the lock
+    # the game threads update them under: the caller should hold it while
+    # we make the copy
+    #
+    def snapshot(self):
+        latency = {}
+        for (module, kinds) in self.latency.items():
+            latency[module] = {}
+            for (kind, hist) in kinds.items():
+                latency[module][kind] = Histogram()
+                latency[module][kind].merge(hist)
+
+        return {
+            'time'     : time.time(),
+            'start'    : self.start,
+            'team1'    : self.team1,
+            'team2'    : self.team2,
+            'games'    : self.counts.games,
+            'hands'    : self.counts.hands,
+            'orders'   : self.counts.orders,
+            'calls'    : self.counts.calls,
+            'euchres'  : self.counts.euchres,
+            'timeouts' : self.counts.timeouts,
+            'makers'   : list(self.makers.team),
+            'orderers' : list(self.orderers.team),
+            'callers'  : list(self.callers.team),
+            'teameuchres' : list(self.euchres.team),
+            'rates'    : { window: self.windowRate(window)
+                           for window in (10, 60, 600, 3600, 86400) },
+            'latency'  : latency,
+        }
+
+
+    ###########################################################################
+    # This returns everything the stats screen shows as plain data that can
+    # be written out as JSON, so another process can show it (see
+    # statsmap.py and peuchre-top): the caller should hold the lock while
+    # we make it.  load() reads it back.
+    #
+    def export(self):
+        latency = {}
+        for (module, kinds) in self.latency.items():
+            latency[module] = { kind: [ hist.count, hist.total, hist.max,
+                                        hist.buckets.copy() ]
+                                for (kind, hist) in kinds.items() }
+
+        counts = {}
+        for field in ('games','hands','orders','calls','euchres','timeouts'):
+            counts[field] = getattr(self.counts, field)
+        tallies = {}
+        for (name, tally) in (('makers', self.makers),
+                              ('orderers', self.orderers),
+                              ('callers', self.callers),
+                              ('euchres', self.euchres)):
+            tallies[name] = { field: list(getattr(tally, field))
+                              for field in tally._fields }
+
+        return {
+            'time'      : time.time(),
+            'start'     : self.start,
+            'team1'     : self.team1,
+            'team2'     : self.team2,
+            'counts'    : counts,
+            'tallies'   : tallies,
+            'unique'    : len(self.chand),
+            'ccount'    : self.ccount,
+            'cmax'      : self.cmax,
+            'follow'    : { trick: dict(self.follow[trick])
+                            for trick in self.follow },
+            'threads'   : self.threads,
+            'windowhps' : self.windowhps,
+            'series'    : list(self.series[1])[-61:],
+            'rates'     : { window: self.windowRate(window)
+                            for window in (10, 60, 600, 3600, 86400) },
+            'latency'   : latency,
+        }
+
+
+    ###########################################################################
+    # This loads the data another run exported, to show it on our screen:
+    # it replaces what we'd recorded ourselves
+    #
+    def load(self, data):
+        self.published = data
+        self.start = data['start']
+        self.team1 = data['team1']
+        self.team2 = data['team2']
+        for (field, value) in data['counts'].items():
+            setattr(self.counts, field, value)
+        for (name, fields) in data['tallies'].items():
+            tally = getattr(self, name)
+            for (field, value) in fields.items():
+                setattr(tally, field, value)
+        self.ccount = data['ccount']
+        self.cmax = data['cmax']
+        for (trick, follow) in data['follow'].items():
+            self.follow[int(trick)] = follow
+        self.threads = data['threads']
+        self.windowhps = data['windowhps']
+        self.series[1] = deque([ tuple(sample) for sample in data['series'] ],
+            maxlen=3600)
+
+        self.latency = {}
+        for (module, kinds) in data['latency'].items():
+            self.latency[module] = {}
+            for (kind, (count, total, most, buckets)) in kinds.items():
+                hist = Histogram()
+                hist.count = count
+                hist.total = total
+                hist.max = most
+                hist.buckets = { int(i): n for (i, n) in buckets.items() }
+                self.latency[module][kind] = hist
+
+
     ########################################################################### 
     # This takes a list of cards, a trump card, a score, and the calling player
     # object.  It remaps the hand according to the trump suit, and then stores
@@ -180,13 +469,18 @@ class Record:
         # after the dealer, 1 is the dealer's partner, 2 is the next person,
         # 3 is the dealer; this allows aggregation of stats based on
         # position relative to the dealer
-        pos = player.playerhandle - (player.state['dealer'] + 1)
+        pos = player.playerhandle - (player.state.dealer + 1)
         if pos < 0: pos += 4
 
+        # the team stats are credited to the team whose module the player
+        # is, which in the swapped game of a duplicate pair isn't the team
+        # of its seat (the per player stats are by seat)
+        team = player.statsteam
+
         # track the player, team, and position that makes it
-        self.makers.team[player.team - 1] += 1
+        self.makers.team[team - 1] += 1
         self.makers.player[player.playerhandle] += 1
-        if player.team == 1:
+        if team == 1:
             self.makers.team1pos[pos] += 1
         else:
             self.makers.team2pos[pos] += 1
@@ -196,19 +490,19 @@ class Record:
         # the orderer flag is set for this player (strictly, we could compute
         # the call stats by subtracting the orders from the makes, but it's
         # simpler and clearer this way)
-        if player.state['orderer'] == player.playerhandle:
+        if player.state.orderer == player.playerhandle:
             self.counts.orders += 1
-            self.orderers.team[player.team - 1] += 1
+            self.orderers.team[team - 1] += 1
             self.orderers.player[player.playerhandle] += 1
-            if player.team == 1:
+            if team == 1:
                 self.orderers.team1pos[pos] += 1
             else:
                 self.orderers.team2pos[pos] += 1
         else:
             self.counts.calls += 1
-            self.callers.team[player.team - 1] += 1
+            self.callers.team[team - 1] += 1
             self.callers.player[player.playerhandle] += 1
-            if player.team == 1:
+            if team == 1:
                 self.callers.team1pos[pos] += 1
             else:
                 self.callers.team2pos[pos] += 1
@@ -216,9 +510,9 @@ class Record:
         # if the score is negative, then it was a euchre, so track those stats
         if score < 0:
             self.counts.euchres += 1
-            self.euchres.team[player.team - 1] += 1
+            self.euchres.team[team - 1] += 1
             self.euchres.player[player.playerhandle] += 1
-            if player.team == 1:
+            if team == 1:
                 self.euchres.team1pos[pos] += 1
             else:
                 self.euchres.team2pos[pos] += 1
@@ -227,12 +521,12 @@ class Record:
             # ordered was not also the dealer), we track the %euchre by
             # team and hole card: map the hole card to an index and store
             # the count in a team-specific tuple
-            if player.state['orderer'] == player.playerhandle and \
-               player.state['dealer'] != player.playerhandle:
+            if player.state.orderer == player.playerhandle and \
+               player.state.dealer != player.playerhandle:
                 # only one of 6 cards can be ordered: the 9, 10, J, Q, K, A
                 # (the left can't be ordered since it would be the right)
-                v = player.state['hole'].value
-                if player.team == 1:
+                v = player.state.hole.value
+                if team == 1:
                     if v ==  9: self.euchres.team1hole[0] += 1  # 9
                     if v == 10: self.euchres.team1hole[1] += 1  # T
                     if v == 12: self.euchres.team1hole[2] += 1  # Q
@@ -325,6 +619,10 @@ class Record:
     # This prints some high level info for the record using curses
     #
     def print(self,**kwargs):
+        # if we've no screen to print to, there's nothing to do
+        if self.header is None:
+            return
+
         # clear the screen to start
         if 'clear' not in kwargs \
            or ('clear' in kwargs and kwargs['clear'] != False ):
@@ -337,29 +635,35 @@ class Record:
 
         # pre-calculate some data
 
+        # the time we're showing the stats as of: now, unless they're from
+        # another run, in which case it's when they were published
+        now = time.time()
+        if self.published is not None:
+            now = self.published['time']
+
         # compute the run time
-        t = time.gmtime(time.time() - self.start)
+        t = time.gmtime(now - self.start)
         runtime = "%dd %02d:%02d:%02d" \
             % (t.tm_mday-1,t.tm_hour,t.tm_min,t.tm_sec)
 
         # compute hands per second and hands per game
         hps = 0
-        if self.start != time.time():
-            hps = self.counts.hands / (time.time() - self.start)
+        if self.start != now:
+            hps = self.counts.hands / (now - self.start)
         hpg = 0
         if self.counts.games > 0:
             hpg = self.counts.hands / self.counts.games
 
         # compute the % coverage of remapped hands
         avg = 0
-        numunique = len(self.chand)
+        numunique = self.uniqueHands()
         if numunique > 0:
             avg = self.ccount / numunique
 
         # compute the games per second
         gps = 0
-        if self.start != time.time():
-            gps = self.counts.games / (time.time() - self.start)
+        if self.start != now:
+            gps = self.counts.games / (now - self.start)
 
         # print the data
 
@@ -368,6 +672,13 @@ class Record:
         self.header.addstr("Peuchre Stats ( %s )   Team 1: %s   Team 2: %s"
             % (runtime,self.team1,self.team2))
 
+        # and the sparkline of the hands/s over the last minute or so
+        n = min(60, self.header.getmaxyx()[1] - 36)
+        (spark, peak) = self.sparkline(n)
+        self.header.addstr("\n")
+        self.header.addstr("Hands/s, last %ds |%s| peak %6.1f"
+            % (n, spark, peak))
+
         # print the game stats
         self.col1.addstr("Games\n")
         self.col1.addstr("  Total   : %5d\n" % (self.counts.games))
@@ -384,6 +695,21 @@ class Record:
         self.col1.addstr("  Max Reps: %5d\n" % ( self.cmax, ) )
         self.col1.addstr("  Avg Reps:   %6.2f\n" % ( avg, ) )
 
+        # print the tuner data, if we're tuning the thread count
+        if self.threads is not None:
+            self.col1.addstr("\n")
+            self.col1.addstr("Threads (auto)\n")
+            self.col1.addstr("  Current : %5d\n" % ( self.threads, ) )
+            self.col1.addstr("  Hands/s :   %6.2f\n" % ( self.windowhps, ) )
+
+        # print the windowed hands/s
+        self.col1.addstr("\n")
+        self.col1.addstr("Hands/s (window)\n")
+        for (label, window) in (("10s", 10), ("1m", 60), ("10m", 600),
+                                ("1h", 3600), ("1d", 86400)):
+            self.col1.addstr("  %-8s:   %6.2f\n"
+                % ( label, self.windowRate(window)[1] ))
+
         # print the make stats
         self.col2.addstr("Makes\n")
         self.col2.addstr("  Order/Call : %5.2f / %5.2f\n"
@@ -512,11 +838,40 @@ class Record:
         self.footer.addstr("%4.2f / %4.2f / %4.2f / %4.2f / %4.2f\n"
             % (avg[1],avg[2],avg[3],avg[4],avg[5]) )
 
+        # print the latencies, for up to two team modules side by side, as
+        # many kinds as fit
+        if self.latwin is not None:
+            self.latwin.erase()
+            modules = self.latencyModules()[:2]
+            rows = self.latwin.getmaxyx()[0] - 3
+            line = "Latency (us)        "
+            for module in modules:
+                line += " | %-29s" % (module[:29])
+            self.latwin.addstr(line + "\n")
+            line = "  %-18s" % ("kind")
+            for module in modules:
+                line += " | %8s %6s %6s %7s" % ("count","p50","p99","max")
+            self.latwin.addstr(line + "\n")
+            kinds = set()
+            for module in modules:
+                kinds.update(self.latency[module])
+            for kind in sorted(kinds, key=kindOrder)[:rows]:
+                line = "  %-18s" % (kind[:18])
+                for module in modules:
+                    hist = self.latency[module].get(kind, Histogram())
+                    line += " | %8d %6s %6s %7s" % (hist.count,
+                        self.usec(hist.percentile(0.5)),
+                        self.usec(hist.percentile(0.99)),
+                        self.usec(hist.max))
+                self.latwin.addstr(line + "\n")
+
         # update the screen
         self.header.noutrefresh()
         self.col1.noutrefresh()
         self.col2.noutrefresh()
         self.footer.noutrefresh()
+        if self.latwin is not None:
+            self.latwin.noutrefresh()
         curses.doupdate()
 
         # write if it's time to
@@ -531,11 +886,14 @@ class Record:
     def write(self):
         # if we're less than 60 seconds since the last write time,
         # skip this
+        if not self.files: return
         if (time.time() - self.lastwrite) < 60: return
 
         # otherwise call the write routines
         self.writeChandCsv()
         self.writeFollowCsv()
+        self.writeLatencyCsv()
+        self.writeRateCsv()
 
         # and update the last write time
         self.lastwrite = time.time()
@@ -553,6 +911,8 @@ class Record:
         # call the write routines
         self.writeChandCsv()
         self.writeFollowCsv()
+        self.writeLatencyCsv()
+        self.writeRateCsv()
 
 
     ########################################################################### 
@@ -621,6 +981,76 @@ class Record:
         f.close()
 
 
+    ###########################################################################
+    # This routine will print out the latency histograms: for each team
+    # module and kind of message or decision, the count, rate, and the mean,
+    # percentiles and max times in microseconds, into a file called
+    # peuchre-latency.csv
+    #
+    def writeLatencyCsv(self):
+        # open the file to write
+        f = open("peuchre-latency.csv","w")
+
+        # print the header
+        f.write("peuchre latency stats\n")
+        f.write("%s\n" % (time.strftime("%Y/%m/%d %H:%M:%S %Z")))
+        f.write("team 1: %s\n" % (self.team1))
+        f.write("team 2: %s\n" % (self.team2))
+        f.write("\n")
+        f.write("module, kind, count, per s, mean, "
+            + ", ".join("p%d" % (100*q) for q in PERCENTILES) + ", max\n")
+
+        # print a line for each module and kind
+        elapsed = max(time.time() - self.start, 1e-9)
+        for module in self.latencyModules():
+            for kind in sorted(self.latency[module], key=kindOrder):
+                hist = self.latency[module][kind]
+                string = "%s,%s,%d,%.2f,%.2f" % (module, kind, hist.count,
+                    hist.count / elapsed, hist.mean()/1000)
+                for q in PERCENTILES:
+                    string += ",%.2f" % (hist.percentile(q)/1000)
+                string += ",%.2f" % (hist.max/1000)
+                f.write(string+"\n")
+
+        # close 'er up
+        f.close()
+
+
+    ###########################################################################
+    # This routine will print out the throughput series: for each sample of
+    # each series, the time, the game and hand counts, and the games/s and
+    # hands/s since the sample before, into a file called peuchre-rate.csv
+    #
+    def writeRateCsv(self):
+        # open the file to write
+        f = open("peuchre-rate.csv","w")
+
+        # print the header
+        f.write("peuchre rate stats\n")
+        f.write("%s\n" % (time.strftime("%Y/%m/%d %H:%M:%S %Z")))
+        f.write("team 1: %s\n" % (self.team1))
+        f.write("team 2: %s\n" % (self.team2))
+        f.write("\n")
+        f.write("interval, time, games, hands, games/s, hands/s\n")
+
+        # print each series, the finest first
+        for (interval, series) in sorted(self.series.items()):
+            last = None
+            for (t, games, hands) in series:
+                gps = 0
+                hps = 0
+                if last is not None and t > last[0]:
+                    gps = (games - last[1]) / (t - last[0])
+                    hps = (hands - last[2]) / (t - last[0])
+                f.write("%d,%s,%d,%d,%.3f,%.3f\n" % (interval,
+                    time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(t)),
+                    games, hands, gps, hps))
+                last = (t, games, hands)
+
+        # close 'er up
+        f.close()
+
+
     ###########################################################################
     # This routine takes a set of cards and a trump suit, and returns a string
     # with the cards remapped to a suit-independent view of that hand:
@@ -637,7 +1067,10 @@ class Record:
     #  - all non-trump suits are separated by their suit, ordered, and then
     #    relabeled as suit "a", "b", and "c"
     #
-    def remap(self, hand, trumpsuit):
+    # It doesn't depend on any record data, so the hand history uses it too.
+    #
+    @staticmethod
+    def remap(hand, trumpsuit):
         # set the trump and complementary suit
         compsuit = Card.suitName(Card.suitComp(trumpsuit))
         trumpsuit = Card.suitName(trumpsuit)
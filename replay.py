@@ -0,0 +1,197 @@
+###########################################################################
+# This is the deal replay engine: it takes the games captured with
+# peuchre --capture (see gamerecord.py) and plays their deals again, with
+# whatever player modules we've been given, on tables that deal the
+# recorded cards rather than shuffling (see pyeuchred.Table).
+#
+# Each hand's result is scored as team 1's net points on the deal (the
+# points team 1 scored, less the points team 2 scored), and compared with
+# the recorded result for the same deal: since both sides of the comparison
+# had the same cards, the paired difference takes out most of the card
+# luck, and a difference between two player modules shows up in far fewer
+# hands than comparing independent deals.
+#
+# A replayed game ends when either team reaches 10, as usual, or when the
+# recorded deals run out, so the pairs are the deals played both times.
+
+import csv
+import math
+import threading
+
+from logging import warning as warn, log, debug, info, error, critical
+from gamerecord import readGames
+from euchreplayer import Observer
+
+
+###########################################################################
+# This returns whether a recorded hand was captured in full, so it can be
+# dealt again: hands that weren't are skipped, both as deals and as
+# recorded results, so the two line up hand for hand
+#
+def complete(hand):
+    return None not in hand.cards and hand.hole is not None
+
+
+###########################################################################
+# This turns a recorded game's complete hands into the deals for a
+# scripted table: (dealer, hands, hole), with each card a (value, suit)
+# tuple
+#
+def tableDeals(game):
+    deals = []
+    for hand in game.hands:
+        if not complete(hand):
+            continue
+        deals.append((hand.dealer,
+            [ [ (c.value, c.suit) for c in cards ] for cards in hand.cards ],
+            (hand.hole.value, hand.hole.suit)))
+    return deals
+
+
+###########################################################################
+# This returns team 1's net points on each complete hand of a recorded
+# game, from the scores after each hand
+#
+def recordedNets(game):
+    nets = []
+    prev = (0, 0)
+    for hand in game.hands:
+        if complete(hand):
+            nets.append(
+                (hand.scores[0] - prev[0]) - (hand.scores[1] - prev[1]))
+        prev = hand.scores
+    return nets
+
+
+###########################################################################
+# This returns the count, mean, and standard error of a list of values
+#
+def meanError(values):
+    n = len(values)
+    if n == 0:
+        return (0, 0.0, 0.0)
+    mean = sum(values) / n
+    if n == 1:
+        return (1, mean, 0.0)
+    var = sum((v - mean)**2 for v in values) / (n - 1)
+    return (n, mean, math.sqrt(var / n))
+
+
+class DealScore(Observer):
+
+    ###########################################################################
+    # This is a player observer (see euchreplayer.Observer) that scores each
+    # hand of a game as team 1's net points, and hands the list to the
+    # given function once the game is over
+    #
+    def __init__(self, done):
+        self.done = done
+        self.nets = []
+        self.over = False
+
+
+    ###########################################################################
+    # The first player to see each HANDOVER scores it: the score delta is
+    # from the player's point of view, so we flip it for team 2
+    #
+    def handOver(self, player):
+        if player.hcount < len(self.nets):
+            return
+        delta = player.state.scoredelta
+        if player.team != 1:
+            delta = -delta
+        self.nets.append(delta)
+
+    def gameOver(self, player):
+        if not self.over:
+            self.over = True
+            self.done(self.nets)
+
+
+class Replay:
+
+    ###########################################################################
+    # This initializes the object: the capture file whose deals we replay
+    #
+    def __init__(self, filename):
+        self.games = readGames(filename)
+        self.lock = threading.Lock()
+
+        # the paired results, as (game, hand, recorded, replayed)
+        self.results = []
+
+
+    ###########################################################################
+    # This returns the next recorded game with any deals to play, or None
+    # once we've replayed them all: a damaged game ends the replay there,
+    # with what we've replayed so far still reported
+    #
+    def nextGame(self):
+        try:
+            for game in self.games:
+                if tableDeals(game):
+                    return game
+        except ValueError as e:
+            error("replay: %s" % (e))
+        return None
+
+
+    ###########################################################################
+    # This returns the observer that scores the replay of a recorded game
+    #
+    def collector(self, game):
+        recorded = recordedNets(game)
+        return DealScore(lambda nets: self.add(game.game, recorded, nets))
+
+
+    ###########################################################################
+    # This pairs up a replayed game's results with the recorded ones
+    #
+    def add(self, game, recorded, replayed):
+        with self.lock:
+            for hand in range(min(len(recorded), len(replayed))):
+                self.results.append(
+                    (game, hand, recorded[hand], replayed[hand]))
+
+
+    ###########################################################################
+    # This returns the lines of our report: the mean paired difference with
+    # its standard error and 95% interval, and how much pairing saved over
+    # comparing independent deals (the ratio of the variances is the ratio
+    # of the hands each needs for the same confidence)
+    #
+    def report(self):
+        with self.lock:
+            results = list(self.results)
+        if not results:
+            return [ "replay: no deals replayed" ]
+
+        (n, recmean, recerr) = meanError([ r[2] for r in results ])
+        (n, repmean, reperr) = meanError([ r[3] for r in results ])
+        (n, mean, err) = meanError([ r[3] - r[2] for r in results ])
+        lines = [
+            "replay: %d deals" % (n),
+            "replay: team 1 net per deal, recorded %+.4f, replayed %+.4f"
+                % (recmean, repmean),
+            "replay: paired difference %+.4f +/- %.4f (95%%: %+.4f to %+.4f)"
+                % (mean, err, mean - 1.96*err, mean + 1.96*err),
+        ]
+        if err > 0:
+            unpaired = math.sqrt(recerr**2 + reperr**2)
+            lines.append("replay: pairing needs %.1fx fewer deals than "
+                "independent deals" % ((unpaired / err)**2))
+        return lines
+
+
+    ###########################################################################
+    # This writes the per-deal results out as CSV
+    #
+    def writeCsv(self, filename):
+        with self.lock:
+            results = list(self.results)
+        with open(filename, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["game", "hand", "recorded", "replayed", "diff"])
+            for (game, hand, recorded, replayed) in results:
+                writer.writerow([game, hand, recorded, replayed,
+                    replayed - recorded])
@@ -0,0 +1,157 @@
+###########################################################################
+# These objects publish a run's stats through a memory-mapped file, so a
+# separate viewer (peuchre-top) can show them: peuchre writes a fresh copy
+# of Record.export() into the file about once a second, and any number of
+# viewers map the file read-only and read it whenever they like, without
+# the run knowing or caring whether anyone is watching.
+#
+# The file is a fixed size header and a JSON payload:
+#    magic "PEST", version (u32), sequence (u64), payload length (u32)
+# guarded by a seqlock: the writer makes the sequence odd before it starts
+# changing the payload, and even again once it's done, so a reader that
+# sees the same even sequence before and after copying the payload knows
+# its copy wasn't torn by a write, and otherwise just tries again.
+#
+# A new run replaces the file (it writes a new one and renames it into
+# place) rather than truncating it, since truncating a file that's mapped
+# would crash its readers: a reader notices the new file and maps that.
+
+import os
+import json
+import mmap
+import time
+import struct
+
+from logging import warning as warn, log, debug, info, error, critical
+
+# the header layout, and where the payload starts
+HEADER = struct.Struct("<4sIQI")
+MAGIC = b"PEST"
+VERSION = 1
+PAYLOAD = 32
+
+
+class StatsWriter:
+
+    ###########################################################################
+    # This creates the stats file, of the given size in bytes: payloads
+    # bigger than it has room for are dropped
+    #
+    def __init__(self, filename, **kwargs):
+        self.filename = filename
+        self.size = 4*1024*1024
+        if 'size' in kwargs:
+            self.size = kwargs['size']
+        self.seq = 0
+        self.warned = False
+
+        # write the new file beside the old one, and swap it in
+        temp = "%s.%d" % (filename, os.getpid())
+        with open(temp, "wb") as f:
+            f.truncate(self.size)
+        self.f = open(temp, "r+b")
+        self.map = mmap.mmap(self.f.fileno(), self.size)
+        HEADER.pack_into(self.map, 0, MAGIC, VERSION, self.seq, 0)
+        os.replace(temp, filename)
+
+
+    ###########################################################################
+    # This publishes a new set of stats, as a dict that can be written as
+    # JSON: only one thread should call this
+    #
+    def publish(self, data):
+        payload = json.dumps(data, separators=(",", ":")).encode()
+        if len(payload) > self.size - PAYLOAD:
+            if not self.warned:
+                warn("stats: %d bytes of stats won't fit in %s"
+                    % (len(payload), self.filename))
+                self.warned = True
+            return
+
+        # the sequence is odd while we write
+        self.seq += 1
+        HEADER.pack_into(self.map, 0, MAGIC, VERSION, self.seq, 0)
+        self.map[PAYLOAD:PAYLOAD+len(payload)] = payload
+        self.seq += 1
+        HEADER.pack_into(self.map, 0, MAGIC, VERSION, self.seq, len(payload))
+
+
+    ###########################################################################
+    # This unmaps the file: it's left in place, so the last stats of the
+    # run can still be viewed
+    #
+    def close(self):
+        self.map.flush()
+        self.map.close()
+        self.f.close()
+
+
+class StatsReader:
+
+    ###########################################################################
+    # This initializes the object: the file is mapped when we first read
+    #
+    def __init__(self, filename):
+        self.filename = filename
+        self.f = None
+        self.map = None
+        self.inode = None
+        self.seq = None
+
+
+    ###########################################################################
+    # This maps the current stats file, if it's a different file from the
+    # one we have mapped: it returns False if there's no file to map
+    #
+    def attach(self):
+        try:
+            inode = os.stat(self.filename).st_ino
+        except OSError:
+            return self.map is not None
+        if inode == self.inode:
+            return True
+
+        self.detach()
+        try:
+            self.f = open(self.filename, "rb")
+            self.map = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self.detach()
+            return False
+        self.inode = inode
+        return True
+
+
+    ###########################################################################
+    # This unmaps the file
+    #
+    def detach(self):
+        if self.map is not None:
+            self.map.close()
+        if self.f is not None:
+            self.f.close()
+        self.f = None
+        self.map = None
+        self.inode = None
+
+
+    ###########################################################################
+    # This returns the latest stats published, or None if there are none
+    # yet, or we couldn't get a clean copy in a few tries
+    #
+    def read(self):
+        if not self.attach():
+            return None
+        for attempt in range(100):
+            (magic, version, seq, length) = HEADER.unpack_from(self.map, 0)
+            if magic != MAGIC or version != VERSION:
+                return None
+            if seq == 0:
+                return None
+            if seq % 2 == 0:
+                payload = self.map[PAYLOAD:PAYLOAD+length]
+                if HEADER.unpack_from(self.map, 0)[2] == seq:
+                    self.seq = seq
+                    return json.loads(payload)
+            time.sleep(0.001)
+        return None
@@ -0,0 +1,212 @@
+###########################################################################
+# This object runs a parameter sweep for peuchre-sweep: a player module
+# declares its tunable parameters (see EuchrePlayer.params), and we play a
+# set number of games with the team 1 players using each configuration of
+# them, against a fixed team 2, and measure for each:
+#  - the team 1 win rate
+#  - team 1's expected net points per hand, with its standard error
+#  - the euchre rate of each team, when making, as per Record
+#
+# A sweep spec is a list of "name=values" strings, one per parameter,
+# where values is either a comma separated list ("0.1,0.15,0.2") or an
+# evenly spaced range as lo:hi:n ("0.1:0.3:5").  A grid search tries every
+# combination of the values; a random search tries a number of
+# configurations, picking each parameter uniformly from its range (or from
+# its list).
+#
+# The configurations are independent, so they're handed out to a pool of
+# worker processes, each playing one configuration's games at a time on
+# its own game threads, which keeps every core busy to the end.
+
+import time
+import itertools
+import threading
+import multiprocessing
+
+from game import Game
+from record import Record
+from pool import Pool
+from replay import DealScore, meanError
+from league import GameResult
+
+
+###########################################################################
+# This parses a sweep spec, and returns a list of (name, values, range)
+# for the parameters: range is (lo, hi) for a lo:hi:n spec, and None for a
+# list of values
+#
+def parseSpec(spec):
+    params = []
+    for item in spec:
+        (name, values) = item.split("=", 1)
+        if ":" in values:
+            (lo, hi, n) = values.split(":")
+            (lo, hi, n) = (float(lo), float(hi), int(n))
+            if n < 2:
+                values = [ lo ]
+            else:
+                values = [ lo + (hi - lo) * i / (n - 1) for i in range(n) ]
+            params.append((name.strip(), values, (lo, hi)))
+        else:
+            values = [ float(v) for v in values.split(",") ]
+            params.append((name.strip(), values, None))
+    return params
+
+
+###########################################################################
+# This returns the configurations of a grid search: every combination of
+# the parameters' values
+#
+def gridConfigs(params):
+    names = [ name for (name, values, span) in params ]
+    return [ dict(zip(names, combo)) for combo in
+        itertools.product(*[ values for (name, values, span) in params ]) ]
+
+
+###########################################################################
+# This returns count configurations of a random search
+#
+def randomConfigs(params, count, rng):
+    configs = []
+    for i in range(count):
+        config = {}
+        for (name, values, span) in params:
+            if span is not None:
+                config[name] = rng.uniform(span[0], span[1])
+            else:
+                config[name] = rng.choice(values)
+        configs.append(config)
+    return configs
+
+
+###########################################################################
+# This is the entry point for a worker process: it needs to be a module
+# level function so multiprocessing can pickle it
+#
+def runWorker(job):
+    (kwargs, config) = job
+    return Sweep(**kwargs).runConfig(config)
+
+
+class Sweep:
+
+    # these are the columns of a result row, after the parameters
+    columns = [ 'games', 'hands', 'winrate1', 'points1', 'error',
+        'euchre1', 'euchre2' ]
+
+
+    ###########################################################################
+    # This initializes the object
+    #
+    def __init__(self,**kwargs):
+        # the team modules to load, by name: team 1 is the one we tune
+        self.team1 = 'random0'
+        if 'team1' in kwargs:
+            self.team1 = kwargs['team1']
+        self.team2 = 'random0'
+        if 'team2' in kwargs:
+            self.team2 = kwargs['team2']
+
+        # the games played for each configuration, and the threads each
+        # worker plays them on
+        self.numgames = 100
+        if 'numgames' in kwargs:
+            self.numgames = kwargs['numgames']
+        self.numthreads = 8
+        if 'numthreads' in kwargs:
+            self.numthreads = kwargs['numthreads']
+
+        # the server inactivity timeout, server implementation, and seed
+        # passed to each game
+        self.timeout = 30
+        if 'timeout' in kwargs:
+            self.timeout = kwargs['timeout']
+        self.serverimpl = "euchred"
+        if 'serverimpl' in kwargs:
+            self.serverimpl = kwargs['serverimpl']
+        self.seed = None
+        if 'seed' in kwargs:
+            self.seed = kwargs['seed']
+
+        # we keep our kwargs to hand on to the workers
+        self.kwargs = kwargs
+
+
+    ###########################################################################
+    # This plays self.numgames games with the given team 1 configuration,
+    # in this process, and returns its result row
+    #
+    def runConfig(self, config):
+        Team1 = __import__(self.team1, globals(), locals(), ['Player'], 0) \
+            .Player
+        Team2 = __import__(self.team2, globals(), locals(), ['Player'], 0) \
+            .Player
+
+        record = Record(team1=self.team1, team2=self.team2, files=False)
+        lock = threading.Lock()
+        wins = []
+        nets = []
+
+        numthreads = min(self.numgames, self.numthreads)
+        threads = [None]*numthreads
+        pools = [ Pool() for i in range(numthreads) ]
+        gcount = 0
+        while gcount < self.numgames or any(threads):
+            for i in range(numthreads):
+                if threads[i] is not None and not threads[i].is_alive():
+                    threads[i] = None
+                if threads[i] is None and gcount < self.numgames:
+                    threads[i] = Game(
+                        id=i, gcount=gcount, lock=lock,
+                        stats=False, record=record,
+                        team1=Team1, team2=Team2,
+                        timeout=self.timeout,
+                        serverimpl=self.serverimpl,
+                        seed=self.seed,
+                        params={ 1: config },
+                        pool=pools[i],
+                        observers=[ GameResult(wins.append),
+                                    DealScore(nets.extend) ])
+                    threads[i].start()
+                    gcount += 1
+            time.sleep(0.005)
+
+        (n, points, error) = meanError(nets)
+        row = dict(config)
+        row.update({
+            'games'    : len(wins),
+            'hands'    : n,
+            'winrate1' : round(wins.count(1) / len(wins), 4) if wins else 0,
+            'points1'  : round(points, 4),
+            'error'    : round(error, 4),
+            'euchre1'  : record.p(record.euchres.team[0],
+                                  record.makers.team[0]),
+            'euchre2'  : record.p(record.euchres.team[1],
+                                  record.makers.team[1]),
+        })
+        return row
+
+
+    ###########################################################################
+    # This runs every configuration across the given number of worker
+    # processes, and returns their result rows, best expected points first;
+    # each row is passed to report() as it comes in, if that's given
+    #
+    def run(self, configs, workers, report=None):
+        rows = []
+        if workers <= 1:
+            for config in configs:
+                row = self.runConfig(config)
+                rows.append(row)
+                if report:
+                    report(row)
+        else:
+            jobs = [ (self.kwargs, config) for config in configs ]
+            with multiprocessing.Pool(workers) as pool:
+                for row in pool.imap_unordered(runWorker, jobs):
+                    rows.append(row)
+                    if report:
+                        report(row)
+
+        rows.sort(key=lambda row: -row['points1'])
+        return rows
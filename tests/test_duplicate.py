@@ -0,0 +1,74 @@
+###########################################################################
+# Tests for duplicate games: the two games of a pair are paired up by deal
+# whichever finishes first, the swapped game's nets count for the team 1
+# module, and a pair whose twin never finished is reported and dropped.
+#
+# Run from the top of the tree with: python3 -m pytest tests
+
+import random
+import unittest
+
+from duplicate import Duplicate
+
+
+class TestDuplicate(unittest.TestCase):
+
+    def testWaitsForTwin(self):
+        dup = Duplicate()
+        dup.add(1, False, [ 2, -1 ])
+        self.assertEqual(dup.results, [])
+        self.assertIn(1, dup.waiting)
+
+    def testPairing(self):
+        # the swapped game's team 1 seats held the team 2 module, so its
+        # nets are negated to be the team 1 module's
+        for order in ((False, True), (True, False)):
+            dup = Duplicate()
+            nets = { False: [ 2, -1, 4 ], True: [ -2, 3, 1 ] }
+            for swapped in order:
+                dup.add(7, swapped, nets[swapped])
+            self.assertEqual(dup.results,
+                [ (7, 0, 2, 2), (7, 1, -1, -3), (7, 2, 4, -1) ])
+            self.assertEqual(dup.waiting, {})
+
+    def testUnequalLengths(self):
+        # only the deals played in both games are paired
+        dup = Duplicate()
+        dup.add(1, True, [ 1 ])
+        dup.add(1, False, [ 2, 4, -2 ])
+        self.assertEqual(dup.results, [ (1, 0, 2, -1) ])
+
+    def testPairsKeptApart(self):
+        dup = Duplicate()
+        dup.add(1, False, [ 1 ])
+        dup.add(2, False, [ 2 ])
+        dup.add(2, True, [ 4 ])
+        self.assertEqual(dup.results, [ (2, 0, 2, -4) ])
+        self.assertEqual(list(dup.waiting), [ 1 ])
+
+    def testReport(self):
+        dup = Duplicate()
+        dup.add(1, False, [ 2, -1 ])
+        dup.add(1, True, [ 0, 1 ])
+        lines = dup.report()
+        self.assertEqual(lines[0], "duplicate: 2 deals, each played twice")
+        self.assertIn("net per hand +0.0000", lines[1])
+
+    def testReportOrphans(self):
+        dup = Duplicate()
+        dup.add(1, False, [ 2 ])
+        self.assertEqual(dup.report(), [
+            "duplicate: 1 pairs dropped, as only one of their games finished",
+            "duplicate: no deals played in both games of a pair" ])
+        self.assertEqual(dup.waiting, {})
+
+    def testNewPair(self):
+        dup = Duplicate(deals=5, rng=random.Random(3))
+        (pair, deals) = dup.newPair()
+        self.assertEqual(pair, 1)
+        self.assertEqual(len(deals), 5)
+        self.assertEqual(dup.newPair()[0], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
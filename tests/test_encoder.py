@@ -0,0 +1,102 @@
+###########################################################################
+# Tests for the message encoder: each layout goes out framed with its size
+# and tail, and sendFrames() picks up where a partial send left off.
+#
+# Run from the top of the tree with: python3 -m pytest tests
+
+import socket
+import struct
+import unittest
+
+from card import Card
+from encoder import Encoder, sendFrames, TAIL1, TAIL2
+
+
+###########################################################################
+# This is a stand-in socket whose sendmsg() sends at most a few bytes at a
+# time, to exercise the partial send handling
+#
+class ShortSocket:
+
+    def __init__(self, most):
+        self.most = most
+        self.data = b""
+
+    def sendmsg(self, buffers):
+        data = b"".join(bytes(b) for b in buffers)[:self.most]
+        self.data += data
+        return len(data)
+
+
+class TestEncoder(unittest.TestCase):
+
+    def setUp(self):
+        (self.client, self.server) = socket.socketpair()
+        self.server.settimeout(5)
+        self.encoder = Encoder(self.client)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.close()
+
+    def receive(self, n):
+        data = b""
+        while len(data) < n:
+            data += self.server.recv(n - len(data))
+        return data
+
+    def testPlain(self):
+        self.encoder.plain(7, 100, 200)
+        self.assertEqual(self.receive(18),
+            struct.pack("!iiiiBB", 14, 7, 100, 200, TAIL1, TAIL2))
+
+    def testSuit(self):
+        self.encoder.suit(8, 100, 200, 3)
+        self.assertEqual(self.receive(22),
+            struct.pack("!iiiiiBB", 18, 8, 100, 200, 3, TAIL1, TAIL2))
+
+    def testCard(self):
+        self.encoder.card(9, 100, 200, Card(value=14, suit=2))
+        self.assertEqual(self.receive(26),
+            struct.pack("!iiiiiiBB", 22, 9, 100, 200, 14, 2, TAIL1, TAIL2))
+
+    def testJoin(self):
+        self.encoder.join(1, 1, "random0")
+        self.assertEqual(self.receive(25),
+            struct.pack("!iiii", 21, 1, 1, 7) + b"random0"
+            + struct.pack("!BB", TAIL1, TAIL2))
+
+    def testBufferReused(self):
+        # a shorter message after a longer one doesn't pick up its bytes
+        self.encoder.card(9, 1, 2, Card(value=10, suit=0))
+        self.encoder.plain(7, 3, 4)
+        self.receive(26)
+        self.assertEqual(self.receive(18),
+            struct.pack("!iiiiBB", 14, 7, 3, 4, TAIL1, TAIL2))
+
+    def testShortWrites(self):
+        sock = ShortSocket(5)
+        Encoder(sock).join(1, 1, "abc")
+        self.assertEqual(sock.data,
+            struct.pack("!iiii", 17, 1, 1, 3) + b"abc"
+            + struct.pack("!BB", TAIL1, TAIL2))
+
+
+class TestSendFrames(unittest.TestCase):
+
+    def testAllSent(self):
+        sock = ShortSocket(100)
+        self.assertEqual(sendFrames(sock, [ b"abc", b"de" ]), [])
+        self.assertEqual(sock.data, b"abcde")
+
+    def testPartial(self):
+        sock = ShortSocket(4)
+        left = sendFrames(sock, [ b"abc", b"def", b"gh" ])
+        self.assertEqual([ bytes(f) for f in left ], [ b"ef", b"gh" ])
+        left = sendFrames(sock, left)
+        self.assertEqual(left, [])
+        self.assertEqual(sock.data, b"abcdefgh")
+
+
+if __name__ == "__main__":
+    unittest.main()
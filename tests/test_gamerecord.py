@@ -0,0 +1,165 @@
+###########################################################################
+# Tests for the binary game record: a game captured through GameCapture's
+# observer calls reads back the same, compressed or not, and a damaged game
+# raises a ValueError naming where it is.
+#
+# Run from the top of the tree with: python3 -m pytest tests
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from types import SimpleNamespace
+
+import gamerecord
+
+from card import Card
+from euchreplayer import EuchrePlayer
+from gamerecord import GameRecorder, readGames, recordStruct
+
+
+MSG = EuchrePlayer.messageId
+
+
+###########################################################################
+# This returns a stand-in for a player, with just what the capture reads
+#
+def fakePlayer(ph, team, dealer=3, hole=(9, 0), hand=(), hcount=0,
+               scores=(0, 0)):
+    state = SimpleNamespace(dealer=dealer,
+        hole=Card(value=hole[0], suit=hole[1]),
+        usscore=scores[0], themscore=scores[1])
+    return SimpleNamespace(playerhandle=ph, team=team, state=state,
+        originalHand=[ Card(value=v, suit=s) for (v, s) in hand ],
+        hcount=hcount)
+
+
+# the hands we deal, as (value, suit) tuples
+HANDS = [
+    [ (9,1), (10,1), (11,1), (12,1), (13,1) ],
+    [ (14,1), (9,2), (10,2), (11,2), (12,2) ],
+    [ (13,2), (14,2), (9,3), (10,3), (11,3) ],
+    [ (12,3), (13,3), (14,3), (10,0), (11,0) ],
+]
+
+
+###########################################################################
+# This plays one hand of a game through a capture: the deal, two bids, the
+# dealer's drop, a few plays, and the end of the hand (seen by everyone)
+#
+def captureHand(capture, hcount, scores):
+    for ph in range(4):
+        capture.deal(fakePlayer(ph, ph % 2 + 1, hand=HANDS[ph]))
+    capture.bid(fakePlayer(0, 1), MSG['ORDERPASS'])
+    capture.bid(fakePlayer(1, 2), MSG['CALL'], 2)
+    capture.drop(fakePlayer(3, 2), Card(value=9, suit=0))
+    for ph in range(4):
+        capture.play(fakePlayer(ph, ph % 2 + 1), Card(value=HANDS[ph][0][0],
+            suit=HANDS[ph][0][1]))
+    for ph in range(4):
+        mine = scores if ph % 2 == 0 else (scores[1], scores[0])
+        capture.handOver(fakePlayer(ph, ph % 2 + 1, hcount=hcount,
+            scores=mine))
+
+
+def cards(hand):
+    return [ (card.value, card.suit) for card in hand ]
+
+
+class TestGameRecord(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.dir, "games.pegr")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def writeGames(self, compress):
+        recorder = GameRecorder(self.filename, compress=compress)
+        for gcount in (7, 8):
+            capture = recorder.collector(gcount)
+            captureHand(capture, 0, (1, 0))
+            captureHand(capture, 1, (1, 2))
+            capture.gameOver(fakePlayer(0, 1))
+            capture.gameOver(fakePlayer(1, 2))
+        recorder.close()
+
+    def checkGames(self):
+        games = list(readGames(self.filename))
+        self.assertEqual([ game.game for game in games ], [7, 8])
+        for game in games:
+            self.assertEqual(len(game.hands), 2)
+            self.assertEqual(game.scores, (1, 2))
+            hand = game.hands[0]
+            self.assertEqual(hand.dealer, 3)
+            self.assertEqual((hand.hole.value, hand.hole.suit), (9, 0))
+            self.assertEqual([ cards(c) for c in hand.cards ], HANDS)
+            self.assertEqual(hand.bids, [ (0, MSG['ORDERPASS'], None),
+                                          (1, MSG['CALL'], 2) ])
+            self.assertEqual((hand.dropped.value, hand.dropped.suit), (9, 0))
+            self.assertEqual([ (ph, (c.value, c.suit))
+                               for (ph, c) in hand.plays ],
+                [ (ph, HANDS[ph][0]) for ph in range(4) ])
+            self.assertEqual(hand.scores, (1, 0))
+
+    def testRoundTrip(self):
+        self.writeGames(compress=False)
+        self.checkGames()
+
+    def testRoundTripCompressed(self):
+        self.writeGames(compress=True)
+        self.checkGames()
+
+    def testAppend(self):
+        # a second recorder appends to the file, without a second header
+        self.writeGames(compress=True)
+        self.writeGames(compress=False)
+        self.assertEqual([ game.game for game in readGames(self.filename) ],
+            [7, 8, 7, 8])
+
+    def testNotRecordFile(self):
+        with open(self.filename, "wb") as f:
+            f.write(b"nope")
+        with self.assertRaises(ValueError):
+            list(readGames(self.filename))
+
+    def testTruncated(self):
+        # a game cut short at the end of the file is dropped
+        self.writeGames(compress=False)
+        size = os.path.getsize(self.filename)
+        with open(self.filename, "r+b") as f:
+            f.truncate(size - 3)
+        self.assertEqual([ game.game for game in readGames(self.filename) ],
+            [7])
+
+    def testBadTag(self):
+        self.writeGames(compress=False)
+        offset = os.path.getsize(self.filename)
+        with open(self.filename, "ab") as f:
+            f.write(recordStruct.pack(3, 9, 0) + bytes((99, 0, 0)))
+        games = readGames(self.filename)
+        self.assertEqual(next(games).game, 7)
+        self.assertEqual(next(games).game, 8)
+        with self.assertRaises(ValueError) as raised:
+            next(games)
+        self.assertIn("offset %d" % (offset), str(raised.exception))
+
+    def testEventCutShort(self):
+        with open(self.filename, "wb") as f:
+            f.write(gamerecord.MAGIC + bytes((gamerecord.VERSION,)))
+            f.write(recordStruct.pack(3, 1, 0) + bytes((gamerecord.DEAL, 0, 0)))
+        with self.assertRaises(ValueError):
+            list(readGames(self.filename))
+
+    def testBadCompression(self):
+        with open(self.filename, "wb") as f:
+            f.write(gamerecord.MAGIC + bytes((gamerecord.VERSION,)))
+            f.write(recordStruct.pack(4, 1, gamerecord.COMPRESSED) + b"junk")
+        with self.assertRaises(ValueError):
+            list(readGames(self.filename))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+###########################################################################
+# Tests for the game state objects: the attributes and the old dict
+# interface read and write the same values, and a value that hasn't been
+# set reads as missing either way.
+#
+# Run from the top of the tree with: python3 -m pytest tests
+
+import unittest
+
+from gamestate import GameState, SeatState
+
+
+class TestGameState(unittest.TestCase):
+
+    def testInitial(self):
+        state = GameState()
+        self.assertEqual((state.usscore, state.themscore), (0, 0))
+        self.assertEqual((state.ustricks, state.themtricks), (0, 0))
+        self.assertEqual(state['orderer'], -1)
+        self.assertEqual(state['creator'], 0)
+
+    def testDictAndAttributes(self):
+        state = GameState()
+        state['dealer'] = 2
+        self.assertEqual(state.dealer, 2)
+        state.trump = 3
+        self.assertEqual(state['trump'], 3)
+
+    def testNotSet(self):
+        state = GameState()
+        self.assertNotIn('hole', state)
+        with self.assertRaises(KeyError):
+            state['hole']
+        with self.assertRaises(AttributeError):
+            state.hole
+        state['hole'] = None
+        self.assertIn('hole', state)
+
+    def testSeats(self):
+        state = GameState()
+        self.assertIs(state[1], state.seats[1])
+        state[1]['name'] = "random0"
+        self.assertEqual(state.seats[1].name, "random0")
+        for ph in range(4):
+            self.assertIn(ph, state)
+        self.assertNotIn(4, state)
+        self.assertNotIn(-1, state)
+
+    def testSlots(self):
+        # a misspelt key is an error, rather than quietly adding a value
+        with self.assertRaises(AttributeError):
+            GameState()['dealr'] = 1
+
+
+class TestSeatState(unittest.TestCase):
+
+    def testDict(self):
+        seat = SeatState()
+        self.assertNotIn('card', seat)
+        with self.assertRaises(KeyError):
+            seat['card']
+        seat['cardinplay'] = 1
+        self.assertIn('cardinplay', seat)
+        self.assertEqual(seat.cardinplay, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
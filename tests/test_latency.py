@@ -0,0 +1,92 @@
+###########################################################################
+# Tests for the latency histograms: the bucketing keeps times to within
+# 12.5%, and the percentiles come out of the right buckets.
+#
+# Run from the top of the tree with: python3 -m pytest tests
+
+import unittest
+
+from latency import Histogram, kindOrder
+
+
+class TestHistogram(unittest.TestCase):
+
+    def testSmallTimes(self):
+        # times under 8ns get a bucket each
+        for ns in range(8):
+            h = Histogram()
+            h.add(ns)
+            (i,) = h.buckets
+            self.assertEqual(Histogram.bucketTime(i), ns)
+
+    def testBucketError(self):
+        # the middle of each time's bucket is within 12.5% of it
+        for ns in list(range(8, 5000)) + [ 10**k + d for k in range(4, 12)
+                                             for d in (-1, 0, 1) ]:
+            h = Histogram()
+            h.add(ns)
+            (i,) = h.buckets
+            t = Histogram.bucketTime(i)
+            self.assertLessEqual(abs(t - ns), ns * 0.125, ns)
+
+    def testBucketsOrdered(self):
+        # bucket indexes sort in the order of their times
+        h = Histogram()
+        for ns in range(1, 100000, 7):
+            h.add(ns)
+        times = [ Histogram.bucketTime(i) for i in sorted(h.buckets) ]
+        self.assertEqual(times, sorted(times))
+        self.assertEqual(len(set(times)), len(times))
+
+    def testCounts(self):
+        h = Histogram()
+        for ns in (100, 200, 300):
+            h.add(ns)
+        self.assertEqual(h.count, 3)
+        self.assertEqual(h.total, 600)
+        self.assertEqual(h.max, 300)
+        self.assertEqual(h.mean(), 200)
+
+    def testPercentile(self):
+        h = Histogram()
+        for ns in range(1, 1001):
+            h.add(ns * 1000)
+        for q in (0.5, 0.9, 0.99):
+            self.assertAlmostEqual(h.percentile(q), q * 1e6, delta=q * 1.25e5)
+        self.assertAlmostEqual(h.percentile(1.0), h.max, delta=h.max * 0.125)
+
+    def testPercentileCappedAtMax(self):
+        # 896ns is at the bottom of the 896-1023ns bucket, whose middle is
+        # 960ns, but a percentile is never more than the longest time
+        h = Histogram()
+        h.add(896)
+        self.assertEqual(h.percentile(0.5), 896)
+
+    def testEmpty(self):
+        h = Histogram()
+        self.assertEqual(h.percentile(0.5), 0)
+        self.assertEqual(h.mean(), 0)
+
+    def testMerge(self):
+        (a, b, c) = (Histogram(), Histogram(), Histogram())
+        for ns in (10, 2000, 30000):
+            a.add(ns)
+            c.add(ns)
+        for ns in (500, 70000):
+            b.add(ns)
+            c.add(ns)
+        a.merge(b)
+        self.assertEqual(a.buckets, c.buckets)
+        self.assertEqual((a.count, a.total, a.max), (c.count, c.total, c.max))
+
+
+class TestKindOrder(unittest.TestCase):
+
+    def testOrder(self):
+        kinds = [ "STATE", "lock", "decidePlay", "wait", "send", "DEAL" ]
+        self.assertEqual(sorted(kinds, key=kindOrder),
+            [ "wait", "decidePlay", "lock", "send", "DEAL", "STATE" ])
+
+
+if __name__ == "__main__":
+    unittest.main()
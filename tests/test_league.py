@@ -0,0 +1,109 @@
+###########################################################################
+# Tests for the league: the per-look threshold, the stopping rules, and
+# the Elo ratings fitted from the pairings' results.
+#
+# Run from the top of the tree with: python3 -m pytest tests
+
+import unittest
+
+from league import League, Pairing
+
+
+###########################################################################
+# This sets a pairing's results, as team 1's wins out of its games
+#
+def setResults(league, a, b, wins, games):
+    for pairing in league.pairings:
+        if (pairing.a, pairing.b) == (a, b):
+            pairing.wins = wins
+            pairing.games = games
+
+
+class TestThreshold(unittest.TestCase):
+
+    def testDefaults(self):
+        # 3 standard errors, split over 981 looks
+        league = League([ "random0", "random1" ])
+        self.assertAlmostEqual(league.threshold, 4.6885, places=3)
+
+    def testOneLook(self):
+        # with one look, it's just the one test
+        league = League([ "random0", "random1" ], mingames=50, maxgames=50)
+        self.assertAlmostEqual(league.threshold, 3.0)
+
+    def testMoreLooksStricter(self):
+        few = League([ "random0", "random1" ], maxgames=100)
+        many = League([ "random0", "random1" ], maxgames=10000)
+        self.assertLess(few.threshold, many.threshold)
+
+
+class TestStopping(unittest.TestCase):
+
+    def testNotBeforeMin(self):
+        league = League([ "random0", "random1" ], mingames=20)
+        pairing = league.pairings[0]
+        for i in range(19):
+            league.addResult(pairing, 1)
+        self.assertEqual(pairing.status, "playing")
+
+    def testDecided(self):
+        league = League([ "random0", "random1" ], mingames=20)
+        pairing = league.pairings[0]
+        for i in range(20):
+            league.addResult(pairing, 1)
+        self.assertEqual((pairing.wins, pairing.games), (20, 20))
+        self.assertEqual(pairing.status, "decided")
+
+    def testPrecise(self):
+        league = League([ "random0", "random1" ], mingames=2, precision=0.5)
+        pairing = league.pairings[0]
+        league.addResult(pairing, 1)
+        league.addResult(pairing, 2)
+        self.assertEqual(pairing.status, "precise")
+
+    def testCapped(self):
+        league = League([ "random0", "random1" ], mingames=2, maxgames=2)
+        pairing = league.pairings[0]
+        league.addResult(pairing, 1)
+        league.addResult(pairing, 2)
+        self.assertEqual(pairing.status, "capped")
+        self.assertIsNone(league.nextPairing())
+
+
+class TestRatings(unittest.TestCase):
+
+    def testTwo(self):
+        league = League([ "random0", "random1" ])
+        setResults(league, "random0", "random1", 4, 6)
+        ratings = league.ratings()
+        self.assertAlmostEqual(ratings["random0"][0], 51.05, places=1)
+        self.assertAlmostEqual(ratings["random1"][0], -51.05, places=1)
+        self.assertAlmostEqual(ratings["random0"][1], 137.03, places=1)
+        self.assertAlmostEqual(ratings["random1"][1], 137.03, places=1)
+
+    def testThree(self):
+        # there are only two player modules, so the third is made up: the
+        # ratings only need the names and the pairings
+        modules = [ "a", "b", "c" ]
+        league = League([ "random0", "random1" ])
+        league.modules = modules
+        league.pairings = [ Pairing("a", "b"), Pairing("a", "c"),
+                            Pairing("b", "c") ]
+        setResults(league, "a", "b", 4, 6)
+        setResults(league, "a", "c", 30, 40)
+        setResults(league, "b", "c", 10, 20)
+        ratings = league.ratings()
+        self.assertAlmostEqual(sum(r[0] for r in ratings.values()), 0)
+        for (module, want) in zip(modules, (110.9, -47.3, -63.6)):
+            self.assertAlmostEqual(ratings[module][0], want, places=1)
+
+    def testNoGames(self):
+        # the prior of a drawn game keeps everyone even, and finite
+        league = League([ "random0", "random1" ])
+        for (rating, err) in league.ratings().values():
+            self.assertAlmostEqual(rating, 0)
+            self.assertLess(err, float('inf'))
+
+
+if __name__ == "__main__":
+    unittest.main()
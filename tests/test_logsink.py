@@ -0,0 +1,84 @@
+###########################################################################
+# Tests for the rotating log: pruning keeps the newest segments, in the
+# order they were rotated, including two rotated in the same second.
+#
+# Run from the top of the tree with: python3 -m pytest tests
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from logsink import RotatingLog
+
+
+class TestPrune(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.dir, "peuchre.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def touch(self, *names):
+        for name in names:
+            with open(os.path.join(self.dir, name), "w") as f:
+                f.write("x")
+
+    def remaining(self):
+        return sorted(os.listdir(self.dir))
+
+    def testKeepsNewest(self):
+        log = RotatingLog(self.filename, keep=2)
+        self.touch("peuchre.log.20261019-010000.gz",
+                   "peuchre.log.20261019-020000.gz",
+                   "peuchre.log.20261019-030000.gz",
+                   "peuchre.log.20261020-000000.gz")
+        log.prune(".gz")
+        self.assertEqual(self.remaining(),
+            [ "peuchre.log.20261019-030000.gz",
+              "peuchre.log.20261020-000000.gz" ])
+        log.close()
+
+    def testSameSecond(self):
+        # the second segment of a second is the newer one, even though its
+        # name sorts first
+        log = RotatingLog(self.filename, keep=2)
+        self.touch("peuchre.log.20261019-010000.gz",
+                   "peuchre.log.20261019-020000.gz",
+                   "peuchre.log.20261019-020000-2.gz",
+                   "peuchre.log.20261019-020000-10.gz")
+        log.prune(".gz")
+        self.assertEqual(self.remaining(),
+            [ "peuchre.log.20261019-020000-10.gz",
+              "peuchre.log.20261019-020000-2.gz" ])
+        log.close()
+
+    def testOnlyItsOwnSuffix(self):
+        # a segment still being compressed, or the live log, isn't pruned
+        log = RotatingLog(self.filename, keep=1)
+        self.touch("peuchre.log",
+                   "peuchre.log.20261019-010000",
+                   "peuchre.log.20261019-010000.gz.tmp",
+                   "peuchre.log.20261019-020000.gz",
+                   "peuchre.log.20261019-030000.gz")
+        log.prune(".gz")
+        self.assertEqual(self.remaining(),
+            [ "peuchre.log",
+              "peuchre.log.20261019-010000",
+              "peuchre.log.20261019-010000.gz.tmp",
+              "peuchre.log.20261019-030000.gz" ])
+        log.close()
+
+    def testKeepAll(self):
+        log = RotatingLog(self.filename, keep=0)
+        self.touch("peuchre.log.20261019-010000.gz",
+                   "peuchre.log.20261019-020000.gz")
+        log.prune(".gz")
+        self.assertEqual(len(self.remaining()), 2)
+        log.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
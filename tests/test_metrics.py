@@ -0,0 +1,96 @@
+###########################################################################
+# Tests for the metrics endpoint's output: the counts, rates, and latency
+# histograms of a snapshot come out as the Prometheus text format lines we
+# expect.
+#
+# Run from the top of the tree with: python3 -m pytest tests
+
+import unittest
+
+from latency import Histogram
+from metrics import formatMetrics, labels
+
+
+###########################################################################
+# This returns a snapshot, as Record.snapshot() makes them
+#
+def makeSnapshot(latency={}):
+    return {
+        'time'     : 1100.0,
+        'start'    : 1000.0,
+        'team1'    : "random0",
+        'team2'    : "random1",
+        'games'    : 5,
+        'hands'    : 43,
+        'orders'   : 20,
+        'calls'    : 11,
+        'euchres'  : 6,
+        'timeouts' : 1,
+        'makers'   : [ 17, 14 ],
+        'orderers' : [ 11, 9 ],
+        'callers'  : [ 6, 5 ],
+        'teameuchres' : [ 2, 4 ],
+        'rates'    : { 10: (0.1, 1.0), 60: (0.05, 0.5), 600: (0, 0),
+                       3600: (0, 0), 86400: (0, 0) },
+        'latency'  : latency,
+    }
+
+
+class TestLabels(unittest.TestCase):
+
+    def testNone(self):
+        self.assertEqual(labels(), "")
+
+    def testQuoted(self):
+        self.assertEqual(labels(team=1, module='a"b'),
+            '{team="1",module="a\\"b"}')
+
+
+class TestFormat(unittest.TestCase):
+
+    def testCounts(self):
+        lines = formatMetrics(makeSnapshot(), 3).splitlines()
+        for line in (
+                "# TYPE peuchre_games_total counter",
+                "peuchre_games_total 5",
+                "peuchre_hands_total 43",
+                "peuchre_timeouts_total 1",
+                'peuchre_team_makes_total{team="1",module="random0"} 17',
+                'peuchre_team_euchres_total{team="2",module="random1"} 4',
+                'peuchre_games_per_second{window="10s"} 0.1000',
+                'peuchre_hands_per_second{window="1m"} 0.5000',
+                'peuchre_hands_per_second{window="1d"} 0.0000',
+                "peuchre_active_games 3",
+                "peuchre_uptime_seconds 100.0"):
+            self.assertIn(line, lines)
+
+    def testEndsWithNewline(self):
+        self.assertTrue(formatMetrics(makeSnapshot(), 0).endswith("\n"))
+
+    def testHistogram(self):
+        # 3us, 20us and 2s: the buckets are cumulative, and the +Inf bucket
+        # is the count
+        hist = Histogram()
+        for ns in (3000, 20000, 2000000000):
+            hist.add(ns)
+        text = formatMetrics(
+            makeSnapshot({ "random0": { "decidePlay": hist } }), 0)
+        lines = text.splitlines()
+        self.assertIn("# TYPE peuchre_latency_seconds histogram", lines)
+        name = 'peuchre_latency_seconds_bucket{module="random0",' \
+            'kind="decidePlay",le="%s"} %d'
+        for (le, n) in (("1e-05", 1), ("2.5e-05", 2), ("1", 2),
+                        ("2.5", 3), ("10", 3), ("+Inf", 3)):
+            self.assertIn(name % (le, n), lines)
+        self.assertIn('peuchre_latency_seconds_count{module="random0",'
+            'kind="decidePlay"} 3', lines)
+        self.assertIn('peuchre_latency_seconds_sum{module="random0",'
+            'kind="decidePlay"} 2.000023', lines)
+
+    def testNoLatency(self):
+        text = formatMetrics(makeSnapshot(), 0)
+        self.assertNotIn("peuchre_latency_seconds_bucket", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
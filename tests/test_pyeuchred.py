@@ -0,0 +1,144 @@
+###########################################################################
+# Tests for the python stand-in server's frame handling: a good JOIN is
+# seated, and malformed frames close their connection without taking the
+# selector thread (and every other table) down with them.
+#
+# Run from the top of the tree with: python3 -m pytest tests
+
+import socket
+import struct
+import unittest
+
+import pyeuchred
+
+from pyeuchred import Server, MSG, TAIL, splitName, joinName
+
+
+###########################################################################
+# This packs a JOIN frame, with the given name length if it's not the
+# name's own
+#
+def joinFrame(name, namelen=None, protocol=1):
+    if namelen is None:
+        namelen = len(name)
+    body = struct.pack("!iii", MSG['JOIN'], protocol, namelen) + name + TAIL
+    return struct.pack("!i", len(body)) + body
+
+
+class TestNames(unittest.TestCase):
+
+    def testSplitName(self):
+        self.assertEqual(splitName("p0t1@12"), ("p0t1", 12))
+        self.assertEqual(splitName("p0t1"), ("p0t1", None))
+        self.assertEqual(splitName("a@b@3"), ("a@b", 3))
+        self.assertEqual(splitName("bob@"), ("bob@", None))
+
+    def testSplitNameUnicodeDigits(self):
+        # isdigit() accepts these, but int() doesn't
+        self.assertEqual(splitName("p0@١٢"), ("p0@١٢", None))
+        self.assertEqual(splitName("p0@²"), ("p0@²", None))
+
+    def testJoinName(self):
+        data = joinFrame(b"bob")[4:]
+        self.assertEqual(joinName(data, 3), "bob")
+        self.assertIsNone(joinName(data, -1))
+        self.assertIsNone(joinName(data, 4))
+        self.assertIsNone(joinName(data, 1000))
+
+    def testJoinNameNotUtf8(self):
+        data = joinFrame(b"\xff\xfe")[4:]
+        with self.assertRaises(ValueError):
+            joinName(data, 2)
+
+
+class TestServer(unittest.TestCase):
+
+    ###########################################################################
+    # Each test gets its own server, listening on a free port
+    #
+    def setUp(self):
+        self.server = Server()
+        self.port = self.server.listen("127.0.0.1", 0)
+        self.server.start()
+
+    def tearDown(self):
+        self.server.listener.close()
+
+
+    ###########################################################################
+    # This sends raw bytes on a new connection, and returns what comes back
+    # before the server closes it (or a short wait passes)
+    #
+    def exchange(self, data):
+        sock = socket.create_connection(("127.0.0.1", self.port))
+        sock.settimeout(2)
+        try:
+            sock.sendall(data)
+            reply = b""
+            while True:
+                try:
+                    chunk = sock.recv(4096)
+                except socket.timeout:
+                    return (reply, False)
+                if not chunk:
+                    return (reply, True)
+                reply += chunk
+                sock.settimeout(0.2)
+        finally:
+            sock.close()
+
+    def assertClosed(self, data):
+        (reply, closed) = self.exchange(data)
+        self.assertTrue(closed)
+        self.assertEqual(reply, b"")
+
+    def assertServing(self):
+        self.assertTrue(self.server.is_alive())
+        (reply, closed) = self.exchange(joinFrame(b"ok"))
+        self.assertGreaterEqual(len(reply), 26)
+        (size, msg) = struct.unpack_from("!ii", reply)
+        self.assertEqual(msg, MSG['JOINACCEPT'])
+
+
+    def testJoin(self):
+        self.assertServing()
+
+    def testNegativeSize(self):
+        self.assertClosed(struct.pack("!i", -4) + b"\0"*8)
+        self.assertServing()
+
+    def testLargeNegativeSize(self):
+        self.assertClosed(struct.pack("!i", -100) + b"\0"*2)
+        self.assertServing()
+
+    def testTinySize(self):
+        self.assertClosed(struct.pack("!i", 2) + TAIL)
+        self.assertServing()
+
+    def testHugeSize(self):
+        self.assertClosed(struct.pack("!i", pyeuchred.MAXFRAME + 1))
+        self.assertServing()
+
+    def testBadNameLength(self):
+        self.assertClosed(joinFrame(b"bob", namelen=-5))
+        self.assertClosed(joinFrame(b"bob", namelen=1000))
+        self.assertServing()
+
+    def testNameNotUtf8(self):
+        self.assertClosed(joinFrame(b"\xff\xfe"))
+        self.assertServing()
+
+    def testNoSuchTable(self):
+        (reply, closed) = self.exchange(joinFrame(b"bob@999"))
+        (size, msg) = struct.unpack_from("!ii", reply)
+        self.assertEqual(msg, MSG['DECLINE'])
+        self.assertServing()
+
+    def testNotJoin(self):
+        body = struct.pack("!iii", MSG['START'], 1, 0) + TAIL
+        self.assertClosed(struct.pack("!i", len(body)) + body)
+        self.assertServing()
+
+
+if __name__ == "__main__":
+    unittest.main()
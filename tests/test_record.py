@@ -0,0 +1,143 @@
+###########################################################################
+# Tests for the stats record's throughput series: sampling fills in every
+# interval that's passed, and the windowed rates come from the finest
+# series that covers the window.  Also, what one run exports for the stats
+# file, another loads back the same.
+#
+# Run from the top of the tree with: python3 -m pytest tests
+
+import json
+import time
+import unittest
+
+from collections import deque
+
+from latency import Histogram
+from record import Record
+
+
+###########################################################################
+# This returns a series of n samples, interval seconds apart, of a run
+# that plays a game and 10 hands a second
+#
+def makeSeries(interval, n, maxlen):
+    return deque([ (t, t, 10*t) for t in range(0, n*interval, interval) ],
+        maxlen=maxlen)
+
+
+class TestSeries(unittest.TestCase):
+
+    def setUp(self):
+        self.record = Record(files=False)
+
+    def testSample(self):
+        # a late call catches up with a sample per interval passed, so a
+        # stall shows up as no change rather than a gap
+        record = self.record
+        record.counts.games = 2
+        record.counts.hands = 17
+        record.seriesnext[1] = time.time() - 2.5
+        record.sample()
+        samples = list(record.series[1])[1:]
+        self.assertEqual(len(samples), 3)
+        self.assertEqual([ s[1:] for s in samples ], [ (2, 17) ]*3)
+        self.assertEqual(samples[1][0] - samples[0][0], 1)
+        self.assertGreater(record.seriesnext[1], time.time())
+
+    def testWindowRate(self):
+        record = self.record
+        record.series[1] = makeSeries(1, 101, 3600)
+        self.assertEqual(record.windowRate(10), (1.0, 10.0))
+        self.assertEqual(record.windowRate(60), (1.0, 10.0))
+
+    def testRecentOnly(self):
+        # the rate is over the last window, not the whole series
+        record = self.record
+        record.series[1] = makeSeries(1, 101, 3600)
+        record.series[1].append((101, 101, 1030))
+        (games, hands) = record.windowRate(10)
+        self.assertAlmostEqual(hands, 12.0)
+
+    def testCoarserSeries(self):
+        # the 1 second series only covers 100s, so a 600s window comes from
+        # the 60 second series
+        record = self.record
+        record.series[1] = makeSeries(1, 101, 3600)
+        record.series[60] = makeSeries(60, 20, 10080)
+        record.series[60][-1] = (1140, 1140, 11400)
+        record.series[60][-11] = (540, 540, 5100)
+        self.assertEqual(record.windowRate(600), (1.0, 10.5))
+
+    def testNotCovered(self):
+        # no series covers the window: use as much as we have
+        record = self.record
+        record.series[1] = makeSeries(1, 101, 3600)
+        self.assertEqual(record.windowRate(86400), (1.0, 10.0))
+
+    def testNoSamples(self):
+        self.assertEqual(self.record.windowRate(10), (0, 0))
+
+
+class TestExport(unittest.TestCase):
+
+    def setUp(self):
+        record = Record(team1="random0", team2="random1", files=False)
+        record.counts.games = 3
+        record.counts.hands = 29
+        record.counts.timeouts = 1
+        record.makers.team = [ 12, 9 ]
+        record.euchres.team1hole = [ 0, 1, 0, 0, 2, 0 ]
+        record.chand = { "a": 1, "b": 2 }
+        record.ccount = 4
+        record.cmax = 2
+        record.follow[1] = { "x": 5 }
+        record.setThreads(25, 31.5)
+        record.series[1] = makeSeries(1, 101, 3600)
+        hist = Histogram()
+        for ns in (1000, 2000, 50000):
+            hist.add(ns)
+        record.addTimings("random0", { "decidePlay": hist })
+        self.record = record
+
+        # the stats file carries it as JSON
+        self.loaded = Record(files=False)
+        self.loaded.load(json.loads(json.dumps(record.export())))
+
+    def testCounts(self):
+        loaded = self.loaded
+        self.assertEqual((loaded.team1, loaded.team2), ("random0", "random1"))
+        self.assertEqual(loaded.start, self.record.start)
+        self.assertEqual((loaded.counts.games, loaded.counts.hands,
+            loaded.counts.timeouts), (3, 29, 1))
+        self.assertEqual(loaded.makers.team, [ 12, 9 ])
+        self.assertEqual(loaded.euchres.team1hole, [ 0, 1, 0, 0, 2, 0 ])
+        self.assertEqual((loaded.ccount, loaded.cmax), (4, 2))
+        self.assertEqual(loaded.follow[1], { "x": 5 })
+        self.assertEqual((loaded.threads, loaded.windowhps), (25, 31.5))
+
+    def testPublished(self):
+        # the figures we can't recompute come from what was published
+        loaded = self.loaded
+        self.assertEqual(loaded.uniqueHands(), 2)
+        for window in (10, 60, 600, 3600, 86400):
+            self.assertEqual(loaded.windowRate(window),
+                self.record.windowRate(window))
+
+    def testSeries(self):
+        # only the last minute of samples is sent, for the sparkline
+        self.assertEqual(list(self.loaded.series[1]),
+            list(self.record.series[1])[-61:])
+        self.assertEqual(self.loaded.sparkline(60),
+            self.record.sparkline(60))
+
+    def testLatency(self):
+        want = self.record.latency["random0"]["decidePlay"]
+        got = self.loaded.latency["random0"]["decidePlay"]
+        self.assertEqual((got.count, got.total, got.max),
+            (want.count, want.total, want.max))
+        self.assertEqual(got.buckets, want.buckets)
+        self.assertEqual(got.percentile(0.5), want.percentile(0.5))
+
+
+if __name__ == "__main__":
+    unittest.main()
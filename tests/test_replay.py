@@ -0,0 +1,80 @@
+###########################################################################
+# Tests for the replay helpers: a recorded game's deals and its recorded
+# results skip the same incomplete hands, so they line up hand for hand.
+#
+# Run from the top of the tree with: python3 -m pytest tests
+
+import unittest
+
+from card import Card
+from gamerecord import GameData, HandData
+from replay import tableDeals, recordedNets, meanError
+
+
+###########################################################################
+# This builds a recorded hand with the given dealer and scores after it;
+# if complete is false, one seat's cards weren't captured
+#
+def makeHand(dealer, scores, complete=True):
+    hand = HandData()
+    hand.dealer = dealer
+    hand.hole = Card(value=9, suit=1)
+    hand.cards = [ [ Card(value=10+i, suit=seat) for i in range(5) ]
+                   for seat in range(4) ]
+    if not complete:
+        hand.cards[2] = None
+    hand.scores = scores
+    return hand
+
+
+class TestRecordedGame(unittest.TestCase):
+
+    def setUp(self):
+        self.game = GameData(0)
+        self.game.hands = [
+            makeHand(0, (1, 0)),
+            makeHand(1, (1, 2), complete=False),
+            makeHand(2, (5, 2)),
+            makeHand(3, (5, 3)),
+        ]
+
+    def testDeals(self):
+        deals = tableDeals(self.game)
+        self.assertEqual([ d[0] for d in deals ], [ 0, 2, 3 ])
+        (dealer, hands, hole) = deals[0]
+        self.assertEqual(hole, (9, 1))
+        self.assertEqual(len(hands), 4)
+        self.assertEqual(hands[3], [ (10, 3), (11, 3), (12, 3), (13, 3),
+                                     (14, 3) ])
+
+    def testNets(self):
+        # the incomplete hand's 2 points aren't counted in the next hand's
+        # net either
+        self.assertEqual(recordedNets(self.game), [ 1, 4, -1 ])
+
+    def testLineUp(self):
+        self.assertEqual(len(tableDeals(self.game)),
+            len(recordedNets(self.game)))
+
+    def testNoHole(self):
+        self.game.hands[0].hole = None
+        self.assertEqual([ d[0] for d in tableDeals(self.game) ], [ 2, 3 ])
+        self.assertEqual(recordedNets(self.game), [ 4, -1 ])
+
+
+class TestMeanError(unittest.TestCase):
+
+    def testEmpty(self):
+        self.assertEqual(meanError([]), (0, 0.0, 0.0))
+
+    def testOne(self):
+        self.assertEqual(meanError([ 3 ]), (1, 3.0, 0.0))
+
+    def testMany(self):
+        (n, mean, err) = meanError([ 1, 2, 3, 4 ])
+        self.assertEqual((n, mean), (4, 2.5))
+        self.assertAlmostEqual(err, (5/12)**0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
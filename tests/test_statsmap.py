@@ -0,0 +1,89 @@
+###########################################################################
+# Tests for the stats file: what the writer publishes, the reader reads
+# back, a write in progress is never read, and a reader follows a new run's
+# file when it replaces the old one.
+#
+# Run from the top of the tree with: python3 -m pytest tests
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from statsmap import StatsWriter, StatsReader, HEADER, MAGIC, VERSION
+
+
+class TestStatsMap(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.dir, "peuchre.stats")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def testNoFile(self):
+        self.assertIsNone(StatsReader(self.filename).read())
+
+    def testNothingPublished(self):
+        writer = StatsWriter(self.filename, size=4096)
+        self.assertIsNone(StatsReader(self.filename).read())
+        writer.close()
+
+    def testRoundTrip(self):
+        writer = StatsWriter(self.filename, size=4096)
+        reader = StatsReader(self.filename)
+        data = { "counts": { "games": 3, "hands": 27 }, "team1": "random0" }
+        writer.publish(data)
+        self.assertEqual(reader.read(), data)
+
+        # a shorter payload replaces a longer one cleanly
+        writer.publish({ "a": 1 })
+        self.assertEqual(reader.read(), { "a": 1 })
+        writer.close()
+
+        # and the last stats are still there after the writer's gone
+        self.assertEqual(StatsReader(self.filename).read(), { "a": 1 })
+        reader.detach()
+
+    def testTooBig(self):
+        writer = StatsWriter(self.filename, size=64)
+        writer.publish({ "a": 1 })
+        writer.publish({ "a": "x"*100 })
+        self.assertEqual(StatsReader(self.filename).read(), { "a": 1 })
+        writer.close()
+
+    def testWriteInProgress(self):
+        # an odd sequence means the writer is part way through: the reader
+        # doesn't return a torn copy
+        writer = StatsWriter(self.filename, size=4096)
+        writer.publish({ "a": 1 })
+        HEADER.pack_into(writer.map, 0, MAGIC, VERSION, writer.seq + 1, 0)
+        reader = StatsReader(self.filename)
+        self.assertIsNone(reader.read())
+        writer.publish({ "a": 2 })
+        self.assertEqual(reader.read(), { "a": 2 })
+        writer.close()
+        reader.detach()
+
+    def testReplaced(self):
+        first = StatsWriter(self.filename, size=4096)
+        first.publish({ "run": 1 })
+        reader = StatsReader(self.filename)
+        self.assertEqual(reader.read(), { "run": 1 })
+        first.close()
+
+        second = StatsWriter(self.filename, size=4096)
+        second.publish({ "run": 2 })
+        self.assertEqual(reader.read(), { "run": 2 })
+        second.close()
+        reader.detach()
+
+    def testNotStatsFile(self):
+        with open(self.filename, "wb") as f:
+            f.write(b"not a stats file" + b"\0"*100)
+        self.assertIsNone(StatsReader(self.filename).read())
+
+
+if __name__ == "__main__":
+    unittest.main()
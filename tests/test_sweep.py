@@ -0,0 +1,74 @@
+###########################################################################
+# Tests for the sweep specs: the value lists and ranges parse into the
+# right values, and the grid and random searches build their configs from
+# them.
+#
+# Run from the top of the tree with: python3 -m pytest tests
+
+import random
+import unittest
+
+from sweep import parseSpec, gridConfigs, randomConfigs
+
+
+class TestParseSpec(unittest.TestCase):
+
+    def testList(self):
+        self.assertEqual(parseSpec([ "callRate=0.15,0.25" ]),
+            [ ("callRate", [0.15, 0.25], None) ])
+
+    def testRange(self):
+        [ (name, values, span) ] = parseSpec([ "orderRate=0.1:0.3:5" ])
+        self.assertEqual(name, "orderRate")
+        self.assertEqual(span, (0.1, 0.3))
+        self.assertEqual(len(values), 5)
+        for (value, want) in zip(values, (0.1, 0.15, 0.2, 0.25, 0.3)):
+            self.assertAlmostEqual(value, want)
+
+    def testRangeOfOne(self):
+        self.assertEqual(parseSpec([ "x=0.5:0.9:1" ]),
+            [ ("x", [0.5], (0.5, 0.9)) ])
+
+    def testNameStripped(self):
+        self.assertEqual(parseSpec([ " x =1" ])[0][0], "x")
+
+    def testMany(self):
+        self.assertEqual([ p[0] for p in parseSpec([ "a=1", "b=2,3" ]) ],
+            [ "a", "b" ])
+
+    def testBad(self):
+        for spec in ("x", "x=", "x=a,b", "x=1:2", "x=1:2:n"):
+            with self.assertRaises(ValueError):
+                parseSpec([ spec ])
+
+
+class TestConfigs(unittest.TestCase):
+
+    def testGrid(self):
+        params = parseSpec([ "a=1,2", "b=10,20,30" ])
+        configs = gridConfigs(params)
+        self.assertEqual(len(configs), 6)
+        self.assertEqual(configs[0], { "a": 1, "b": 10 })
+        self.assertEqual(configs[-1], { "a": 2, "b": 30 })
+        self.assertEqual(len(set(tuple(sorted(c.items())) for c in configs)),
+            6)
+
+    def testGridEmpty(self):
+        self.assertEqual(gridConfigs([]), [ {} ])
+
+    def testRandom(self):
+        params = parseSpec([ "a=0.1:0.3:3", "b=1,2" ])
+        configs = randomConfigs(params, 50, random.Random(1))
+        self.assertEqual(len(configs), 50)
+        for config in configs:
+            self.assertTrue(0.1 <= config["a"] <= 0.3)
+            self.assertIn(config["b"], (1, 2))
+
+    def testRandomSeeded(self):
+        params = parseSpec([ "a=0:1:2" ])
+        self.assertEqual(randomConfigs(params, 5, random.Random(7)),
+            randomConfigs(params, 5, random.Random(7)))
+
+
+if __name__ == "__main__":
+    unittest.main()
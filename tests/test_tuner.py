@@ -0,0 +1,93 @@
+###########################################################################
+# Tests for the auto-threads tuner: the hill-climb moves the right way on
+# better, worse and flat throughput, holds at a plateau and re-probes, and
+# stays within its bounds.
+#
+# Run from the top of the tree with: python3 -m pytest tests
+
+import unittest
+
+from tuner import Tuner
+
+
+class TestAdjust(unittest.TestCase):
+
+    def testFirstStep(self):
+        tuner = Tuner(threads=20)
+        tuner.adjust(100.0)
+        self.assertEqual(tuner.threads, 25)
+        self.assertEqual(tuner.lasthps, 100.0)
+
+    def testBetter(self):
+        # keep going the same way, with a bigger step
+        tuner = Tuner(threads=20)
+        tuner.adjust(100.0)
+        tuner.adjust(120.0)
+        self.assertEqual(tuner.step, 6)
+        self.assertEqual(tuner.threads, 31)
+        self.assertEqual(tuner.lasthps, 120.0)
+
+    def testWorse(self):
+        # turn around, with half the step
+        tuner = Tuner(threads=20)
+        tuner.adjust(100.0)
+        tuner.adjust(120.0)
+        tuner.adjust(90.0)
+        self.assertEqual(tuner.direction, -1)
+        self.assertEqual(tuner.step, 3)
+        self.assertEqual(tuner.threads, 28)
+
+    def testFlatThenHold(self):
+        # the threads added bought nothing, so step back and hold there,
+        # until it's time to probe upwards again
+        tuner = Tuner(threads=20, probe=3)
+        tuner.adjust(100.0)
+        tuner.adjust(101.0)
+        self.assertEqual(tuner.threads, 20)
+        self.assertEqual(tuner.direction, -1)
+
+        tuner.adjust(100.0)
+        self.assertEqual(tuner.threads, 20)
+        self.assertEqual(tuner.held, 2)
+
+        tuner.adjust(100.0)
+        self.assertEqual(tuner.threads, 21)
+        self.assertEqual((tuner.direction, tuner.step, tuner.held), (1, 1, 0))
+
+
+class TestMove(unittest.TestCase):
+
+    def testBoundsOnStart(self):
+        self.assertEqual(Tuner(threads=500, maxthreads=200).threads, 200)
+        self.assertEqual(Tuner(threads=0, minthreads=2).threads, 2)
+
+    def testClamped(self):
+        tuner = Tuner(threads=190, maxthreads=200)
+        tuner.move(50.0)
+        self.assertEqual(tuner.threads, 200)
+        self.assertEqual(tuner.lasthps, 50.0)
+
+    def testAtBound(self):
+        # we can't move, but we turn around and still remember the
+        # throughput, so the next window has something to compare against
+        tuner = Tuner(threads=200, maxthreads=200)
+        tuner.adjust(10.0)
+        self.assertEqual(tuner.threads, 200)
+        self.assertEqual(tuner.lasthps, 10.0)
+        self.assertEqual(tuner.direction, -1)
+
+        # so a better window next time moves down off the bound
+        tuner.adjust(20.0)
+        self.assertEqual(tuner.threads, 200 - tuner.step)
+
+    def testMoveClearsWindow(self):
+        tuner = Tuner(threads=20)
+        tuner.samples.extend([ (0.0, 0), (10.0, 500) ])
+        self.assertEqual(tuner.hps(), 50.0)
+        tuner.move(50.0)
+        self.assertEqual(len(tuner.samples), 0)
+        self.assertEqual(tuner.hps(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
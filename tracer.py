@@ -0,0 +1,134 @@
+###########################################################################
+# This is the game tracer for peuchre --trace: it records a timeline of
+# spans for every game, and writes them out as Chrome trace-event JSON,
+# which can be loaded into chrome://tracing or ui.perfetto.dev to see where
+# the time in a game went.  Each game is a process in the trace, with a
+# row for the game thread itself and one for each seat:
+#  - game row  : the server start, and each select() wait on the server
+#  - seat rows : the join, every message handled, and within them each
+#                decide*() call, send, and wait for the record lock (the
+#                kinds the player times, see latency.py)
+# Seat spans are tagged with the hand and trick.  So a slow stretch of a
+# game can be put down to the server (long waits on the game row), the
+# client (long message spans), or player logic (long decide spans).
+#
+# Each game keeps its own list of events as it's played, so tracing never
+# takes a lock during a game, and hands them to the tracer at the end: the
+# game's thread turns them into JSON itself, and the tracer's lock is only
+# held to append the finished text to the file.
+
+import json
+import threading
+
+from time import perf_counter_ns
+
+
+class Tracer:
+
+    ###########################################################################
+    # This initializes the object, and starts the trace file: timestamps in
+    # the trace are microseconds from now
+    #
+    def __init__(self, filename):
+        self.filename = filename
+        self.origin = perf_counter_ns()
+        self.lock = threading.Lock()
+        self.events = 0
+
+        self.f = open(filename, "w")
+        self.f.write("[\n")
+
+
+    ###########################################################################
+    # This returns the trace for a new game
+    #
+    def game(self, gcount):
+        return GameTrace(self, gcount)
+
+
+    ###########################################################################
+    # This appends a game's events to the file: they're encoded before we
+    # take the lock, so games finishing together only wait on each other
+    # for the write
+    #
+    def add(self, events):
+        if not events:
+            return
+        text = ",\n".join(json.dumps(event, separators=(",", ":"))
+                           for event in events)
+        with self.lock:
+            if self.f is None:
+                return
+            if self.events:
+                self.f.write(",\n")
+            self.f.write(text)
+            self.events += len(events)
+
+
+    ###########################################################################
+    # This finishes the trace file: games that end after this are dropped
+    #
+    def close(self):
+        with self.lock:
+            if self.f is None:
+                return
+            self.f.write("\n]\n")
+            self.f.close()
+            self.f = None
+
+
+class GameTrace:
+
+    ###########################################################################
+    # This initializes the trace of one game: it's a process in the trace,
+    # numbered by the game count
+    #
+    def __init__(self, tracer, gcount):
+        self.tracer = tracer
+        self.origin = tracer.origin
+        self.pid = gcount
+        self.events = [
+            { "name": "process_name", "ph": "M", "pid": gcount,
+              "args": { "name": "game %d" % (gcount) } },
+            { "name": "thread_name", "ph": "M", "pid": gcount, "tid": 0,
+              "args": { "name": "game" } },
+        ]
+
+
+    ###########################################################################
+    # This names a seat's row of the trace, eg. p0t1
+    #
+    def name(self, seat, name):
+        self.events.append({ "name": "thread_name", "ph": "M",
+            "pid": self.pid, "tid": seat + 1, "args": { "name": name } })
+
+
+    ###########################################################################
+    # This adds a span, from start to end in perf_counter_ns() time, to the
+    # row of the given seat, or the game's row if seat is negative (eg. a
+    # player that hasn't been given a seat yet)
+    #
+    def span(self, seat, name, start, end, **args):
+        self.events.append({ "name": name, "ph": "X",
+            "pid": self.pid, "tid": seat + 1 if seat >= 0 else 0,
+            "ts": (start - self.origin) / 1000,
+            "dur": (end - start) / 1000,
+            "args": args })
+
+
+    ###########################################################################
+    # This adds an instant event, such as a timeout, to the game's row
+    #
+    def mark(self, name, **args):
+        self.events.append({ "name": name, "ph": "i", "s": "p",
+            "pid": self.pid, "tid": 0,
+            "ts": (perf_counter_ns() - self.origin) / 1000,
+            "args": args })
+
+
+    ###########################################################################
+    # This hands our events to the tracer, once the game is over
+    #
+    def close(self):
+        self.tracer.add(self.events)
+        self.events = []
@@ -0,0 +1,171 @@
+###########################################################################
+# This object implements the adaptive concurrency controller used by the
+# --auto-threads mode of peuchre.  The mainline feeds it the running hand
+# count about once a second; the tuner keeps a sliding window of those
+# samples, computes the hands/s over the window, and hill-climbs the number
+# of concurrent games:
+#  - after each change we let the new setting settle for one window, then
+#    measure its throughput
+#  - if throughput improved, we keep moving in the same direction and grow
+#    the step additively
+#  - if throughput dropped, we reverse direction and halve the step
+#  - if throughput is flat (within the tolerance), we've hit the plateau:
+#    if we got there by adding threads we step back to the cheaper setting,
+#    and then we hold, re-probing occasionally in case the load on the box
+#    changes
+
+import time
+
+from collections import deque
+from logging import warning as warn, log, debug, info, error, critical
+
+class Tuner:
+
+    ###########################################################################
+    # This initializes the object
+    #
+    def __init__(self,**kwargs):
+        # the starting number of threads, and the bounds we'll move within
+        self.threads = 25
+        if 'threads' in kwargs:
+            self.threads = kwargs['threads']
+        self.minthreads = 1
+        if 'minthreads' in kwargs:
+            self.minthreads = kwargs['minthreads']
+        self.maxthreads = 200
+        if 'maxthreads' in kwargs:
+            self.maxthreads = kwargs['maxthreads']
+        self.threads = max(self.minthreads, min(self.maxthreads, self.threads))
+
+        # the length of the measurement window, in seconds
+        self.window = 20
+        if 'window' in kwargs:
+            self.window = kwargs['window']
+
+        # the relative change in hands/s we treat as noise
+        self.tolerance = 0.03
+        if 'tolerance' in kwargs:
+            self.tolerance = kwargs['tolerance']
+
+        # the number of windows we hold at a plateau before probing again
+        self.probe = 10
+        if 'probe' in kwargs:
+            self.probe = kwargs['probe']
+
+        # the (time, hands) samples in the current window
+        self.samples = deque()
+
+        # hill-climbing state: the direction and size of the next move, the
+        # throughput measured at the previous setting, when we last changed
+        # the setting, and how many windows we've held at the plateau
+        self.direction = 1
+        self.step = max(1, self.threads // 4)
+        self.lasthps = None
+        self.lastchange = time.time()
+        self.held = 0
+
+
+    ###########################################################################
+    # This returns the hands/s measured across the current window, or 0 if
+    # we don't have enough samples yet
+    #
+    def hps(self):
+        if len(self.samples) < 2:
+            return 0
+        (t0, h0) = self.samples[0]
+        (t1, h1) = self.samples[-1]
+        if t1 <= t0:
+            return 0
+        return (h1 - h0) / (t1 - t0)
+
+
+    ###########################################################################
+    # This takes the current total hand count and records it in the window;
+    # once a full window has passed since the last change, it evaluates the
+    # throughput and possibly moves the setting.  It returns the number of
+    # threads that should be running.
+    #
+    def sample(self, hands):
+        now = time.time()
+        self.samples.append((now, hands))
+
+        # drop samples that have fallen out of the window
+        while self.samples and self.samples[0][0] < now - self.window:
+            self.samples.popleft()
+
+        # wait until the current setting has had a full window to settle,
+        # and then another to be measured
+        if now - self.lastchange < 2*self.window:
+            return self.threads
+
+        self.adjust(self.hps())
+        return self.threads
+
+
+    ###########################################################################
+    # This compares the throughput of the current setting against the
+    # previous one, and picks the next setting
+    #
+    def adjust(self, hps):
+        # on the very first measurement we've nothing to compare against, so
+        # we just take the first step
+        if self.lasthps is None:
+            self.move(hps)
+            return
+
+        # better: keep going the same way, a little faster
+        if hps > self.lasthps * (1 + self.tolerance):
+            self.step += 1
+            self.held = 0
+            self.move(hps)
+
+        # worse: turn around, and take smaller steps
+        elif hps < self.lasthps * (1 - self.tolerance):
+            self.direction = -self.direction
+            self.step = max(1, self.step // 2)
+            self.held = 0
+            self.move(hps)
+
+        # flat after adding threads: they bought us nothing, so step back
+        # down to the cheaper setting and hold there
+        elif self.direction > 0 and self.held == 0:
+            self.direction = -1
+            self.held = 1
+            self.move(hps)
+
+        # flat otherwise: we're at the plateau, so hold, and periodically
+        # re-probe upwards in case the box has more headroom now
+        else:
+            self.held += 1
+            self.lastchange = time.time() - self.window
+            if self.held >= self.probe:
+                self.direction = 1
+                self.step = 1
+                self.held = 0
+                self.move(hps)
+
+
+    ###########################################################################
+    # This moves the setting one step in the current direction, clamped to
+    # our bounds, and resets the measurement window
+    #
+    def move(self, hps):
+        threads = self.threads + self.direction*self.step
+        threads = max(self.minthreads, min(self.maxthreads, threads))
+
+        # remember this setting's throughput, even if we can't move off it,
+        # so the next window has something to compare against
+        self.lasthps = hps
+
+        # if we've hit a bound, turn around for next time
+        if threads == self.threads:
+            self.direction = -self.direction
+            self.lastchange = time.time() - self.window
+            return
+
+        info("server: auto-threads %d -> %d (%.2f hands/s)"
+            % (self.threads, threads, hps))
+
+        self.threads = threads
+        self.samples.clear()
+        self.lastchange = time.time()